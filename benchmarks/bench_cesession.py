@@ -0,0 +1,53 @@
+"""CESession startup with N simulated instruments."""
+
+import socket
+
+import pytest
+
+from flex.exp.CESession import CESession
+from flex.sim import SimExperiment
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _config(n: int) -> dict:
+    return {
+        "Experiment": {
+            "Instruments": [
+                {
+                    "Type": f"Cryostat{k}",
+                    "Address": f"tcp://localhost:{_free_port()}",
+                    "class path": "PPMS/instrument.PPMS.lvclass",
+                }
+                for k in range(n)
+            ],
+        },
+    }
+
+
+@pytest.fixture(scope="module", params=[1, 4, 16])
+def experiment(request):
+    with SimExperiment(_config(request.param), latency=0.001) as sim:
+        yield sim
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_startup(benchmark, experiment, cold_start, lazy):
+    def start():
+        session = CESession(config_path=experiment.config_path, lazy=lazy)
+        session.connection_status(wait_timeout=None)
+        return session
+
+    sessions = []
+
+    def close():
+        while sessions:
+            sessions.pop().close_all()
+        cold_start()
+
+    benchmark.pedantic(lambda: sessions.append(start()), setup=close, rounds=5)
+    close()
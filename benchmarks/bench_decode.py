@@ -0,0 +1,64 @@
+"""
+Encoding and decoding of large getResults and getSweepWaveforms replies,
+and SweepDataset parsing. ``--reply`` swaps in a recorded reply for the
+codec benchmarks (see conftest.py).
+"""
+
+import pytest
+
+from flex.inst.base import Instrument
+from flex.inst.codec import _MSGPACK_AVAILABLE, _ORJSON_AVAILABLE, decode_frames, get_codec
+from flex.inst.levylab.Lockin import SweepDataset
+
+CODECS = ["json"] + (["orjson"] if _ORJSON_AVAILABLE else []) + (["msgpack"] if _MSGPACK_AVAILABLE else [])
+
+
+def _reply(sim, method, params=None, codec="json"):
+    request = {"jsonrpc": "2.0", "method": method, "params": params or {}, "id": "1"}
+    return sim.handle(get_codec(codec).encode(request))
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_decode_results(benchmark, sim_results, codec):
+    frames = _reply(sim_results, "getResults", codec=codec)
+    benchmark(decode_frames, get_codec(codec), frames)
+
+
+@pytest.fixture(scope="module")
+def sweep_reply(request, sim_lockin):
+    """The getSweepWaveforms reply passed with --reply, else the simulated one."""
+    path = request.config.getoption("--reply")
+    if path:
+        with open(path, "rb") as f:
+            return get_codec("json").decode(f.read())
+    return decode_frames(get_codec("json"), _reply(sim_lockin, "getSweepWaveforms"))
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_encode_sweep_waveforms(benchmark, sweep_reply, codec):
+    benchmark(get_codec(codec).encode, sweep_reply)
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_decode_sweep_waveforms(benchmark, sweep_reply, codec):
+    wire = get_codec(codec).encode(sweep_reply)
+    benchmark(decode_frames, get_codec(codec), [wire])
+
+
+def test_decode_sweep_waveforms_binary(benchmark, sim_lockin):
+    frames = _reply(sim_lockin, "getSweepWaveforms", {"format": "binary"})
+    benchmark(decode_frames, get_codec("json"), frames)
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_get_sweep_waveforms(benchmark, sim_lockin, binary):
+    params = {"format": "binary"} if binary else {}
+    with Instrument(sim_lockin.address) as inst:
+        benchmark(inst._query, "getSweepWaveforms", params)
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_sweep_dataset(benchmark, sim_lockin, binary):
+    params = {"format": "binary"} if binary else {}
+    reply = decode_frames(get_codec("json"), _reply(sim_lockin, "getSweepWaveforms", params))
+    benchmark(SweepDataset.from_reply, reply["result"])
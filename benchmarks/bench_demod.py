@@ -0,0 +1,20 @@
+"""flex.analysis.demod on 8 AI channels × 4 references × 2 harmonics."""
+
+import numpy as np
+import pytest
+
+from flex.analysis.demod import demodulate
+
+FS = 100_000.0
+SIZES = [100_000, pytest.param(10_000_000, marks=pytest.mark.slow)]
+
+
+@pytest.mark.parametrize("filter", ["rc", "boxcar"])
+@pytest.mark.parametrize("n", SIZES)
+def test_demodulate(benchmark, n, filter):
+    signals = np.random.default_rng(0).normal(size=(8, n))
+    benchmark.pedantic(
+        demodulate, args=(signals, FS, [13.0, 17.0, 19.0, 23.0]),
+        kwargs={"harmonics": (1, 2), "tau": 0.01, "order": 4, "filter": filter, "decimate": 100},
+        rounds=3,
+    )
@@ -0,0 +1,45 @@
+"""Round-trip rate of flex.inst.base.Instrument against a simulated server, with and without pacing."""
+
+import pytest
+
+from flex.inst.base import Instrument
+
+
+@pytest.mark.parametrize("transport", ["req", "dealer"])
+def test_roundtrip(benchmark, sim_lockin, transport):
+    with Instrument(sim_lockin.address, transport=transport) as inst:
+        benchmark(inst._send_command, "getState")
+
+
+@pytest.mark.parametrize("min_interval", [0.0, 0.01])
+def test_paced_roundtrip(benchmark, sim_lockin, min_interval):
+    with Instrument(sim_lockin.address, min_interval=min_interval) as inst:
+        benchmark(inst._send_command, "getState")
+
+
+def test_sequential_8(benchmark, sim_lockin):
+    def run():
+        for _ in range(8):
+            inst._send_command("getState")
+
+    with Instrument(sim_lockin.address) as inst:
+        benchmark(run)
+
+
+def test_batch_8(benchmark, sim_lockin):
+    def run():
+        with inst.batch() as b:
+            for _ in range(8):
+                b.call("getState")
+
+    with Instrument(sim_lockin.address) as inst:
+        benchmark(run)
+
+
+def test_pipelined_8(benchmark, sim_lockin):
+    def run():
+        for future in [inst.submit("getState") for _ in range(8)]:
+            future.result()
+
+    with Instrument(sim_lockin.address, transport="dealer") as inst:
+        benchmark(run)
@@ -0,0 +1,31 @@
+"""Lock-in result access through flex.inst.levylab.Lockin."""
+
+import pytest
+
+from flex.inst.levylab.Lockin import Lockin
+
+PARAMS = ("X", "Y", "R", "Theta")
+
+
+@pytest.fixture
+def lockin(sim_results):
+    with Lockin(sim_results.address) as lockin:
+        yield lockin
+
+
+def test_get_lockin_result_32(benchmark, lockin):
+    """X, Y, R and Theta of 8 channels one key at a time: 32 round-trips."""
+    def run():
+        return [lockin.get_lockin_result(ch, param) for ch in range(1, 9) for param in PARAMS]
+
+    benchmark(run)
+
+
+def test_get_lockin_results_32(benchmark, lockin):
+    keys = [f"AI{ch}.Ref1.{param}" for ch in range(1, 9) for param in PARAMS]
+    benchmark(lockin.get_lockin_results, keys)
+
+
+def test_get_lockin_array_all(benchmark, lockin):
+    """Every channel, reference and parameter of a 32 x 8 lock-in."""
+    benchmark(lockin.get_lockin_array, range(1, 33), PARAMS, range(1, 9))
@@ -0,0 +1,23 @@
+"""PiezoScanner raster generation and image reconstruction."""
+
+import numpy as np
+import pytest
+
+from flex.exp.PiezoScanner import PiezoScanner
+
+SIZES = [512, pytest.param(2048, marks=pytest.mark.slow)]
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_generate_raster(benchmark, n):
+    scanner = PiezoScanner(daq=None)
+    benchmark(scanner.generate_raster, n, n, 60)
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_reconstruct_image(benchmark, n):
+    scanner = PiezoScanner(daq=None)
+    scanner.generate_raster(n, n, 60)
+    samples = int(60 * scanner.daq_fs / scanner.daq_num_samples)
+    scanner.detector = np.random.default_rng(0).normal(size=samples)
+    benchmark(scanner.reconstruct_image)
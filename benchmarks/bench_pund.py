@@ -0,0 +1,11 @@
+"""PUNDMeasurement waveform synthesis (1 s at 204.8 kS/s)."""
+
+import pytest
+
+from flex.exp.pund import PUNDConfig, PUNDMeasurement
+
+
+@pytest.mark.parametrize("waveform", ["triangle", "double-triangle", "sine", "square"])
+def test_build_waveform(benchmark, waveform):
+    pund = PUNDMeasurement(PUNDConfig(waveform=waveform, duration=1.0, plot=False))
+    benchmark(pund._build_waveform)
@@ -0,0 +1,15 @@
+"""flexTDMS.write_tdms with 1e7 samples (two 5e6-sample channels)."""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("nptdms")
+
+from flex.tdms.flexTDMS import write_tdms
+
+
+@pytest.mark.slow
+def test_write_tdms(benchmark, tmp_path):
+    rng = np.random.default_rng(0)
+    data = {"AO1": np.linspace(0, 1, 5_000_000), "AI1": rng.normal(size=5_000_000)}
+    benchmark.pedantic(write_tdms, args=(tmp_path / "bench.tdms", data), rounds=3)
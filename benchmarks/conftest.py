@@ -0,0 +1,79 @@
+"""
+Shared fixtures of the FLEX benchmark suite.
+
+The suite uses pytest-benchmark (pip install flex[bench]) and runs against
+the simulated servers in flex.sim, so no LabVIEW or hardware is needed:
+
+    pytest benchmarks                              # run and save under .benchmarks/
+    pytest benchmarks --benchmark-compare          # compare with the last saved run
+    pytest benchmarks --benchmark-compare-fail=median:10%
+    pytest benchmarks -k "not slow"                # skip the 2048² / 1e7-sample cases
+    pytest benchmarks/bench_decode.py --reply reply.json
+
+--reply times the codecs on a getSweepWaveforms reply recorded from a
+real server instead of the simulated one, e.g. saved with:
+
+    open("reply.json", "wb").write(lockin.codec.encode(lockin._send_command("getSweepWaveforms")))
+
+Saved runs are named after the commit they were taken at, so regressions
+show up when comparing a branch against a run from main.
+"""
+
+import pytest
+
+# flex is imported inside the fixtures, so that running pytest from the
+# repository root without flex installed does not fail on this file.
+
+
+def pytest_addoption(parser):
+    parser.addoption("--reply", help="recorded getSweepWaveforms JSON reply for bench_decode")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: large inputs (2048² rasters, 1e7 samples)")
+
+
+@pytest.fixture(scope="session")
+def sim_lockin():
+    """
+    A SimLockin with a finished 1 s sweep at 32 kS/s: 8 AO, 8 AI, 8 X and
+    8 Y waveforms, about 1e6 samples in total.
+    """
+    from flex.sim import SimLockin
+
+    with SimLockin(references=1, sample_rate=32_000, seed=0, noise=1e-4) as sim:
+        sim.sweep_config = {
+            "Sweep Time (s)": 1,
+            "Initial Wait (s)": 0,
+            "Channels": [{"Enable?": True, "Channel": 1, "Start": 0, "End": 1, "Pattern": "Ramp /"}],
+        }
+        sim._finish_sweep()
+        yield sim
+
+
+@pytest.fixture(scope="session")
+def sim_results():
+    """A SimLockin with 32 AI channels and 8 references: 1056 getResults entries."""
+    from flex.sim import SimLockin
+
+    with SimLockin(channels=32, references=8, seed=0, noise=1e-4) as sim:
+        yield sim
+
+
+def _clear_caches():
+    from flex.inst.metadata import get_metadata_cache
+    from flex.inst.pool import get_pool
+
+    get_pool().clear()
+    get_metadata_cache().invalidate()
+
+
+@pytest.fixture
+def cold_start():
+    """
+    Drop pooled sockets and cached metadata left by earlier tests; returns
+    the function doing it, for resetting between benchmark rounds.
+    """
+    _clear_caches()
+    yield _clear_caches
+    _clear_caches()
@@ -29,4 +29,9 @@ setup(
         'pyserial',
         'pywin32'
     ],
+    extras_require={
+        'fast': ['orjson', 'msgpack'],
+        'bench': ['pytest-benchmark', 'nptdms'],
+        'analysis': ['scipy'],
+    },
 )
@@ -0,0 +1,3 @@
+'''
+Offline analysis of FLEX measurement data.
+'''
@@ -0,0 +1,276 @@
+'''
+Software lock-in demodulation of raw AI waveforms.
+
+Demodulator mixes many channels with many reference frequencies and
+harmonics in one batched NumPy pass, low-pass filters the products and
+returns X, Y, R and Theta. Records of any length are processed in chunks:
+the reference phase and the filter state carry over from one chunk to the
+next, so the output equals that of a single pass.
+
+    from flex.analysis.demod import Demodulator, demodulate
+
+    # One shot, e.g. the AI rows of a Lockin.get_sweep_dataset()
+    result = demodulate(dataset.block("AI"), fs=1 / dataset.dt,
+                        frequencies=[13.0, 17.0], harmonics=(1, 2), tau=0.1)
+    result.R[0, 1, 0]      # AI1 at 17 Hz, first harmonic
+
+    # Streaming
+    demod = Demodulator(fs, [13.0], tau=0.1, order=4, decimate=100)
+    for chunk in chunks:
+        parts.append(demod.process(chunk))
+    result = DemodResult.concatenate(parts)
+
+X and Y are RMS values by default and Theta is in degrees, as the
+Multichannel Lockin reports them. The references are sines, like its AO
+outputs: A sin(2π f t + φ) gives X = A cos(φ)/sqrt(2), Y = A sin(φ)/sqrt(2)
+and Theta = φ, so a sine in phase with the reference gives Theta = 0.
+The exponential (RC) filter runs on scipy.signal.lfilter when scipy is
+installed and on an exact NumPy block recursion otherwise.
+
+Install the optional dependency with: pip install scipy
+'''
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# Optional dependencies
+# ---------------------------------------------------------------------------
+try:
+    from scipy.signal import lfilter
+    _SCIPY_AVAILABLE = True
+except ImportError:
+    _SCIPY_AVAILABLE = False
+
+FILTERS = ("rc", "boxcar")
+
+# The NumPy RC recursion rescales by at most this factor within a block.
+_MAX_GROWTH = 1e4
+
+
+@dataclass
+class DemodResult:
+    """
+    Demodulated outputs.
+
+    Parameters
+    ----------
+    X, Y : np.ndarray
+        In-phase and quadrature outputs, shape
+        ``(channels, references, harmonics, samples)``.
+    t : np.ndarray
+        Time of every output sample in seconds, shape ``(samples,)``.
+    frequencies : np.ndarray
+        Reference frequencies in Hz.
+    harmonics : np.ndarray
+        Harmonics of every reference.
+    """
+
+    X: np.ndarray
+    Y: np.ndarray
+    t: np.ndarray
+    frequencies: np.ndarray
+    harmonics: np.ndarray
+
+    @property
+    def R(self) -> np.ndarray:
+        """Magnitude, sqrt(X² + Y²)."""
+        return np.hypot(self.X, self.Y)
+
+    @property
+    def Theta(self) -> np.ndarray:
+        """Phase in degrees relative to the reference, in (-180, 180]."""
+        return np.degrees(np.arctan2(self.Y, self.X))
+
+    @classmethod
+    def concatenate(cls, results: Sequence["DemodResult"]) -> "DemodResult":
+        """Join the results of consecutive chunks along the time axis."""
+        first = results[0]
+        return cls(
+            np.concatenate([r.X for r in results], axis=-1),
+            np.concatenate([r.Y for r in results], axis=-1),
+            np.concatenate([r.t for r in results]),
+            first.frequencies,
+            first.harmonics,
+        )
+
+
+def _rc_numpy(x: np.ndarray, alpha: float, y0: np.ndarray) -> np.ndarray:
+    """
+    First-order exponential filter ``y[k] = b y[k-1] + alpha x[k]`` along
+    the last axis, with ``b = 1 - alpha`` and ``y0`` the output before x.
+
+    Unrolled over blocks short enough that b**-k stays below _MAX_GROWTH:
+    y[k] = b**(k+1) y0 + alpha b**k cumsum(x[j] b**-j).
+    """
+    b = 1.0 - alpha
+    n = x.shape[-1]
+    block = n if b <= 0 else max(1, min(n, int(np.log(_MAX_GROWTH) / -np.log(b))))
+    powers = b ** np.arange(block + 1)
+    out = np.empty_like(x)
+    y = y0
+    for start in range(0, n, block):
+        seg = x[..., start:start + block]
+        m = seg.shape[-1]
+        acc = np.cumsum(seg / powers[:m], axis=-1)
+        out[..., start:start + m] = alpha * acc * powers[:m] + y[..., None] * powers[1:m + 1]
+        y = out[..., start + m - 1]
+    return out
+
+
+class Demodulator:
+    """
+    Chunked multi-channel, multi-reference, multi-harmonic lock-in.
+
+    Parameters
+    ----------
+    fs : float
+        Sample rate of the input in Hz.
+    frequencies : sequence of float
+        Reference frequencies in Hz.
+    harmonics : sequence of int, optional
+        Harmonics demodulated at every reference. Default (1,).
+    tau : float, optional
+        Filter time constant in seconds (RC), or window length in seconds
+        (boxcar). Default 0.1 s.
+    order : int, optional
+        Number of cascaded filter stages, e.g. 4 for 24 dB/octave. Default 1.
+    filter : {"rc", "boxcar"}, optional
+        Exponential (RC) or moving-average low-pass. Default "rc".
+    decimate : int, optional
+        Keep every ``decimate``-th filtered sample. Default 1.
+    rms : bool, optional
+        Scale X and Y to RMS values (default) instead of peak amplitudes.
+    """
+
+    def __init__(
+        self,
+        fs: float,
+        frequencies: Sequence[float],
+        harmonics: Sequence[int] = (1,),
+        tau: float = 0.1,
+        order: int = 1,
+        filter: str = "rc",
+        decimate: int = 1,
+        rms: bool = True,
+    ):
+        if filter not in FILTERS:
+            raise ValueError(f"Invalid filter: {filter}. Allowed values are: {', '.join(FILTERS)}")
+        if fs <= 0 or tau <= 0:
+            raise ValueError("fs and tau must be positive.")
+        if order < 1 or decimate < 1:
+            raise ValueError("order and decimate must be at least 1.")
+        self.fs = float(fs)
+        self.frequencies = np.asarray(frequencies, dtype=float)
+        self.harmonics = np.asarray(harmonics, dtype=int)
+        self.tau = tau
+        self.order = order
+        self.filter = filter
+        self.decimate = decimate
+        self.scale = np.sqrt(2) if rms else 2.0
+        # Angular step per sample of every (reference, harmonic) pair.
+        self._omega = (2 * np.pi / self.fs) * np.outer(self.frequencies, self.harmonics)
+        self._alpha = 1.0 - np.exp(-1.0 / (tau * self.fs))
+        self._window = max(1, int(round(tau * self.fs)))
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the filter state and restart the time axis at 0."""
+        self._samples = 0
+        self._phase = np.zeros_like(self._omega)
+        self._state: Optional[list[np.ndarray]] = None
+
+    def _initial_state(self, channels: int) -> list[np.ndarray]:
+        shape = (channels,) + self._omega.shape
+        if self.filter == "rc":
+            return [np.zeros(shape, dtype=complex) for _ in range(self.order)]
+        # Boxcar stages keep the last window - 1 inputs.
+        return [np.zeros(shape + (self._window - 1,), dtype=complex) for _ in range(self.order)]
+
+    def _lowpass(self, z: np.ndarray) -> np.ndarray:
+        for stage in range(self.order):
+            state = self._state[stage]
+            if self.filter == "rc":
+                if _SCIPY_AVAILABLE:
+                    b = 1.0 - self._alpha
+                    z, _ = lfilter([self._alpha], [1.0, -b], z, axis=-1, zi=(b * state)[..., None])
+                else:
+                    z = _rc_numpy(z, self._alpha, state)
+                self._state[stage] = z[..., -1].copy()
+            else:
+                w = self._window
+                padded = np.concatenate([state, z], axis=-1)
+                cs = np.cumsum(padded, axis=-1)
+                cs = np.concatenate([np.zeros(cs.shape[:-1] + (1,), dtype=cs.dtype), cs], axis=-1)
+                self._state[stage] = padded[..., padded.shape[-1] - (w - 1):].copy()
+                z = (cs[..., w:] - cs[..., :-w]) / w
+        return z
+
+    def process(self, chunk: np.ndarray) -> DemodResult:
+        """
+        Demodulate the next chunk of the record.
+
+        Parameters
+        ----------
+        chunk : np.ndarray
+            Samples of shape ``(channels, n)``, or ``(n,)`` for one channel.
+
+        Returns
+        -------
+        DemodResult
+            Outputs for this chunk, shape ``(channels, references,
+            harmonics, n // decimate)`` (approximately; decimation stays
+            aligned across chunks).
+        """
+        x = np.atleast_2d(np.asarray(chunk, dtype=float))
+        channels, n = x.shape
+        if n == 0:
+            empty = np.empty((channels,) + self._omega.shape + (0,))
+            return DemodResult(empty, empty.copy(), np.empty(0), self.frequencies, self.harmonics)
+        if self._state is None:
+            self._state = self._initial_state(channels)
+        k = np.arange(n)
+        # i exp(-i (phase0 + omega k)): the sine reference sin(phase0 +
+        # omega k) on X and the cosine on Y, for every reference and harmonic.
+        reference = 1j * np.exp(-1j * (self._phase[..., None] + self._omega[..., None] * k))
+        z = x[:, None, None, :] * reference[None]
+        z = self._lowpass(z) * self.scale
+
+        first = (-self._samples) % self.decimate
+        keep = slice(first, None, self.decimate)
+        t = (self._samples + k[keep]) / self.fs
+        self._phase = np.mod(self._phase + self._omega * n, 2 * np.pi)
+        self._samples += n
+        out = z[..., keep]
+        return DemodResult(out.real.copy(), out.imag.copy(), t, self.frequencies, self.harmonics)
+
+
+def demodulate(
+    signals: np.ndarray,
+    fs: float,
+    frequencies: Sequence[float],
+    harmonics: Sequence[int] = (1,),
+    tau: float = 0.1,
+    order: int = 1,
+    filter: str = "rc",
+    decimate: int = 1,
+    rms: bool = True,
+    chunk_size: int = 1 << 16,
+) -> DemodResult:
+    """
+    Demodulate a whole record, ``chunk_size`` samples at a time.
+
+    Parameters are those of Demodulator; ``signals`` has shape
+    ``(channels, samples)`` or ``(samples,)``. Memory use is bounded by
+    ``chunk_size`` × channels × references × harmonics complex values,
+    plus the (decimated) output. An empty record gives empty outputs.
+    """
+    signals = np.atleast_2d(signals)
+    demod = Demodulator(fs, frequencies, harmonics, tau, order, filter, decimate, rms)
+    parts = [
+        demod.process(signals[:, start:start + chunk_size])
+        for start in range(0, signals.shape[-1], chunk_size)
+    ]
+    return DemodResult.concatenate(parts or [demod.process(signals)])
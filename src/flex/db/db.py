@@ -136,7 +136,7 @@ class FLEXDB:
             self.close_connection()
 
 
-logpath = os.path.join(os.environ.get('LOCALAPPDATA'), 'Levylab', 'FLEX', 'logs')
+logpath = os.path.join(os.environ.get('LOCALAPPDATA', os.path.expanduser('~')), 'Levylab', 'FLEX', 'logs')
 os.makedirs(logpath, exist_ok=True)
 
 # Configure logging
@@ -14,17 +14,23 @@ import importlib
 import json
 import os
 import pkgutil
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 import threading
+from flex.inst.base import Instrument
 from flex.inst.levylab.TransportServer import Transport
+from flex.inst.metrics import StatsDump, dump_periodically, merge
 
 
 _CONFIG_PATH = Path(os.environ.get("LOCALAPPDATA", "")) / \
     "Levylab" / "Control Experiment" / "Control Experiment.json"
 
+_STATS_PATH = Path(os.environ.get("LOCALAPPDATA", "")) / \
+    "Levylab" / "FLEX" / "logs" / "CESession_stats.jsonl"
+
 _SUMMARY_TEMPLATE = """
 <style>
     .ce-session {{
@@ -144,10 +150,12 @@ def _is_interactive() -> bool:
         return False
 
 
-def _find_and_instantiate(lv_class_filename: str, address: str) -> tuple: # Added address param
+def _find_and_instantiate(lv_class_filename: str, address: str, **kwargs) -> tuple: # Added address param
     """
     Scan flex.inst.levylab for a module whose _LABVIEW_CLASS_NAME matches
     lv_class_filename. Returns (instance, class_name) or (None, None).
+    Extra keyword arguments are passed to the constructor of drivers built
+    on Instrument; other drivers get the address only.
     """
     package = importlib.import_module("flex.inst.levylab")
     for _, module_name, _ in pkgutil.iter_modules(package.__path__):
@@ -156,7 +164,9 @@ def _find_and_instantiate(lv_class_filename: str, address: str) -> tuple: # Adde
             if getattr(module, "_LABVIEW_CLASS_NAME", None) == lv_class_filename:
                 cls = getattr(module, module_name)
                 # Now passing the address from JSON to the constructor
-                return cls(address=address), cls.__name__ 
+                if not issubclass(cls, Instrument):
+                    return cls(address=address), cls.__name__
+                return cls(address=address, **kwargs), cls.__name__
         except Exception:
             continue
     return None, None
@@ -179,12 +189,18 @@ class CESession:
     ----------
     config_path : str or Path, optional
         Override default config location.
+    lazy : bool, optional
+        Create drivers without connecting, then connect them all in
+        background threads. The session is usable immediately; see
+        connection_status() for instruments that could not be reached.
     """
 
-    def __init__(self, config_path: Optional[str | Path] = None, timeout: float = 10.0, verbose: bool = False):
+    def __init__(self, config_path: Optional[str | Path] = None, timeout: float = 10.0, verbose: bool = False, lazy: bool = False):
             self._config_path = Path(config_path) if config_path else _CONFIG_PATH
             self._instrument_attrs: set[str] = set()
+            self._warmups: dict[str, Future] = {}
             self.verbose = verbose
+            self.lazy = lazy
 
             def log(msg):
                 if self.verbose: print(f"[*] {msg}")
@@ -202,11 +218,15 @@ class CESession:
                 
                 # --- Initialize Transport Server ---
                 log("Initializing Transport Server...")
-                self.Transport = Transport()  # Assigned specifically to .Transport
+                self.Transport = Transport(lazy=lazy)  # Assigned specifically to .Transport
                 self._instrument_attrs.add("Transport")
                 
                 log(f"Found {len(self.session.instruments)} instruments. Initializing drivers...")
                 self._instantiate_instruments()
+
+                if lazy:
+                    log("Connecting instruments in the background...")
+                    self._start_warmup()
                 
                 log("Initialization complete.")
             finally:
@@ -298,7 +318,8 @@ class CESession:
                 if self.verbose:
                     print(f"    -> Connecting to {attr_name} @ {addr or 'No Address'}...", end=" ", flush=True)
                 
-                obj, class_name = _find_and_instantiate(inst["LVClass"], addr)
+                kwargs = {"lazy": True} if self.lazy else {}
+                obj, class_name = _find_and_instantiate(inst["LVClass"], addr, **kwargs)
                 inst["FlexClass"] = class_name
                 
                 if obj is None:
@@ -308,7 +329,25 @@ class CESession:
                 setattr(self, attr_name, obj)
                 self._instrument_attrs.add(attr_name)
                 
-                if self.verbose: print(f"OK ({class_name})")
+                if self.verbose: print(f"{'DEFERRED' if self.lazy else 'OK'} ({class_name})")
+
+    def _start_warmup(self, attr_names: Optional[set[str]] = None):
+        """Connect the given (default: all) lazy instruments on worker threads."""
+        targets = attr_names if attr_names is not None else self._instrument_attrs
+        # Drivers not built on Instrument have no connection to warm up.
+        targets = [name for name in targets if isinstance(getattr(self, name), Instrument)]
+        if not targets:
+            return
+        executor = ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix="CESession-warmup")
+        for attr_name in targets:
+            future = executor.submit(getattr(self, attr_name).warmup)
+            future.add_done_callback(lambda f, name=attr_name: self._warmup_done(name, f))
+            self._warmups[attr_name] = future
+        executor.shutdown(wait=False)
+
+    def _warmup_done(self, attr_name: str, future: Future):
+        if self.verbose and future.exception() is not None:
+            print(f"[!] {attr_name} unreachable: {future.exception()!r}\n", end="")
 
     # ------------------------------------------------------------------
     # HTML summary (interactive only)
@@ -370,6 +409,76 @@ class CESession:
                 return inst
         return None
 
+    def connection_status(self, wait_timeout: Optional[float] = 0) -> dict[str, str]:
+        """
+        Return {attr_name: "connected" | "pending" | "unreachable: <error>"}.
+
+        Only meaningful for lazy sessions; eager sessions connect in
+        __init__. wait_timeout seconds are spent waiting for pending
+        connections first (None waits for all of them). Drivers not built
+        on Instrument are left out.
+        """
+        if wait_timeout != 0 and self._warmups:
+            wait(self._warmups.values(), timeout=wait_timeout)
+        status = {}
+        for attr_name in sorted(self._instrument_attrs):
+            if not isinstance(getattr(self, attr_name, None), Instrument):
+                continue
+            future = self._warmups.get(attr_name)
+            if future is None or (future.done() and future.exception() is None):
+                status[attr_name] = "connected"
+            elif not future.done():
+                status[attr_name] = "pending"
+            else:
+                status[attr_name] = f"unreachable: {future.exception()!r}"
+        return status
+
+    def stats(self, reset: bool = False) -> dict:
+        """
+        Round-trip metrics of every instrument, and all of them combined.
+
+        Parameters
+        ----------
+        reset : bool, optional
+            Clear each instrument's counters after reading them.
+
+        Returns
+        -------
+        dict
+            {"instruments": {attr_name: {method: {...}}}, "total": {...}}
+            with the fields of Instrument.stats().
+        """
+        instruments = {}
+        metrics = []
+        for attr_name in sorted(self._instrument_attrs):
+            inst = getattr(self, attr_name, None)
+            if hasattr(inst, "metrics"):
+                metrics.append(inst.metrics)
+                instruments[attr_name] = inst.stats(reset=False)
+        total = merge(metrics)
+        if reset:
+            for m in metrics:
+                m.reset()
+        return {"instruments": instruments, "total": total}
+
+    def dump_stats(self, path: Optional[str | Path] = None, interval: float = 60.0) -> StatsDump:
+        """
+        Append stats() to a JSON lines file every ``interval`` seconds.
+
+        Parameters
+        ----------
+        path : str or Path, optional
+            Defaults to %LOCALAPPDATA%\\Levylab\\FLEX\\logs\\CESession_stats.jsonl.
+        interval : float, optional
+            Seconds between snapshots.
+
+        Returns
+        -------
+        StatsDump
+            Call its stop() to end dumping.
+        """
+        return dump_periodically(self.stats, str(path or _STATS_PATH), interval)
+
     def get_wiring(self) -> dict:
         """Return wiring as {lockin_channel: (electrode, label)}."""
         return self.session.wiring
@@ -389,6 +498,8 @@ class CESession:
             self._instantiate_instruments([
                 i for i in self.session.instruments if i["Type"] in new_types
             ])
+            if self.lazy:
+                self._start_warmup(new_types & self._instrument_attrs)
             for t in new_types:
                 print(f"New instrument added: {t}")
         if _is_interactive():
@@ -10,6 +10,11 @@ class PiezoScanner:
         lockin_sweep(sweep_config, timeout)
         getSweepWaveforms()
 
+    With binary_waveforms=True the backend must also accept
+    getSweepWaveforms(binary=True), as the Levylab Lockin does, and the
+    detector trace is read without JSON parsing. Backends providing
+    get_sweep_dataset(binary) (the Levylab Lockin) are read through it.
+
     """
 
     PROFILES = {
@@ -39,6 +44,8 @@ class PiezoScanner:
         # Manual DAQ settings for now
         daq_fs=13000,
         daq_num_samples=1000,
+
+        binary_waveforms=False,
     ):
 
         if profile not in self.PROFILES:
@@ -61,6 +68,8 @@ class PiezoScanner:
         self.daq_fs = daq_fs
         self.daq_num_samples = daq_num_samples
 
+        self.binary_waveforms = binary_waveforms
+
 
         # Scan waveforms
         self.x_wave = None
@@ -247,7 +256,18 @@ class PiezoScanner:
             AI0 = channel 0
         """
 
-        data = self.daq.getSweepWaveforms()
+        if hasattr(self.daq, "get_sweep_dataset"):
+            dataset = self.daq.get_sweep_dataset(binary=self.binary_waveforms)
+            # Index the AI rows by position like the JSON path, trimmed to
+            # the waveform's own length rather than the padded block.
+            names = [name for name, kind in zip(dataset.channels, dataset.kinds) if kind == "AI"]
+            self.detector = dataset[names[channel-1]]
+            return self.detector
+
+        if self.binary_waveforms:
+            data = self.daq.getSweepWaveforms(binary=True)
+        else:
+            data = self.daq.getSweepWaveforms()
 
         self.detector = np.asarray(
             data["AI"][channel-1]["Y"]
@@ -0,0 +1,341 @@
+'''
+asyncio variant of the Levylab FLEX base instrument class.
+
+AsyncInstrument speaks the same JSON-RPC dialect as flex.inst.base.Instrument
+over a zmq.asyncio REQ socket, so several instruments can be polled
+concurrently from one event loop:
+
+    from flex.inst.aio import asyncify
+    from flex.inst.levylab.PPMS import PPMS
+    from flex.inst.levylab.Lockin import Lockin
+
+    async def read_all():
+        async with asyncify(PPMS)() as ppms, asyncify(Lockin)() as lockin:
+            return await asyncio.gather(ppms.getTemperature(), lockin.getResults())
+
+Capability mixins (Temperature, Magnet) and driver getters built on
+``_query`` return awaitables on this base and plain values on Instrument.
+Batches are collected with ``async with inst.batch() as b`` and
+``b.call(...)``; ``submit`` schedules a command as an asyncio task.
+'''
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional, Sequence, Union
+
+import zmq
+import zmq.asyncio
+
+from flex.inst.base import Batch, Instrument, Reading
+from flex.inst.logs import truncated
+from flex.inst.metadata import MISSING
+from flex.inst.subscribe import Subscription, Target, listen, pub_address
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncInstrument(Instrument):
+    """
+    Base class for instruments using asyncio ZMQ communication.
+
+    Construction only creates and connects the socket. The ACK handshake
+    is sent by ``await inst.open()``, which ``async with`` does for you.
+    Timeouts, retries of idempotent commands and socket recovery follow
+    Instrument.
+
+    Args:
+        address: The ZMQ resource name to use to connect.
+        timeout: Seconds to allow for responses. Default 5.
+    """
+
+    def _connect(self) -> None:
+        # asyncio sockets cannot be shared with the blocking pool.
+        self._pool = None
+        self.context = zmq.asyncio.Context()
+        self._open_socket()
+        self._lock = asyncio.Lock()
+
+    async def open(self) -> "AsyncInstrument":
+        """
+        Perform the ACK handshake with the server. As in Instrument, the
+        ACK goes out as a one-element batch while batch support is unknown.
+        """
+        if self._batch_supported is None:
+            cached = self._cached_metadata("batch")
+            if cached is not MISSING:
+                self._batch_supported = cached
+        if self._batch_supported is None:
+            probe = self.codec.encode([self._build_request("ACK")])
+            try:
+                reply = await self._ask_once(probe, method="ACK")
+            except ValueError:
+                # Undecodable reply. A timeout (zmq.Again) propagates: it
+                # says nothing about batch support and must not be cached.
+                reply = None
+            self._set_batch_supported(isinstance(reply, list))
+            if isinstance(reply, list):
+                return self
+        await self._send_command("ACK")
+        return self
+
+    async def idn(self, refresh: bool = False) -> dict[str, Optional[str]]:
+        """
+        JSON request of IDN should return this information from the IF.
+        Served from the metadata cache unless ``refresh`` is True.
+        """
+        self.logger.debug("Fetching IDN information.")
+        return await self._cached_result("IDN", "IDN", {}, refresh)
+
+    async def help(self, command: str = None, refresh: bool = False) -> Sequence[str]:
+        self.logger.debug(f"Fetching help for method: {command}")
+        if command:
+            return await self._cached_result(f"HELP:{command}", "HELP", {"command": command}, refresh)
+        else:
+            result = await self._cached_result("HELP", "HELP", {}, refresh)
+            if result is not None:
+                return result[5:]# Skip the first 4 commands
+            return None
+
+    async def _cached_result(self, key: str, cmd: str, params: Any, refresh: bool = False) -> Any:
+        value = self._cached_metadata(key, refresh)
+        if value is MISSING:
+            response = await self._send_command(cmd, params)
+            value = response["result"] if response and "result" in response else None
+            self._store_metadata(key, value)
+        return value
+
+    @asynccontextmanager
+    async def batch(self) -> AsyncIterator[Batch]:
+        """
+        Collect ``b.call(...)`` requests and send them as one JSON-RPC batch
+        array when the block exits. Driver methods awaited inside the block
+        are sent immediately, since other tasks share the instrument.
+
+        Example:
+            >>> async with lockin.batch() as b:
+            ...     state = b.call("getState")
+            ...     results = b.call("getResults")
+            >>> state["result"]
+        """
+        batch = Batch(self)
+        try:
+            yield batch
+        except BaseException:
+            for _, future in batch.calls:
+                future.cancel()
+            raise
+        if not batch.calls:
+            return
+        if await self.supports_batch():
+            await self._send_batch(batch)
+        else:
+            await self._send_sequential(batch)
+
+    async def _send_batch(self, batch: Batch) -> None:
+        payload = self.codec.encode([request for request, _ in batch.calls])
+        self.logger.debug(f"Sending batch of {len(batch)} commands.")
+        methods = [request["method"] for request, _ in batch.calls]
+        ask = self.ask_raw if all(map(self._is_idempotent, methods)) else self._ask_once
+        responses = await ask(payload, method=methods[-1], label=f"batch({len(batch)})")
+        by_id = {r.get("id"): r for r in responses if isinstance(r, dict)}
+        for request, future in batch.calls:
+            response = by_id.get(request["id"])
+            if response is None:
+                future.set_exception(RuntimeError(
+                    f"No response to batched '{request['method']}' (id {request['id']})."
+                ))
+            else:
+                future.set_result(response)
+
+    async def _send_sequential(self, batch: Batch) -> None:
+        first_error = None
+        for request, future in batch.calls:
+            try:
+                future.set_result(await self.ask_raw(self.codec.encode(request), method=request["method"]))
+            except Exception as e:
+                future.set_exception(e)
+                first_error = first_error or e
+        if first_error is not None:
+            raise first_error
+
+    async def supports_batch(self) -> bool:
+        """Return whether the server accepts JSON-RPC batch arrays (see ``open``)."""
+        if self._batch_supported is None:
+            await self.open()
+        return self._batch_supported
+
+    def submit(self, cmd: str, params: Any = {}) -> "asyncio.Task":
+        """Schedule ``cmd`` on the running event loop; the task resolves to its response."""
+        return asyncio.ensure_future(self._send_command(cmd, params))
+
+    async def _query(self, cmd: str, params: Any = {}, key: str = "result") -> Any:
+        return (await self._send_command(cmd, params))[key]
+
+    async def _cached_query(self, cmd: str, params: Any = {}, max_age: float = 0.0, key: str = "result") -> Reading:
+        cache_key = self._state_key(cmd, params)
+        entry = self._state.get(cache_key)
+        if entry is not None and time.monotonic() - entry[0] <= max_age:
+            return entry[1]
+        reading = Reading(await self._query(cmd, params, key), time.time())
+        self._state[cache_key] = (time.monotonic(), reading)
+        return reading
+
+    async def subscribe(self, topics: Union[str, Sequence[str]], target: Target, interval: float = 1.0) -> Subscription:
+        """
+        Deliver live readings of ``topics`` to a callback or a queue.Queue.
+
+        As ``Instrument.subscribe``, but without a PUB endpoint the getters
+        are polled by a task on the running event loop.
+        """
+        if isinstance(topics, str):
+            topics = [topics]
+        address = pub_address(await self.idn(), self._address)
+        if address is not None:
+            return listen(address, topics, target)
+        subscription = Subscription(topics, target, "poll")
+        subscription._source = _PollTask(self, subscription, interval)
+        return subscription
+
+    async def _send_command(self, cmd: str, params: dict = {}, *args: Any) -> dict:
+        self._invalidate_on(cmd)
+        command: dict = self._build_request(cmd, params)
+        payload: bytes = self.codec.encode(command)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Sending command: %s", truncated(command))
+        return await self.ask_raw(payload, method=cmd)
+
+    async def _wait_for_pacing(self) -> None:
+        delay = self._next_command_time - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def write_raw(self, cmd: Union[str, bytes]) -> None:
+        """
+        Send a command without awaiting the reply. The socket is reset
+        before the next request, so the reply is discarded.
+        """
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Writing raw command: %s", truncated(cmd))
+        if not self.connected:
+            self.warmup()
+        async with self._lock:
+            await self._wait_for_pacing()
+            self._healthy = False
+            await self.socket.send(cmd.encode("utf-8") if isinstance(cmd, str) else cmd)
+
+    async def ask_raw(self, cmd: Union[str, bytes], method: Optional[str] = None, label: Optional[str] = None) -> dict:
+        """
+        Send a command and await the response without blocking the event loop.
+
+        Args:
+            cmd: The command to send to the instrument.
+            method: JSON-RPC method name of ``cmd``, used for pacing.
+            label: Name to record ``cmd`` under in ``stats()``. Default ``method``.
+
+        Returns:
+            dict: The instrument's decoded response.
+
+        Raises:
+            zmq.Again: No reply within the timeout (after any retries).
+                The socket has already been recovered and stays usable.
+        """
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Asking raw command: %s", truncated(cmd))
+        if not self.connected:
+            self.warmup()
+        attempt = 0
+        while True:
+            try:
+                return await self._ask_once(cmd, method, label)
+            except zmq.Again:
+                if attempt >= self.retries or not self._is_idempotent(method):
+                    self.recovery_counts["failures"] += 1
+                    raise
+                attempt += 1
+                self.recovery_counts["retries"] += 1
+                backoff = min(self.retry_backoff * 2 ** (attempt - 1), self.max_backoff)
+                self.logger.warning(f"Retrying {method} ({attempt}/{self.retries}) in {backoff:.2f} s.")
+                await asyncio.sleep(backoff)
+
+    async def _ask_once(self, cmd: Union[str, bytes], method: Optional[str] = None, label: Optional[str] = None) -> dict:
+        data = cmd.encode("utf-8") if isinstance(cmd, str) else cmd
+        # A REQ socket allows one outstanding request, so concurrent
+        # coroutines on the same instrument take turns.
+        async with self._lock:
+            await self._wait_for_pacing()
+            started = time.time()
+            start = time.perf_counter()
+            if not self._healthy:
+                # Still waiting for a reply to a write_raw, a timed-out or a
+                # cancelled request.
+                self._reset_socket()
+                self.recovery_counts["reconnects"] += 1
+            self._healthy = False
+            try:
+                await self.socket.send(data)
+                response = await self.socket.recv()
+            except zmq.Again:
+                self.recovery_counts["timeouts"] += 1
+                self.metrics.record(label or method, time.perf_counter() - start, len(data), error=True)
+                self.logger.warning(f"No reply to {method} from {self._address} within {self._timeout} s.")
+                self._reset_socket()
+                self.recovery_counts["reconnects"] += 1
+                raise
+            self._healthy = True
+            elapsed = time.perf_counter() - start
+            self.metrics.record(label or method, elapsed, len(data), len(response))
+            self._schedule_pacing(method)
+        response: dict = self.codec.decode(response)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Received response: %s", truncated(response))
+        if self._recorder is not None:
+            self._recorder.write(self._address, data, response, started, elapsed, self.codec)
+        return response
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class _PollTask:
+    """Polls the topics of one subscription on the event loop."""
+
+    def __init__(self, instrument: AsyncInstrument, subscription: Subscription, interval: float):
+        self._task = asyncio.ensure_future(self._run(instrument, subscription, interval))
+
+    @staticmethod
+    async def _run(instrument: AsyncInstrument, subscription: Subscription, interval: float) -> None:
+        while True:
+            for topic in subscription.topics:
+                try:
+                    value = await instrument._query(topic)
+                except Exception as e:
+                    logger.warning(f"Polling {topic} failed: {e!r}")
+                else:
+                    subscription.deliver(topic, value)
+            await asyncio.sleep(interval)
+
+    def remove(self, subscription: Subscription) -> None:
+        self._task.cancel()
+
+
+_ASYNC_CLASSES: dict[type, type] = {}
+
+
+def asyncify(cls: type) -> type:
+    """
+    Return an asyncio variant of the driver class ``cls``.
+
+    The variant keeps the driver's defaults and methods but runs them on
+    AsyncInstrument, e.g. ``asyncify(PPMS)()`` behaves like ``PPMS()``
+    with awaitable getters and setters.
+    """
+    if issubclass(cls, AsyncInstrument):
+        return cls
+    if cls not in _ASYNC_CLASSES:
+        _ASYNC_CLASSES[cls] = type(f"Async{cls.__name__}", (cls, AsyncInstrument), {"__module__": cls.__module__})
+    return _ASYNC_CLASSES[cls]
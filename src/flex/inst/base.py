@@ -8,13 +8,74 @@ All instruments should inherit from this class and implement their own methods.
 Contact Pubudu Wijesinghe <pubudu.wijesinghe@levylab.org> for any queries.
 '''
 
+import os
 import time
 import json
+import itertools
 import logging
+import threading
 import warnings
 import zmq
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from importlib.resources import as_file, files
-from typing import TYPE_CHECKING, Any, Union, Sequence, Optional
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Mapping, NamedTuple, Union, Sequence, Optional, Iterator
+
+from flex.inst.codec import MsgpackCodec, _MSGPACK_AVAILABLE, decode_frames, default_codec
+from flex.inst.dealer import DealerTransport
+from flex.inst.logs import attach_file, truncated
+from flex.inst.metadata import MISSING, MetadataCache, get_metadata_cache
+from flex.inst.metrics import CommandMetrics, StatsDump, dump_periodically
+from flex.inst.pool import ConnectionPool, get_pool, shared_context
+from flex.inst.record import Recorder, get_recorder
+from flex.inst.subscribe import Subscription, Target, subscribe
+
+
+class BatchResult(Future):
+    """
+    Future-like result of a call queued in an ``Instrument.batch()`` block.
+
+    Resolves to the full JSON-RPC response once the batch is sent.
+    Subscripting (``result["result"]``) is supported after that point
+    so batched calls read like ``_send_command`` replies.
+    """
+
+    def __init__(self, method: str):
+        super().__init__()
+        self.method = method
+
+    def __getitem__(self, key):
+        if not self.done():
+            raise RuntimeError(
+                f"Result of '{self.method}' is not available until the batch is sent."
+            )
+        return self.result()[key]
+
+
+class Batch:
+    """Collects JSON-RPC calls to be sent as a single batch array."""
+
+    def __init__(self, instrument: "Instrument"):
+        self._instrument = instrument
+        self.calls: list[tuple[dict, BatchResult]] = []
+
+    def call(self, method: str, params: Any = {}) -> BatchResult:
+        """Queue ``method`` and return a future for its response."""
+        request = self._instrument._build_request(method, params)
+        future = BatchResult(method)
+        self.calls.append((request, future))
+        return future
+
+    def __len__(self) -> int:
+        return len(self.calls)
+
+
+class Reading(NamedTuple):
+    """A cached instrument reading and the wall-clock time it was taken."""
+
+    value: Any
+    timestamp: float
 
 
 class Instrument:
@@ -22,75 +83,284 @@ class Instrument:
     Base class for all instruments using ZMQ communication.
     Used for communication with Levylab Instrument Framework.
 
+    Instruments are thread-safe: REQ round-trips are serialized by a
+    per-instrument lock, and the DEALER transport owns an I/O thread, so a
+    monitor thread and the notebook can share one driver and connection.
+
     Args:
         address: The ZMQ resource name to use to connect.
         timeout: Seconds to allow for responses. Default 5.
         metadata: Additional static metadata to add to this
             instrument's JSON snapshot.
+        min_interval: Minimum seconds between a reply and the next
+            command. Default 0 (no pacing).
+        command_intervals: Per-method settling time in seconds, applied
+            after a reply to that method instead of ``min_interval``.
+        batch_support: Whether the server accepts JSON-RPC batch arrays.
+            ``None`` (default) detects it during the ACK handshake.
+        transport: ``"req"`` (default) for a strict REQ socket, or
+            ``"dealer"`` to pipeline requests over a DEALER socket and
+            match replies by id (see ``submit``).
+        pool: Reuse an idle connection to ``address`` from the process-wide
+            pool and return the socket to it on ``close()``. Default True.
+        lazy: Only record the address on construction. The connection and
+            ACK happen on the first command or on ``warmup()``.
+        retries: How many times an idempotent command (``get*``, IDN,
+            HELP) is resent after a timeout. Default 2.
+        retry_backoff: Seconds to wait before the first retry; doubles on
+            every further retry up to ``max_backoff``.
+        codec: Payload codec name ("json", "orjson" or "msgpack"). Default
+            None uses orjson when installed, else the stdlib json module.
+        prefer_msgpack: Switch to msgpack after connecting if the server
+            lists it under "codecs" in its IDN reply.
+        metadata_cache: Serve IDN, HELP and batch support from the
+            process-wide TTL cache (see flex.inst.metadata). Default True.
+        record: Append every request, response and round-trip time to this
+            JSON-lines file (see flex.inst.record and flex.inst.replay).
     """
 
+    # Pacing policy. Drivers for LabVIEW servers that need settling time
+    # after specific commands can override these at class level. The
+    # default is read-only so no driver can change it for all the others.
+    min_interval: float = 0.0
+    command_intervals: Mapping[str, float] = MappingProxyType({})
+
+    # Commands that are safe to resend after a timeout.
+    idempotent_prefixes: tuple[str, ...] = ("get",)
+    idempotent_methods: frozenset[str] = frozenset({"IDN", "HELP"})
+    max_backoff: float = 2.0
+
     def __init__(
         self,
         address: str,
         timeout: float = 5,
         log_file: Optional[str] = None,
+        min_interval: Optional[float] = None,
+        command_intervals: Optional[dict[str, float]] = None,
+        batch_support: Optional[bool] = None,
+        transport: str = "req",
+        pool: bool = True,
+        lazy: bool = False,
+        retries: int = 2,
+        retry_backoff: float = 0.1,
+        codec: Optional[str] = None,
+        prefer_msgpack: bool = False,
+        metadata_cache: bool = True,
+        record: Union[str, os.PathLike, None] = None,
         **kwargs: Any,
     ):
         # Initialize logging
         self.logger = logging.getLogger(self.__class__.__name__)
         if log_file:
-            handler = logging.FileHandler(log_file)
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(formatter)
-            self.logger.addHandler(handler)
-            self.logger.setLevel(logging.DEBUG)
+            attach_file(self.logger, log_file)
         else:
             logging.basicConfig(level=logging.INFO)
-        try:
-            self.context = zmq.Context()
-            self.socket = self.context.socket(zmq.REQ)
-            self.socket.connect(address)
-
-            self._address = address
-            self._timeout = timeout
-            self.socket.setsockopt(zmq.RCVTIMEO, int(timeout * 1000))
-            self.socket.setsockopt(zmq.SNDTIMEO, int(timeout * 1000))
-            self._send_command("ACK")['result']
+        if min_interval is not None:
+            self.min_interval = float(min_interval)
+        self.command_intervals = {**self.command_intervals, **(command_intervals or {})}
+        self._next_command_time = 0.0
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.recovery_counts = {"timeouts": 0, "reconnects": 0, "retries": 0, "failures": 0}
+        self.metrics = CommandMetrics()
+        self._ids = itertools.count(1)
+        self.codec = default_codec(codec)
+        self._prefer_msgpack = prefer_msgpack
+        self._local = threading.local()
+        self._batch_support_arg = batch_support
+        self._batch_supported = batch_support
+        self._metadata: Optional[MetadataCache] = get_metadata_cache() if metadata_cache else None
+        self._state: dict[tuple[str, str], tuple[float, Reading]] = {}
+        self._recorder: Optional[Recorder] = get_recorder(record) if record else None
+        if transport not in ("req", "dealer"):
+            raise ValueError(f"Invalid transport: {transport}. Allowed values are: req, dealer")
+        self._transport_kind = transport
+        self._transport: Optional[DealerTransport] = None
+        self._pool: Optional[ConnectionPool] = get_pool() if pool else None
+        self._healthy = True
+        # Serializes connecting and every REQ round-trip, so several threads
+        # can share one instrument.
+        self._io_lock = threading.RLock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._connected = False
+        self._connecting = False
+        self.context = None
+        self.socket = None
+        self._address = address
+        self._timeout = timeout
+        if lazy:
+            self.logger.debug(f"Instrument created lazily for address: {address}")
+        else:
+            self.warmup()
             self.logger.info(f"Instrument initialized with address: {address}")
-        except Exception as e:
-            if getattr(self, 'socket', None):
-                self.socket.close()
-            self.logger.error(f"Error while initializing: {e}")
-            raise
 
-    def idn(self) -> dict[str, Optional[str]]:
+    @property
+    def connected(self) -> bool:
+        """Whether the socket is open and the ACK handshake has been done."""
+        return self._connected
+
+    def warmup(self) -> "Instrument":
+        """
+        Connect and perform the ACK handshake now.
+
+        Lazy instruments call this on their first command; calling it up
+        front moves the round-trip out of the measurement. Safe to call
+        from a background thread and a no-op once connected.
+        """
+        with self._io_lock:
+            # The ACK sent by _connect() re-enters here on the same thread.
+            if self._connected or self._connecting:
+                return self
+            self._connecting = True
+            try:
+                self._connect()
+                self._connected = True
+            except Exception as e:
+                if self._transport is not None:
+                    self._transport.close()
+                    self._transport = None
+                if getattr(self, 'socket', None):
+                    self.socket.close(linger=0)
+                    self.socket = None
+                self.logger.error(f"Error while initializing: {e}")
+                raise
+            finally:
+                self._connecting = False
+        return self
+
+    @property
+    def _batch(self) -> Optional[Batch]:
+        # Batches are per thread: commands from other threads sharing the
+        # instrument must not be queued into them.
+        return getattr(self._local, "batch", None)
+
+    @_batch.setter
+    def _batch(self, batch: Optional[Batch]) -> None:
+        self._local.batch = batch
+
+    def idn(self, refresh: bool = False) -> dict[str, Optional[str]]:
         """
         JSON request of IDN should return this information from the IF.
+        Served from the metadata cache unless ``refresh`` is True.
         """
         self.logger.debug("Fetching IDN information.")
-        response = self._send_command("IDN")
-        if response and "result" in response:
-            return response["result"]
-        return None
+        return self._cached_result("IDN", "IDN", {}, refresh)
 
-    def help(self, command: str = None) -> Sequence[str]:
+    def help(self, command: str = None, refresh: bool = False) -> Sequence[str]:
         self.logger.debug(f"Fetching help for method: {command}")
         if command:
-            response = self._send_command("HELP", {"command": command})
-            if response and "result" in response:
-                return response["result"]
-            return None
+            return self._cached_result(f"HELP:{command}", "HELP", {"command": command}, refresh)
         else:
-            response = self._send_command("HELP")
-            if response and "result" in response:
-                return response["result"][5:]# Skip the first 4 commands
+            result = self._cached_result("HELP", "HELP", {}, refresh)
+            if result is not None:
+                return result[5:]# Skip the first 4 commands
             return None
 
+    def invalidate_metadata(self) -> None:
+        """Forget cached IDN, HELP and batch support for this address."""
+        if self._metadata is not None:
+            self._metadata.invalidate(self._address)
+        self._batch_supported = self._batch_support_arg
+
+    def _cached_metadata(self, key: str, refresh: bool = False) -> Any:
+        if self._metadata is None or refresh:
+            return MISSING
+        return self._metadata.get(self._address, key)
+
+    def _store_metadata(self, key: str, value: Any) -> None:
+        if self._metadata is not None and value is not None:
+            self._metadata.set(self._address, key, value)
+
+    def _cached_result(self, key: str, cmd: str, params: Any, refresh: bool = False) -> Any:
+        value = self._cached_metadata(key, refresh)
+        if value is MISSING:
+            response = self._send_command(cmd, params)
+            value = response["result"] if response and "result" in response else None
+            self._store_metadata(key, value)
+        return value
+
+    def _connect(self) -> None:
+        """
+        Attach to the shared context and open a socket, then perform the
+        ACK handshake (see ``_handshake``). A pooled socket was ACKed by its
+        previous owner, so reusing one skips the round-trip.
+        """
+        self.context = shared_context()
+        if self._pool is not None and self._transport_kind == "req":
+            self.socket = self._pool.acquire(self._address)
+            if self.socket is not None:
+                self._set_zmq_timeout(self._timeout)
+                self.logger.debug(f"Reusing pooled connection to {self._address}.")
+                self._negotiate_codec()
+                return
+        self._open_socket()
+        self._handshake()
+        self._negotiate_codec()
+
+    def _handshake(self) -> None:
+        """
+        Send the ACK handshake. While batch support is unknown the ACK goes
+        out as a one-element batch array, so the same round-trip tells
+        whether the server accepts batches (a list reply). Servers that do
+        not are ACKed again with a plain request. A server that does not
+        answer raises zmq.Again after one timeout, as a plain ACK would.
+        """
+        if self._batch_supported is None:
+            cached = self._cached_metadata("batch")
+            if cached is not MISSING:
+                self._batch_supported = cached
+        if self._batch_supported is None:
+            probe = self.codec.encode([self._build_request("ACK")])
+            try:
+                reply = self._ask_once(probe, method="ACK")
+            except ValueError:
+                # Undecodable reply. A timeout (zmq.Again) propagates: it
+                # says nothing about batch support and must not be cached.
+                reply = None
+            self._set_batch_supported(isinstance(reply, list))
+            if isinstance(reply, list):
+                return
+        self._send_command("ACK")['result']
+
+    def _negotiate_codec(self) -> None:
+        """Switch to msgpack if requested and advertised by the server."""
+        if not self._prefer_msgpack or isinstance(self.codec, MsgpackCodec):
+            return
+        if not _MSGPACK_AVAILABLE:
+            self.logger.warning("prefer_msgpack is set but msgpack is not installed.")
+            return
+        idn = self.idn()
+        if isinstance(idn, dict) and "msgpack" in idn.get("codecs", []):
+            self.codec = MsgpackCodec()
+            if self._transport is not None:
+                self._transport.codec = self.codec
+            self.logger.info(f"Using msgpack codec for {self._address}.")
+
+    def _open_socket(self) -> None:
+        """Create and connect a fresh REQ socket (or DEALER transport) using the current timeout."""
+        if self._transport_kind == "dealer":
+            self._transport = DealerTransport(self.context, self._address, self.logger, self.codec)
+            return
+        self.socket = self.context.socket(zmq.REQ)
+        self.socket.connect(self._address)
+        self._healthy = True
+        self._set_zmq_timeout(self._timeout)
+
+    def _reset_socket(self) -> None:
+        """Discard a REQ socket left waiting for a reply and reconnect."""
+        self.logger.warning(f"Resetting socket for {self._address}.")
+        if self._transport is not None:
+            self._transport.close()
+        else:
+            self.socket.close(linger=0)
+        self._open_socket()
+
     def _set_zmq_timeout(self, timeout: Union[float, None]) -> None:
         self.logger.debug(f"Setting ZMQ timeout to {timeout}.")
-        if timeout is None:
+        if self.socket is None:
+            # The DEALER transport applies the timeout per request.
+            pass
+        elif timeout is None:
             self.socket.setsockopt(zmq.RCVTIMEO, -1)
             self.socket.setsockopt(zmq.SNDTIMEO, -1)
         else:
@@ -99,6 +369,8 @@ class Instrument:
         self._timeout = timeout
 
     def _get_zmq_timeout(self) -> Union[float, None]:
+        if self.socket is None:
+            return self._timeout
         timeout = self.socket.getsockopt(zmq.RCVTIMEO)
         if timeout == -1:
             return None
@@ -106,53 +378,402 @@ class Instrument:
             return timeout / 1000.0
 
     def close(self) -> None:
-        """Disconnect and irreversibly tear down the instrument."""
+        """Disconnect the instrument, returning a healthy socket to the connection pool."""
         self.logger.info(f"Closing server connection for {self._address}...")
-        try:
-            if getattr(self, 'socket', None):
-                self.socket.close()
-                self.context.term()
-        except Exception as e:
-            self.logger.error(f"Error while closing: {e}")
-    
-    def _send_command(self, cmd: str, params: dict = {}, *args: Any) -> str:
-        command: dict = {
-            "jsonrpc": "2.0", 
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        with self._io_lock:
+            self._connected = False
+            try:
+                if self._transport is not None:
+                    self._transport.close()
+                    self._transport = None
+                elif getattr(self, 'socket', None):
+                    if self._pool is not None:
+                        self._pool.release(self._address, self.socket, healthy=self._healthy)
+                    else:
+                        self.socket.close()
+                    self.socket = None
+                if self.context is not None and self.context is not shared_context():
+                    self.context.term()
+            except Exception as e:
+                self.logger.error(f"Error while closing: {e}")
+
+    def _next_id(self) -> str:
+        return str(next(self._ids))
+
+    def _build_request(self, cmd: str, params: Any = {}) -> dict:
+        return {
+            "jsonrpc": "2.0",
             "method": cmd,
             "params": params,
-            "id": str(int(time.time()))
-        } 
-        cmd: str = json.dumps(command)
-        self.logger.debug(f"Sending command: {cmd}")
-        response = self.ask_raw(cmd)
+            "id": self._next_id()
+        }
+
+    def _query(self, cmd: str, params: Any = {}, key: str = "result") -> Any:
+        """
+        Send ``cmd`` and return ``key`` of the reply.
+
+        Capability mixins and simple getters use this instead of indexing
+        ``_send_command`` directly, so they work unchanged on
+        ``AsyncInstrument`` where it returns an awaitable.
+        """
+        return self._send_command(cmd, params)[key]
+
+    def _cached_query(self, cmd: str, params: Any = {}, max_age: float = 0.0, key: str = "result") -> Reading:
+        """
+        Read-through ``_query`` for slowly changing state.
+
+        Returns the last Reading of ``cmd`` with the same ``params`` if it is
+        at most ``max_age`` seconds old, otherwise queries the instrument.
+        Any setter sent to this instrument discards all cached readings.
+        """
+        cache_key = self._state_key(cmd, params)
+        entry = self._state.get(cache_key)
+        if entry is not None and time.monotonic() - entry[0] <= max_age:
+            return entry[1]
+        reading = Reading(self._query(cmd, params, key), time.time())
+        self._state[cache_key] = (time.monotonic(), reading)
+        return reading
+
+    def invalidate_state(self) -> None:
+        """Discard all readings cached by ``_cached_query``."""
+        self._state.clear()
+
+    def subscribe(self, topics: Union[str, Sequence[str]], target: Target, interval: float = 1.0) -> Subscription:
+        """
+        Deliver live readings of ``topics`` to a callback or a queue.
+
+        If the server advertises a PUB endpoint ("PUB Address" in IDN), a SUB
+        socket receives the readings at the server's rate. Otherwise one
+        background thread shared by every subscription polls the getters.
+
+        Args:
+            topics: Getter names, e.g. ["getTemperature", "getMagnet"].
+            target: Called as ``target(topic, value)``, or a queue.Queue that
+                receives ``(topic, value)`` tuples.
+            interval: Seconds between two polls of a topic when the server
+                has no PUB endpoint.
+
+        Returns:
+            Subscription: Call ``close()`` to stop the readings.
+        """
+        return subscribe(self, topics, target, interval)
+
+    @staticmethod
+    def _state_key(cmd: str, params: Any) -> tuple[str, str]:
+        return cmd, json.dumps(params, sort_keys=True, default=str)
+
+    def _invalidate_on(self, cmd: str) -> None:
+        # A setter may change any cached reading (a new field setpoint moves
+        # the temperature, too), so drop them all rather than guess.
+        if cmd.startswith("set") and self._state:
+            self._state.clear()
+
+    def _send_command(self, cmd: str, params: dict = {}, *args: Any) -> str:
+        self._invalidate_on(cmd)
+        if self._batch is not None:
+            return self._batch.call(cmd, params)
+        command: dict = self._build_request(cmd, params)
+        payload: bytes = self.codec.encode(command)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Sending command: %s", truncated(command))
+        response = self.ask_raw(payload, method=cmd)
         return response
 
-    def write_raw(self, cmd: str) -> None:
+    def submit(self, cmd: str, params: Any = {}) -> Future:
+        """
+        Send ``cmd`` without waiting for the reply.
+
+        With ``transport="dealer"`` the request is pipelined: many can be in
+        flight at once and each Future resolves to its own JSON-RPC response
+        when the server answers. On a REQ socket the calls run one at a
+        time on the instrument's worker thread.
+
+        Example:
+            >>> futures = [inst.submit("getAI", {"channel": ch}) for ch in range(1, 9)]
+            >>> [f.result()["result"] for f in futures]
+        """
+        if not self.connected:
+            self.warmup()
+        if self._transport is None:
+            with self._io_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(1, thread_name_prefix=f"flex {self._address}")
+            return self._executor.submit(self._send_command, cmd, params)
+        self._invalidate_on(cmd)
+        command = self._build_request(cmd, params)
+        payload = self.codec.encode(command)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Submitting command: %s", truncated(command))
+        self._wait_for_pacing()
+        start = time.perf_counter()
+        started = time.time()
+        future = self._transport.submit(payload, command["id"])
+
+        def done(f: Future) -> None:
+            elapsed = time.perf_counter() - start
+            failed = f.cancelled() or f.exception() is not None
+            self.metrics.record(cmd, elapsed, len(payload), getattr(f, "reply_bytes", 0), error=failed)
+            if self._recorder is not None and not failed:
+                self._recorder.write(self._address, command, f.result(), started, elapsed)
+
+        future.add_done_callback(done)
+        return future
+
+    @contextmanager
+    def batch(self) -> Iterator[Batch]:
+        """
+        Collect commands and send them as one JSON-RPC batch array.
+
+        Every ``_send_command`` issued inside the block (including driver
+        setters) is queued and returns a ``BatchResult``. The batch is sent
+        when the block exits; servers without batch support receive the
+        calls one after another instead.
+
+        Example:
+            >>> with lockin.batch() as b:
+            ...     for ch in range(1, 9):
+            ...         lockin.setAO_Amplitude(ch, 0.01)
+            ...     state = b.call("getState")
+            >>> state["result"]
+        """
+        if self._batch is not None:
+            # Nested blocks join the outer batch.
+            yield self._batch
+            return
+        batch = self._batch = Batch(self)
+        try:
+            yield batch
+        except BaseException:
+            for _, future in batch.calls:
+                future.cancel()
+            raise
+        finally:
+            self._batch = None
+        self._flush_batch(batch)
+
+    def _flush_batch(self, batch: Batch) -> None:
+        if not batch.calls:
+            return
+        if self.supports_batch():
+            self._send_batch(batch)
+        else:
+            self._send_sequential(batch)
+
+    def _send_batch(self, batch: Batch) -> None:
+        payload = self.codec.encode([request for request, _ in batch.calls])
+        self.logger.debug(f"Sending batch of {len(batch)} commands.")
+        # Resend on timeout only if every call in the batch is idempotent.
+        methods = [request["method"] for request, _ in batch.calls]
+        ask = self.ask_raw if all(map(self._is_idempotent, methods)) else self._ask_once
+        responses = ask(payload, method=methods[-1], label=f"batch({len(batch)})")
+        by_id = {r.get("id"): r for r in responses if isinstance(r, dict)}
+        for request, future in batch.calls:
+            response = by_id.get(request["id"])
+            if response is None:
+                future.set_exception(RuntimeError(
+                    f"No response to batched '{request['method']}' (id {request['id']})."
+                ))
+            else:
+                future.set_result(response)
+
+    def _send_sequential(self, batch: Batch) -> None:
+        first_error = None
+        for request, future in batch.calls:
+            try:
+                future.set_result(self.ask_raw(self.codec.encode(request), method=request["method"]))
+            except Exception as e:
+                future.set_exception(e)
+                first_error = first_error or e
+        if first_error is not None:
+            raise first_error
+
+    def supports_batch(self) -> bool:
+        """
+        Return whether the server accepts JSON-RPC batch arrays.
+
+        Detected during the ACK handshake and cached. Only a connection
+        taken from the pool with nothing cached for its address sends a
+        separate one-element ACK batch to find out.
+        """
+        if not self.connected:
+            self.warmup()
+        if self._batch_supported is None:
+            cached = self._cached_metadata("batch")
+            if cached is not MISSING:
+                self._batch_supported = cached
+                return cached
+            probe = self.codec.encode([self._build_request("ACK")])
+            try:
+                reply = self._ask_once(probe, method="ACK")
+            except ValueError:
+                # Undecodable reply. A timeout (zmq.Again) propagates: it
+                # says nothing about batch support and must not be cached.
+                reply = None
+            self._set_batch_supported(isinstance(reply, list))
+        return self._batch_supported
+
+    def _set_batch_supported(self, supported: bool) -> None:
+        self._batch_supported = supported
+        self.logger.info(f"Batch support for {self._address}: {supported}")
+        self._store_metadata("batch", supported)
+
+    def _wait_for_pacing(self) -> None:
+        """Block until the settling time requested by the last reply has passed."""
+        delay = self._next_command_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _schedule_pacing(self, method: Optional[str] = None) -> None:
+        """Record when the next command may be sent after a reply to ``method``."""
+        interval = self.command_intervals.get(method, self.min_interval)
+        self._next_command_time = time.monotonic() + interval if interval > 0 else 0.0
+
+    def write_raw(self, cmd: Union[str, bytes]) -> None:
         """
         Low-level interface to send a command to the ZMQ socket.
 
         Args:
             cmd: The command to send to the instrument.
         """
-        self.logger.debug(f"Writing raw command: {cmd}")
-        self.socket.send_string(cmd)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Writing raw command: %s", truncated(cmd))
+        if not self.connected:
+            self.warmup()
+        self._wait_for_pacing()
+        if self._transport is not None:
+            self._transport.submit(cmd)
+            return
+        with self._io_lock:
+            # The REQ socket now waits for a reply, so it must not be pooled.
+            self._healthy = False
+            self.socket.send(cmd.encode("utf-8") if isinstance(cmd, str) else cmd)
 
-    def ask_raw(self, cmd: str) -> str:
+    def ask_raw(self, cmd: Union[str, bytes], method: Optional[str] = None, label: Optional[str] = None) -> dict:
         """
         Low-level interface to send a command to the ZMQ socket and receive a response.
 
         Args:
             cmd: The command to send to the instrument.
+            method: JSON-RPC method name of ``cmd``, used to look up its
+                entry in ``command_intervals``.
+            label: Name to record ``cmd`` under in ``stats()``. Default ``method``.
 
         Returns:
-            str: The instrument's response.
-        """
-        self.logger.debug(f"Asking raw command: {cmd}")
-        self.socket.send_string(cmd)
-        response = self.socket.recv_string()
-        time.sleep(0.1)
-        response: dict = json.loads(response)
-        self.logger.debug(f"Received response: {response}")
+            dict: The instrument's decoded response.
+
+        Raises:
+            zmq.Again: No reply within the timeout (after any retries).
+                The socket has already been recovered and stays usable.
+        """
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Asking raw command: %s", truncated(cmd))
+        if not self.connected:
+            self.warmup()
+        attempt = 0
+        while True:
+            try:
+                return self._ask_once(cmd, method, label)
+            except zmq.Again:
+                if attempt >= self.retries or not self._is_idempotent(method):
+                    self.recovery_counts["failures"] += 1
+                    raise
+                attempt += 1
+                self.recovery_counts["retries"] += 1
+                backoff = min(self.retry_backoff * 2 ** (attempt - 1), self.max_backoff)
+                self.logger.warning(f"Retrying {method} ({attempt}/{self.retries}) in {backoff:.2f} s.")
+                time.sleep(backoff)
+
+    def recovery_stats(self) -> dict[str, int]:
+        """Counts of timeouts, socket reconnects, retries and failed commands."""
+        return dict(self.recovery_counts)
+
+    def stats(self, reset: bool = False) -> dict[str, dict[str, Any]]:
+        """
+        Per-method round-trip metrics of this instrument.
+
+        Args:
+            reset: Clear the counters after reading them.
+
+        Returns:
+            dict: {method: {"count", "errors", "bytes_sent", "bytes_received",
+            "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"}}. Timed-out
+            attempts count as errors.
+        """
+        snapshot = self.metrics.snapshot()
+        if reset:
+            self.metrics.reset()
+        return snapshot
+
+    def dump_stats(self, path: str, interval: float = 60.0) -> StatsDump:
+        """Append ``stats()`` to the JSON lines file ``path`` every ``interval`` seconds."""
+        return dump_periodically(self.stats, path, interval)
+
+    def _is_idempotent(self, method: Optional[str]) -> bool:
+        if method is None:
+            return False
+        return method in self.idempotent_methods or method.startswith(self.idempotent_prefixes)
+
+    def _ask_once(self, cmd: Union[str, bytes], method: Optional[str] = None, label: Optional[str] = None) -> dict:
+        """
+        Single request/reply round-trip (lazy-pirate pattern).
+
+        On timeout the REQ socket, which would otherwise refuse every
+        further send, is closed and re-created before zmq.Again propagates.
+        """
+        data = cmd.encode("utf-8") if isinstance(cmd, str) else cmd
+        if self._transport is not None:
+            self._wait_for_pacing()
+            started = time.time()
+            start = time.perf_counter()
+            try:
+                response, received = self._transport.ask_sized(data, self._timeout)
+            except zmq.Again:
+                self.recovery_counts["timeouts"] += 1
+                self.metrics.record(label or method, time.perf_counter() - start, len(data), error=True)
+                raise
+            elapsed = time.perf_counter() - start
+            self.metrics.record(label or method, elapsed, len(data), received)
+            self._schedule_pacing(method)
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Received response: %s", truncated(response))
+            if self._recorder is not None:
+                self._recorder.write(self._address, data, response, started, elapsed, self.codec)
+            return response
+        # A REQ socket allows one request at a time, so threads sharing the
+        # instrument take turns for the whole send/receive.
+        with self._io_lock:
+            self._wait_for_pacing()
+            started = time.time()
+            start = time.perf_counter()
+            if not self._healthy:
+                # Still waiting for a reply to an earlier write_raw or aborted call.
+                self._reset_socket()
+                self.recovery_counts["reconnects"] += 1
+            self._healthy = False
+            try:
+                self.socket.send(data)
+                # Binary waveform replies arrive as extra frames; keep them
+                # uncopied so decode_frames can wrap them in NumPy arrays.
+                frames = self.socket.recv_multipart(copy=False)
+            except zmq.Again:
+                self.recovery_counts["timeouts"] += 1
+                self.metrics.record(label or method, time.perf_counter() - start, len(data), error=True)
+                self.logger.warning(f"No reply to {method} from {self._address} within {self._timeout} s.")
+                self._reset_socket()
+                self.recovery_counts["reconnects"] += 1
+                raise
+            self._healthy = True
+            elapsed = time.perf_counter() - start
+            self.metrics.record(label or method, elapsed, len(data), sum(len(f) for f in frames))
+            self._schedule_pacing(method)
+        response: dict = decode_frames(self.codec, frames)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Received response: %s", truncated(response))
+        if self._recorder is not None:
+            self._recorder.write(self._address, data, response, started, elapsed, self.codec)
         return response
 
     def __enter__(self):
@@ -167,7 +788,7 @@ if __name__ == "__main__":
     # Test the Instrument class
     import os
     address = "tcp://localhost:29170"
-    logpath = os.path.join(os.environ.get('LOCALAPPDATA'), 'Levylab', 'FLEX', 'logs')
+    logpath = os.path.join(os.environ.get('LOCALAPPDATA', os.path.expanduser('~')), 'Levylab', 'FLEX', 'logs')
     os.makedirs(logpath, exist_ok=True)
     log_file= logpath + '\\dummy_instrument.log'
     inst = Instrument(address, log_file=log_file)
@@ -0,0 +1,166 @@
+'''
+Payload codecs for the Levylab FLEX base instrument class.
+
+The Levylab Instrument Framework speaks UTF-8 JSON. JsonCodec uses the
+standard library; OrjsonCodec produces the same wire format several times
+faster and is picked automatically when orjson is installed. MsgpackCodec
+is only used after a server advertises "msgpack" in its IDN "codecs" list.
+
+Replies may also be multipart: a header frame in the codec's format plus
+raw binary frames. The header references a frame with a placeholder
+object ``{"$frame": k, "dtype": "<f8"}`` (k counts from 1, the first frame
+after the header), which decode_frames() replaces with a NumPy view of
+that frame, without copying.
+
+Install the optional codecs with: pip install orjson msgpack
+'''
+
+import json
+from typing import Any, Optional, Sequence, Union
+
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# Optional dependencies
+# ---------------------------------------------------------------------------
+try:
+    import orjson
+    _ORJSON_AVAILABLE = True
+except ImportError:
+    _ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    _MSGPACK_AVAILABLE = True
+except ImportError:
+    _MSGPACK_AVAILABLE = False
+
+
+class JsonCodec:
+    """Standard library JSON, the reference wire format."""
+
+    name = "json"
+
+    def encode(self, obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+    def decode(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+def _to_builtin(obj: Any) -> Any:
+    # json.dumps fallback for the NumPy values orjson serializes natively.
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    orjson-backed JSON, wire-compatible with JsonCodec.
+
+    orjson rejects the NaN and Infinity literals LabVIEW writes and would
+    encode non-finite floats as null, so those payloads go through the
+    standard library instead.
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        if not _ORJSON_AVAILABLE:
+            raise ImportError(
+                "orjson is not installed. "
+                "Install it with: pip install orjson"
+            )
+
+    def encode(self, obj: Any) -> bytes:
+        data = orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        # null is either None or a non-finite float; only the latter differs.
+        if b"null" in data:
+            return json.dumps(obj, default=_to_builtin).encode("utf-8")
+        return data
+
+    def decode(self, data: Union[bytes, str]) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return json.loads(data)
+
+
+class MsgpackCodec:
+    """MessagePack, for servers that advertise it. Still reads JSON replies."""
+
+    name = "msgpack"
+
+    def __init__(self):
+        if not _MSGPACK_AVAILABLE:
+            raise ImportError(
+                "msgpack is not installed. "
+                "Install it with: pip install msgpack"
+            )
+        self._json = default_codec()
+
+    def encode(self, obj: Any) -> bytes:
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def decode(self, data: Union[bytes, str]) -> Any:
+        # Error replies from the JSON front end of the server stay JSON.
+        if isinstance(data, str) or data[:1] in (b"{", b"["):
+            return self._json.decode(data)
+        return msgpack.unpackb(data, raw=False)
+
+
+_CODECS = {
+    "json": JsonCodec,
+    "orjson": OrjsonCodec,
+    "msgpack": MsgpackCodec,
+}
+
+
+def get_codec(name: str):
+    """Return a codec instance by name: "json", "orjson" or "msgpack"."""
+    if name not in _CODECS:
+        raise ValueError(f"Invalid codec: {name}. Allowed values are: {', '.join(_CODECS)}")
+    return _CODECS[name]()
+
+
+def default_codec(name: Optional[str] = None):
+    """
+    Return the codec ``name``, or the fastest available JSON codec when
+    ``name`` is None (orjson if installed, else the stdlib).
+    """
+    if name is None:
+        return OrjsonCodec() if _ORJSON_AVAILABLE else JsonCodec()
+    return get_codec(name)
+
+
+def _attach_frames(obj: Any, frames: Sequence) -> Any:
+    if isinstance(obj, dict):
+        if "$frame" in obj:
+            frame = frames[obj["$frame"]]
+            buffer = frame.buffer if hasattr(frame, "buffer") else frame
+            array = np.frombuffer(buffer, dtype=np.dtype(obj.get("dtype", "<f8")))
+            if "shape" in obj:
+                array = array.reshape(obj["shape"])
+            return array
+        return {key: _attach_frames(value, frames) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [_attach_frames(value, frames) for value in obj]
+    return obj
+
+
+def decode_frames(codec, frames: Sequence) -> Any:
+    """
+    Decode a reply received as one or more ZMQ frames.
+
+    ``frames`` may hold zmq.Frame objects (from ``recv_multipart(copy=False)``)
+    or bytes. Binary frames referenced from the header are returned as
+    NumPy arrays that share memory with the received message.
+    """
+    header = frames[0].bytes if hasattr(frames[0], "bytes") else frames[0]
+    reply = codec.decode(header)
+    if len(frames) > 1:
+        reply = _attach_frames(reply, frames)
+    return reply
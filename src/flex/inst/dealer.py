@@ -0,0 +1,187 @@
+'''
+Pipelined DEALER transport for the Levylab FLEX base instrument class.
+
+A REQ socket allows a single outstanding request. DealerTransport instead
+keeps many JSON-RPC requests in flight on one DEALER socket and hands each
+reply to the caller waiting on its ``id``. It talks to the same REP (or
+ROUTER) servers as REQ, because every message carries the empty delimiter
+frame REP expects.
+
+Used by ``Instrument(address, transport="dealer")``.
+'''
+
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Optional, Union
+
+import zmq
+
+from flex.inst.codec import decode_frames, default_codec
+
+
+def _message_id(message: Any) -> Optional[str]:
+    """Correlation key of a request or reply (the first id for batch arrays)."""
+    if isinstance(message, list):
+        message = message[0] if message else None
+    if isinstance(message, dict):
+        value = message.get("id")
+        return None if value is None else str(value)
+    return None
+
+
+class DealerTransport:
+    """
+    Owns a DEALER socket on a background I/O thread.
+
+    Callers on any thread submit payloads through a thread-local PUSH
+    socket; the I/O thread forwards them to the server and resolves the
+    matching Future when the reply with the same id arrives.
+
+    Args:
+        context: ZMQ context to create sockets from.
+        address: The ZMQ resource name to connect to.
+        logger: Logger of the owning instrument.
+        codec: Payload codec (see flex.inst.codec). Default orjson/json.
+    """
+
+    def __init__(self, context: zmq.Context, address: str, logger: Optional[logging.Logger] = None, codec=None):
+        self.codec = codec or default_codec()
+        self._context = context
+        self._address = address
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self._pending: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._outboxes: list[zmq.Socket] = []
+        self._inbox_address = f"inproc://flex-dealer-{id(self)}"
+
+        self._inbox = context.socket(zmq.PULL)
+        self._inbox.bind(self._inbox_address)
+        self._dealer = context.socket(zmq.DEALER)
+        self._dealer.setsockopt(zmq.LINGER, 0)
+        self._dealer.connect(address)
+
+        self._thread = threading.Thread(
+            target=self._run, name=f"flex-dealer {address}", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests waiting for a reply."""
+        with self._lock:
+            return len(self._pending)
+
+    def submit(self, payload: Union[str, bytes], key: Optional[str] = None) -> Future:
+        """
+        Send ``payload`` without waiting and return a Future for its reply.
+
+        Args:
+            payload: Encoded JSON-RPC request or batch array.
+            key: Request id; parsed from ``payload`` when omitted.
+        """
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        if key is None:
+            key = _message_id(self.codec.decode(payload))
+        future: Future = Future()
+        with self._lock:
+            if key in self._pending:
+                raise ValueError(f"Request id {key!r} is already in flight.")
+            self._pending[key] = future
+        self._outbox().send(payload)
+        return future
+
+    def ask(self, payload: Union[str, bytes], timeout: Optional[float] = None) -> Any:
+        """Send ``payload`` and block until its decoded reply arrives."""
+        return self.ask_sized(payload, timeout)[0]
+
+    def ask_sized(self, payload: Union[str, bytes], timeout: Optional[float] = None) -> tuple[Any, int]:
+        """Like ask(), also returning the size of the reply in bytes."""
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        key = _message_id(self.codec.decode(payload))
+        future = self.submit(payload, key)
+        return self.wait(key, future, timeout), future.reply_bytes
+
+    def wait(self, key: Optional[str], future: Future, timeout: Optional[float] = None) -> Any:
+        """Return the reply of ``future``, raising zmq.Again after ``timeout`` seconds."""
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            self.discard(key)
+            self.logger.warning(f"No reply to request {key!r} from {self._address} within {timeout} s.")
+            raise zmq.Again()
+
+    def discard(self, key: Optional[str]) -> None:
+        """Forget a request whose caller stopped waiting; a late reply is dropped."""
+        with self._lock:
+            future = self._pending.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def close(self) -> None:
+        """Stop the I/O thread, fail outstanding requests and close all sockets."""
+        if not self._thread.is_alive():
+            return
+        self._outbox().send(b"")  # empty payload stops the I/O thread
+        self._thread.join()
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            outboxes, self._outboxes = self._outboxes, []
+        for future in pending.values():
+            future.set_exception(ConnectionError(f"Transport to {self._address} closed."))
+        for sock in outboxes:
+            sock.close(linger=0)
+
+    def _outbox(self) -> zmq.Socket:
+        sock = getattr(self._local, "outbox", None)
+        if sock is None:
+            sock = self._context.socket(zmq.PUSH)
+            sock.connect(self._inbox_address)
+            self._local.outbox = sock
+            with self._lock:
+                self._outboxes.append(sock)
+        return sock
+
+    def _run(self) -> None:
+        poller = zmq.Poller()
+        poller.register(self._inbox, zmq.POLLIN)
+        poller.register(self._dealer, zmq.POLLIN)
+        try:
+            while True:
+                events = dict(poller.poll())
+                if self._inbox in events:
+                    payload = self._inbox.recv()
+                    if not payload:
+                        break
+                    self._dealer.send_multipart([b"", payload])
+                if self._dealer in events:
+                    frames = self._dealer.recv_multipart(copy=False)
+                    # Skip the envelope up to and including the empty delimiter.
+                    start = next((i + 1 for i, f in enumerate(frames) if len(f) == 0), 0)
+                    self._dispatch(frames[start:])
+        finally:
+            self._inbox.close(linger=0)
+            self._dealer.close(linger=0)
+
+    def _dispatch(self, frames: list) -> None:
+        size = sum(len(f) for f in frames)
+        try:
+            reply = decode_frames(self.codec, frames)
+        except ValueError as e:
+            self.logger.error(f"Undecodable reply from {self._address}: {e}")
+            return
+        key = _message_id(reply)
+        with self._lock:
+            future = self._pending.pop(key, None)
+            if future is None and key is None and len(self._pending) == 1:
+                # Servers reply with a null id to requests they could not
+                # parse; with one request in flight it must be that one.
+                _, future = self._pending.popitem()
+        if future is None:
+            self.logger.warning(f"Dropping reply with unknown id {key!r} from {self._address}.")
+        elif not future.cancelled():
+            future.reply_bytes = size
+            future.set_result(reply)
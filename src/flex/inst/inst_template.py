@@ -6,15 +6,15 @@ import os
 _DEFAULT_ADDRESS = "tcp://localhost:<port>"
 _LABVIEW_CLASS_NAME = "<lvclassname>.lvclass"
 
-logpath = os.path.join(os.environ.get("LOCALAPPDATA"), "Levylab", "FLEX", "logs")
+logpath = os.path.join(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")), "Levylab", "FLEX", "logs")
 os.makedirs(logpath, exist_ok=True)
 
 # NOTE: Class should have the same name as the module name
 class inst_template(Instrument, Temperature, Magnet):
     """FLEX Driver for a Levylab Instrument Framework Instrument"""
 
-    def __init__(self, address: str = _DEFAULT_ADDRESS):
-        super().__init__(address, log_file=os.path.join(logpath, "<inst_template>.log"))
+    def __init__(self, address: str = _DEFAULT_ADDRESS, **kwargs):
+        super().__init__(address, log_file=os.path.join(logpath, "<inst_template>.log"), **kwargs)
 
     # --------- Optional overrides (only if different from default) ---------
     # For standard PPMS, the default ZMQ commands in Temperature and Magnet work,
@@ -26,7 +26,7 @@ class inst_template(Instrument, Temperature, Magnet):
 
     # instrument-specific commands
     def get_LHe_level(self) -> float:
-        return self._send_command("getLHeLevel")["result"]
+        return self._query("getLHeLevel")
 
 # Test the class    
 if __name__ == '__main__':
@@ -5,7 +5,7 @@ import os
 _DEFAULT_ADDRESS = "tcp://localhost:XXXXX"
 _LABVIEW_CLASS_NAME = "Instrument.Aerotech.lvclass"
 
-logpath = os.path.join(os.environ.get("LOCALAPPDATA"), "Levylab", "FLEX", "logs")
+logpath = os.path.join(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")), "Levylab", "FLEX", "logs")
 os.makedirs(logpath, exist_ok=True)
 
 
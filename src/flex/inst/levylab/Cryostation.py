@@ -5,24 +5,24 @@ import os
 _DEFAULT_ADDRESS = "tcp://localhost:55446"
 _LABVIEW_CLASS_NAME = "instrument.Cryostation.lvclass"
 
-logpath = os.path.join(os.environ.get("LOCALAPPDATA"), "Levylab", "FLEX", "logs")
+logpath = os.path.join(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")), "Levylab", "FLEX", "logs")
 os.makedirs(logpath, exist_ok=True)
 
 
 class Cryostation(Instrument, Temperature):
     """Montana Cryostation driver with Temperature capabilities."""
 
-    def __init__(self, address: str = _DEFAULT_ADDRESS):
-        super().__init__(address, log_file=os.path.join(logpath, "Cryostation.log"))
+    def __init__(self, address: str = _DEFAULT_ADDRESS, **kwargs):
+        super().__init__(address, log_file=os.path.join(logpath, "Cryostation.log"), **kwargs)
 
-    def getTemperature(self, channel = 0):
+    def getTemperature(self, channel = 0, max_age = None):
         """
         channel 0: Sample Temperature
         channel 1: Platform Temperature
         channel 2: Stage 1 Temperature
         channel 3: Stage 2 Temperature
         """
-        return super().getTemperature(channel)
+        return super().getTemperature(channel, max_age)
     
     def setTemperature(self, temperature, rate, channel = 0):
         """Override to disable control for this specific hardware."""
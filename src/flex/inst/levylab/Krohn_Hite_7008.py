@@ -16,12 +16,12 @@ import os
 _DEFAULT_ADDRESS = 'tcp://localhost:29160'
 _LABVIEW_CLASS_NAME = "Inst.Krohn-Hite-7008.lvclass"
 
-logpath = os.path.join(os.environ.get('LOCALAPPDATA'), 'Levylab', 'FLEX', 'logs')
+logpath = os.path.join(os.environ.get('LOCALAPPDATA', os.path.expanduser('~')), 'Levylab', 'FLEX', 'logs')
 os.makedirs(logpath, exist_ok=True)
 
 class Krohn_Hite_7008(Instrument, Amplifier):
-    def __init__(self, address= _DEFAULT_ADDRESS):
-      super().__init__(address, log_file=os.path.join(logpath, "Krohn-Hite-7008.log"))
+    def __init__(self, address= _DEFAULT_ADDRESS, **kwargs):
+      super().__init__(address, log_file=os.path.join(logpath, "Krohn-Hite-7008.log"), **kwargs)
     
     # def get_allowed_values(cls):
     #     """
@@ -10,54 +10,379 @@ Contact an author for any queries.
 
 from flex.inst.base import Instrument
 from flex.inst.levylab.insttypes.DAQ import DAQ
+from flex.inst.subscribe import Subscription, listen, pub_address
 import time
 import os
+import queue
+import threading
+from fnmatch import fnmatchcase
+from functools import partial
+from types import MappingProxyType
+from typing import Optional, Sequence, Union
+import numpy as np
 from datetime import datetime, timedelta
 from flex.db import db_dataviewer as dv
 
 _DEFAULT_ADDRESS = 'tcp://localhost:29170'
 _LABVIEW_CLASS_NAME = "Instrument.Lockin.lvclass"
 
-logpath = os.path.join(os.environ.get('LOCALAPPDATA'), 'Levylab', 'FLEX', 'logs')
+logpath = os.path.join(os.environ.get('LOCALAPPDATA', os.path.expanduser('~')), 'Levylab', 'FLEX', 'logs')
 os.makedirs(logpath, exist_ok=True)
 
+class SweepDataset:
+    """
+    Waveforms of one lock-in sweep as a single 2-D float array.
+
+    Rows are ordered AO, AI, then per AI channel and reference the X and Y
+    outputs, named like the TDMS channels of the Lockin application:
+    "AO1", "AI1", "AI1X1" (X of AI1 at reference 1), "AI1Y1". Rows of a
+    shorter waveform are padded with NaN in ``data`` and ``block``;
+    ``dataset[name]``, ``to_dict`` and ``time`` return each waveform at
+    its own length.
+
+    Attributes
+    ----------
+    data : np.ndarray
+        Shape ``(len(channels), samples)``.
+    channels : list of str
+        Row names.
+    kinds : list of str
+        "AO", "AI", "X" or "Y" of every row.
+    index : dict
+        Row of every channel name.
+    lengths : np.ndarray
+        Number of samples of every row before padding.
+    attributes : dict
+        Server attributes of every channel, plus its "t0" and "dt".
+    t0, dt : float
+        Start time and sample interval of the first waveform.
+    """
+
+    def __init__(
+        self,
+        data: np.ndarray,
+        channels: list[str],
+        kinds: list[str],
+        attributes: dict[str, dict],
+        t0: float = 0.0,
+        dt: float = 1.0,
+        lengths: Optional[Sequence[int]] = None,
+    ):
+        self.data = data
+        self.channels = channels
+        self.kinds = kinds
+        self.index = {name: i for i, name in enumerate(channels)}
+        self.lengths = np.full(len(channels), data.shape[1]) if lengths is None else np.asarray(lengths)
+        self.attributes = attributes
+        self.t0 = t0
+        self.dt = dt
+
+    @staticmethod
+    def _name(kind: str, attributes: dict) -> str:
+        if kind in ("AO", "AI"):
+            return f"{kind}{attributes[f'{kind} Channel']}"
+        return f"AI{attributes['AI Channel']}{kind}{attributes['Reference Channel']}"
+
+    @classmethod
+    def from_reply(cls, reply: dict) -> "SweepDataset":
+        """Parse a getSweepWaveforms result (JSON lists or binary arrays)."""
+        waveforms = [(kind, w) for kind in ("AO", "AI") for w in reply.get(kind, [])]
+        # X and Y rows of one channel and reference go next to each other.
+        waveforms += [
+            (kind, w) for x, y in zip(reply.get("X", []), reply.get("Y", [])) for kind, w in (("X", x), ("Y", y))
+        ]
+        lengths = [len(w["Y"]) for _, w in waveforms]
+        data = np.empty((len(waveforms), max(lengths, default=0)))
+        channels, attributes = [], {}
+        for row, (kind, waveform) in enumerate(waveforms):
+            y = waveform["Y"]
+            data[row, :len(y)] = y
+            data[row, len(y):] = np.nan
+            name = cls._name(kind, waveform.get("attributes", {}))
+            channels.append(name)
+            attributes[name] = {**waveform.get("attributes", {}), "t0": waveform.get("t0", 0), "dt": waveform.get("dt", 1)}
+        first = waveforms[0][1] if waveforms else {}
+        kinds = [kind for kind, _ in waveforms]
+        return cls(data, channels, kinds, attributes, float(first.get("t0", 0)), float(first.get("dt", 1)), lengths)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        row = self.index[name]
+        return self.data[row, :self.lengths[row]]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def __len__(self) -> int:
+        return len(self.channels)
+
+    def time(self, name: str) -> np.ndarray:
+        """Time axis of channel ``name`` in seconds, from its own t0 and dt."""
+        attributes = self.attributes.get(name, {})
+        t0 = float(attributes.get("t0", self.t0))
+        dt = float(attributes.get("dt", self.dt))
+        return t0 + dt * np.arange(self.lengths[self.index[name]])
+
+    def block(self, kind: str) -> np.ndarray:
+        """Rows of one kind ("AO", "AI", "X" or "Y") as a 2-D array, in channel order."""
+        rows = [i for i, k in enumerate(self.kinds) if k == kind]
+        if rows and rows == list(range(rows[0], rows[-1] + 1)):
+            return self.data[rows[0]:rows[-1] + 1]
+        return self.data[rows]
+
+    def to_dict(self) -> dict[str, np.ndarray]:
+        """{channel: samples} views of the rows, e.g. for flexTDMS.write_tdms."""
+        return {name: self[name] for name in self.channels}
+
+
+class SweepHandle:
+    """
+    A sweep started by ``Lockin.start_sweep``.
+
+    Completion is polled with getState: sparsely while the sweep should
+    still be running (halving the time to its expected end), then every
+    ``min_poll`` s backing off to ``max_poll``. If the server advertises a
+    PUB endpoint, getState messages published on it wake the wait early.
+
+    The server may not report 'sweeping' yet right after the start, so
+    any other state only counts as finished once 'sweeping' has been seen
+    or the expected end has passed.
+    """
+
+    min_poll: float = 0.01
+    max_poll: float = 0.5
+
+    def __init__(self, lockin: "Lockin", duration: float):
+        self._lockin = lockin
+        self.started = time.monotonic()
+        self.expected_end = self.started + duration
+        self._done = False
+        self._seen_sweeping = False
+        self._events: "queue.Queue" = queue.Queue()
+        self._subscription: Optional[Subscription] = None
+        address = pub_address(lockin.idn(), lockin._address)
+        if address is not None:
+            self._subscription = listen(address, ["getState"], self._events)
+
+    def _finish(self) -> None:
+        self._done = True
+        if self._subscription is not None:
+            self._subscription.close()
+            self._subscription = None
+
+    def done(self) -> bool:
+        """Whether the sweep has finished (one getState round-trip until it has)."""
+        if not self._done:
+            if self._lockin.getState() == 'sweeping':
+                self._seen_sweeping = True
+            elif self._seen_sweeping or time.monotonic() >= self.expected_end:
+                self._finish()
+        return self._done
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """
+        Block until the sweep has finished.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Seconds to allow past the expected end of the sweep (initial
+            wait plus sweep time). Default: no limit.
+
+        Raises
+        ------
+        TimeoutError
+            The lock-in is still sweeping ``timeout`` s after the expected end.
+        """
+        backoff = self.min_poll
+        while not self.done():
+            now = time.monotonic()
+            remaining = self.expected_end - now
+            if remaining > 0:
+                delay = max(remaining / 2, self.min_poll)
+            else:
+                if timeout is not None and -remaining > timeout:
+                    raise TimeoutError(f"Sweep operation timed out after {timeout} seconds. Please check the Multichannel Lock-in Application.")
+                delay = backoff
+                backoff = min(backoff * 1.5, self.max_poll)
+            # Published states only wake us up early; done() confirms.
+            deadline = now + delay
+            try:
+                while self._events.get(timeout=max(deadline - time.monotonic(), 0))[1] == 'sweeping':
+                    self._seen_sweeping = True
+            except queue.Empty:
+                pass
+
+    def result(self, timeout: Optional[float] = None) -> SweepDataset:
+        """Wait for the sweep and return its waveforms (see ``Lockin.get_sweep_dataset``)."""
+        self.wait(timeout)
+        return self._lockin.get_sweep_dataset()
+
+
+class ResultStream:
+    """
+    Lock-in results polled on a background thread into a ring buffer.
+
+    Started by ``Lockin.start_stream``. The buffer holds the newest
+    ``capacity`` samples, so memory stays bounded however long the stream
+    runs; ``dropped`` counts samples overwritten before ``drain()`` saw them.
+
+    Attributes
+    ----------
+    keys : list of str
+        Result keys, one column of ``values`` each.
+    rate : float
+        Samples per second requested.
+    count : int
+        Samples acquired since the start.
+    dropped : int
+        Samples overwritten before they were drained.
+    errors : int
+        Failed getResults calls (skipped samples).
+    """
+
+    def __init__(self, lockin: "Lockin", keys: list[str], rate: float, capacity: int):
+        self._lockin = lockin
+        self.keys = keys
+        self.rate = rate
+        self.capacity = capacity
+        self._times = np.empty(capacity)
+        self._values = np.empty((capacity, len(keys)))
+        self.count = 0
+        self.dropped = 0
+        self.errors = 0
+        self._drained = 0
+        # Key positions are resolved here rather than through the Lockin's
+        # shared results index, which other threads update.
+        self._positions: list[Optional[int]] = []
+        self._layout = -1
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"flex-stream {lockin._address}", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        period = 1 / self.rate
+        next_time = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                results = self._lockin.getResults()['Results (Dictionary)']
+                values = self._row(results)
+            except Exception as e:
+                self.errors += 1
+                self._lockin.logger.warning(f"Stream sample failed: {e!r}")
+            else:
+                with self._lock:
+                    row = self.count % self.capacity
+                    self._times[row] = time.time()
+                    self._values[row] = values
+                    self.count += 1
+            # Fixed cadence; when a reply is late, continue from now
+            # rather than bursting to catch up.
+            next_time = max(next_time + period, time.monotonic())
+            self._stop.wait(next_time - time.monotonic())
+
+    def _row(self, results: list) -> list[float]:
+        valid = len(results) == self._layout and all(
+            i is None or results[i]['key'] == key for i, key in zip(self._positions, self.keys)
+        )
+        if not valid:
+            index = {item['key']: i for i, item in enumerate(results)}
+            self._positions = [index.get(key) for key in self.keys]
+            self._layout = len(results)
+        return [np.nan if i is None else results[i]['value'] for i in self._positions]
+
+    def _read(self, start: int) -> tuple[np.ndarray, np.ndarray]:
+        rows = np.arange(start, self.count) % self.capacity
+        return self._times[rows], self._values[rows]
+
+    def snapshot(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Copy of the buffered samples, oldest first.
+
+        Returns
+        -------
+        times : np.ndarray
+            Wall-clock time of every sample, shape ``(n,)``.
+        values : np.ndarray
+            Shape ``(n, len(keys))``, NaN for a key missing from a reply.
+        """
+        with self._lock:
+            return self._read(max(0, self.count - self.capacity))
+
+    def drain(self) -> tuple[np.ndarray, np.ndarray]:
+        """Samples acquired since the last ``drain()``, as ``snapshot()``."""
+        with self._lock:
+            start = max(self._drained, self.count - self.capacity)
+            self.dropped += start - self._drained
+            self._drained = self.count
+            return self._read(start)
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def stop(self) -> None:
+        """Stop acquiring; the buffer stays readable."""
+        self._stop.set()
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
 class Lockin(Instrument, DAQ):
-    def __init__(self, address=_DEFAULT_ADDRESS):
-        super().__init__(address, log_file=os.path.join(logpath, "Lockin.log"))
+    # The Lockin needs time to apply a sweep configuration before it is
+    # started, and to leave 'idle' after setState('start') before setSweep.
+    command_intervals = MappingProxyType({'setSweep': 0.5, 'setState': 0.1})
+
+    AO_FUNCTIONS = ("Sine", "Triangle", "Square")
+    # configure_ao() field names and the server's names for them.
+    AO_FIELDS = {"amplitude": "Amplitude", "frequency": "Frequency", "phase": "Phase", "dc": "DC", "function": "Function"}
+
+    def __init__(self, address=_DEFAULT_ADDRESS, **kwargs):
+        super().__init__(address, log_file=os.path.join(logpath, "Lockin.log"), **kwargs)
+        # Position of every key in the last 'Results (Dictionary)' seen,
+        # and the keys matched by each pattern in that layout.
+        self._results_index: dict[str, int] = {}
+        self._results_patterns: dict[str, list[str]] = {}
+        # Last known AO settings per channel, written through by configure_ao().
+        self._ao_state: dict[int, dict] = {}
           
     def getAO(self, channel):
         cmd = 'getAO'
         params = {'channel': channel}
-        response = self._send_command(cmd, params)
-        return response['result']
+        return self._query(cmd, params)
     
     def getAI(self, channel):
         cmd = 'getAI'
         params = {'channel': channel}
-        response = self._send_command(cmd, params)
-        return response['result']
+        return self._query(cmd, params)
     
-    def setAO_Amplitude(self, channel: int, value: float) -> None:
+    def setAO_Amplitude(self, channel: int, value: float) -> dict:
         cmd = 'setAO_Amplitude'
         param = {'Channel': channel, 'Amplitude': value}
-        self._send_command(cmd, param)
+        return self._send_command(cmd, param)
 
-    def setAO_DC(self, channel: int, value: float) -> None:
+    def setAO_DC(self, channel: int, value: float) -> dict:
         cmd = 'setAO_DC'
         param = {'Channel': channel, 'DC': value}
-        self._send_command(cmd, param)
+        return self._send_command(cmd, param)
 
-    def setAO_Frequency(self, channel: int, value: float) -> None:
+    def setAO_Frequency(self, channel: int, value: float) -> dict:
         cmd = 'setAO_Frequency'
         param = {'Channel': channel, 'Frequency': value}
-        self._send_command(cmd, param)
+        return self._send_command(cmd, param)
 
-    def setAO_Phase(self, channel: int, value: float) -> None:
+    def setAO_Phase(self, channel: int, value: float) -> dict:
         cmd = 'setAO_Phase'
         param = {'Channel': channel, 'Phase': value}
-        self._send_command(cmd, param)
+        return self._send_command(cmd, param)
 
-    def setAO_Function(self, channel: int, value: str) -> None:
+    def setAO_Function(self, channel: int, value: str) -> dict:
         """
         Set the function of the specified analog output (AO) channel.
         Parameters:
@@ -67,42 +392,72 @@ class Lockin(Instrument, DAQ):
         ValueError: If the provided value is not one of the allowed values.
         """
 
-        allowed_values = {"Sine", "Triangle", "Square"}
+        allowed_values = self.AO_FUNCTIONS
         if value not in allowed_values:
             raise ValueError(f"Invalid value: {value}. Allowed values are: {', '.join(allowed_values)}")
         
         cmd = 'setAO_Function'
         param = {'Channel': channel, 'Function': value}
-        self._send_command(cmd, param)
+        return self._send_command(cmd, param)
+
+    def _invalidate_on(self, cmd: str) -> None:
+        super()._invalidate_on(cmd)
+        # Other AO writes and sweeps (which move the DC) leave the cached
+        # AO settings unknown.
+        if cmd.startswith('setAO_') or cmd == 'setSweep':
+            self._ao_state = {}
 
     def getResults(self) -> dict:
         cmd = 'getResults'
-        return self._send_command(cmd)['result']
+        return self._query(cmd)
     
-    def setState(self, value: str) -> None:
+    def setState(self, value: str) -> dict:
         cmd = 'setState'
         param = {"State": value}
-        self._send_command(cmd, param)
+        return self._send_command(cmd, param)
     
     def getState(self) -> str:
         cmd = 'getState'
-        return self._send_command(cmd)['result']
+        return self._query(cmd)
     
-    def setSweepTime(self, value: float) -> None:
+    def setSweepTime(self, value: float) -> dict:
         cmd = 'setSweepTime'
         param = value
-        self._send_command(cmd, param)
+        return self._send_command(cmd, param)
     
-    def setSamplingMode(self, value: str) -> None:
+    def setSamplingMode(self, value: str) -> dict:
         cmd = 'setSamplingFsMode'
         param = value
-        self._send_command(cmd, param)
+        return self._send_command(cmd, param)
     
-    def getSweepWaveforms(self) -> dict:
+    def getSweepWaveforms(self, binary: bool = False) -> dict:
+        """
+        Get the waveforms of the last sweep as {'AO': [...], 'AI': [...], 'X': [...], 'Y': [...]}.
+
+        Parameters:
+        binary (bool): Ask the server to send each waveform's 'Y' as a raw
+            little-endian float64 frame. 'Y' is then a NumPy array
+            sharing memory with the received message. Servers without binary
+            support ignore the request and reply with JSON lists.
+        """
         cmd = 'getSweepWaveforms'
-        return self._send_command(cmd)['result']
+        if binary:
+            return self._query(cmd, {'format': 'binary'})
+        return self._query(cmd)
+
+    def get_sweep_dataset(self, binary: bool = False) -> SweepDataset:
+        """
+        Get the waveforms of the last sweep as one 2-D array, see SweepDataset.
+
+        Parameters
+        ----------
+        binary : bool, optional
+            Request the waveforms as binary frames (see getSweepWaveforms).
+            Default False; servers without binary support send JSON lists.
+        """
+        return SweepDataset.from_reply(self.getSweepWaveforms(binary=binary))
 
-    def setSweep(self, sweep_config) -> None:
+    def setSweep(self, sweep_config) -> dict:
         '''
         sweep_config format:
         sweep_config = {"Sweep Time (s)":sweep_time,
@@ -116,69 +471,338 @@ class Lockin(Instrument, DAQ):
                               "Table":[]},
                               ]}
         '''
-        self._send_command('setSweep', sweep_config)
+        return self._send_command('setSweep', sweep_config)
 
 
 # -------------- Custom functions ---------------->
 
+    @staticmethod
+    def _result_key(channel: int, param: str, ref: int = 1) -> str:
+        return f"AI{channel}.{param}" if param == "Mean" else f"AI{channel}.Ref{ref}.{param}"
+
+    def _index_results(self, results: list) -> dict[str, int]:
+        index = {item['key']: i for i, item in enumerate(results)}
+        if index != self._results_index:
+            self._results_index = index
+            self._results_patterns = {}
+        return index
+
+    def _result_values(self, results: list, keys: Sequence[str]) -> list[Optional[float]]:
+        """
+        Values of ``keys`` in a 'Results (Dictionary)' list, None if absent.
+
+        Looks the keys up by their cached position and only rebuilds the
+        key -> index map when the layout has changed. A key missing from
+        the map stays missing while the number of results is unchanged
+        and the present keys are still in place.
+        """
+        index = self._results_index
+        positions = [index.get(key) for key in keys]
+        valid = len(index) == len(results) and all(
+            i is None or results[i]['key'] == key for i, key in zip(positions, keys)
+        )
+        if not valid:
+            index = self._index_results(results)
+            positions = [index.get(key) for key in keys]
+        return [None if i is None else results[i]['value'] for i in positions]
+
+    def _pattern_values(self, results: list, pattern: str) -> tuple[list[str], list[Optional[float]]]:
+        keys = self._results_patterns.get(pattern)
+        if keys is not None:
+            values = self._result_values(results, keys)
+            # Still cached means the layout did not change under the keys.
+            if pattern in self._results_patterns:
+                return keys, values
+        index = self._index_results(results)
+        keys = [key for key in index if fnmatchcase(key, pattern)]
+        self._results_patterns[pattern] = keys
+        return keys, [results[index[key]]['value'] for key in keys]
+
     def get_lockin_result(self, channel: int, param: str, ref: int = 1) -> float:
-        key = f"AI{channel}.{param}" if param == "Mean" else f"AI{channel}.Ref{ref}.{param}"
-        response = self._send_command('getResults')
-        results = response['result']['Results (Dictionary)']
-        results_dict = {item['key']: item['value'] for item in results}
-        return results_dict.get(key)
-
-    def lockin_sweep(self, sweep_config: dict, timeout=10) -> None:        
-        if self.getState() == 'sweeping':
-            raise Exception('Request Denied! Already sweeping')    
-        elif self.getState() == 'idle':
-            self.setState('start')   
+        key = self._result_key(channel, param, ref)
+        results = self.getResults()['Results (Dictionary)']
+        return self._result_values(results, [key])[0]
+
+    def get_lockin_results(self, keys: Union[str, Sequence[str]], as_array: bool = False) -> Union[dict, np.ndarray]:
+        """
+        Fetch several lock-in results with one getResults round-trip.
+
+        Parameters
+        ----------
+        keys : str or sequence of str
+            Result keys such as ``["AI1.Ref1.X", "AI1.Ref1.Y"]``, or one
+            glob pattern such as ``"AI*.Ref1.R"``.
+
+        as_array : bool, optional
+            Return a float array of the values in key order (NaN for a
+            missing key) instead of a ``{key: value}`` dict.
+        """
+        results = self.getResults()['Results (Dictionary)']
+        if isinstance(keys, str):
+            keys, values = self._pattern_values(results, keys)
+        else:
+            values = self._result_values(results, keys)
+        if as_array:
+            return np.array([np.nan if v is None else v for v in values], dtype=float)
+        return dict(zip(keys, values))
+
+    def get_lockin_array(
+        self,
+        channels: Sequence[int],
+        params: Sequence[str] = ("X", "Y", "R", "Theta"),
+        refs: Sequence[int] = (1,),
+    ) -> np.ndarray:
+        """
+        Fetch lock-in results of many channels and references as one array.
+
+        Parameters
+        ----------
+        channels : sequence of int
+            AI channels.
+
+        params : sequence of str, optional
+            Result names per channel and reference. "Mean" does not depend
+            on the reference. Default X, Y, R and Theta.
+
+        refs : sequence of int, optional
+            Reference channels. Default (1,).
+
+        Returns
+        -------
+        np.ndarray
+            Shape ``(len(channels), len(refs), len(params))``, NaN where the
+            server has no such result.
+        """
+        keys = [self._result_key(ch, param, ref) for ch in channels for ref in refs for param in params]
+        values = self.get_lockin_results(keys, as_array=True)
+        return values.reshape(len(channels), len(refs), len(params))
+
+    def start_sweep(self, sweep_config: dict) -> SweepHandle:
+        """
+        Configure and start a sweep without waiting for it to finish.
+
+        Parameters
+        ----------
+        sweep_config : dict
+            Sweep configuration, see ``setSweep``.
+
+        Returns
+        -------
+        SweepHandle
+            ``wait()``, ``done()`` and ``result()`` of the running sweep.
+        """
+        state = self.getState()
+        if state == 'sweeping':
+            raise Exception('Request Denied! Already sweeping')
+        elif state == 'idle':
+            self.setState('start')
         self.setSweep(sweep_config)
-        time.sleep(0.5)
         self.setState('start sweep')
-        # wait for the sweep time since it'll anyway take that long (saves processor resources)
-        wait_time = sweep_config.get("Sweep Time (s)") + sweep_config.get("Initial Wait (s)")
-        time.sleep(wait_time) 
-        start_time = time.time()
-        while self.getState() == 'sweeping':
-            if time.time() - start_time > timeout:
-                raise TimeoutError(f"Sweep operation timed out after {timeout} seconds. Please check the Multichannel Lock-in Application.")
-            time.sleep(0.5)
+        duration = sweep_config.get("Sweep Time (s)", 0) + sweep_config.get("Initial Wait (s)", 0)
+        return SweepHandle(self, duration)
 
-    def set_backgate(self, bg_channel:int, bg_target:float, sweep_rate:float, initial_wait:float = 1, tol:float = 1e-3):
+    def ao_state(self, refresh: bool = False) -> dict[int, dict]:
         """
-        Sweep the backgate voltage to a target value.
+        Last known settings of every AO channel, {channel: {"Amplitude", "DC", ...}}.
+
+        Read with one getAO call when unknown or if ``refresh`` is True, then
+        kept up to date by ``configure_ao``. Settings the server does not
+        report are missing.
+        """
+        if refresh or not self._ao_state:
+            fields = self.AO_FIELDS.values()
+            self._ao_state = {
+                w['attributes']['AO Channel']: {k: w['attributes'][k] for k in fields if k in w['attributes']}
+                for w in self.getAO(1)
+            }
+        return self._ao_state
+
+    def configure_ao(self, settings: dict[int, dict], refresh: bool = False) -> dict[int, dict]:
+        """
+        Configure several AO channels with one batch of writes.
+
+        Every field is validated before anything is sent. Fields equal to
+        the last known AO state (see ``ao_state``) are skipped, and the rest
+        are sent as one JSON-RPC batch.
+
+        Inside a ``batch()`` block the AO state is read right away and the
+        writes join that batch; the AO state of the written fields is
+        unknown until the batch has been answered.
 
         Parameters
         ----------
-        bg_channel : int
-            Analog output channel used for the backgate.
+        settings : dict
+            {channel: {field: value}} with fields "amplitude", "frequency",
+            "phase", "dc" (numbers) and "function" (one of AO_FUNCTIONS),
+            e.g. {1: {"amplitude": 0.01, "frequency": 13.0}}.
 
-        bg_target : float
-            Target backgate voltage in volts (V).
+        refresh : bool, optional
+            Read the AO state from the server instead of trusting the cache,
+            e.g. after changing AO settings in the Lockin application.
+
+        Returns
+        -------
+        dict
+            The writes that were sent (or queued, inside a ``batch()``
+            block), {channel: {ServerField: value}}.
+
+        Raises
+        ------
+        ValueError
+            A channel, field or value is invalid. Nothing was sent.
+        zmq.Again
+            The batch timed out. The AO state is then unknown and is
+            read again by the next call.
+        """
+        changes: dict[int, dict] = {}
+        for channel, fields in settings.items():
+            if isinstance(channel, bool) or not isinstance(channel, int) or channel < 1:
+                raise ValueError(f"Invalid AO channel: {channel!r}.")
+            for name, value in fields.items():
+                field = self.AO_FIELDS.get(str(name).lower())
+                if field is None:
+                    raise ValueError(f"Invalid AO field: {name}. Allowed values are: {', '.join(self.AO_FIELDS)}")
+                if field == "Function":
+                    if value not in self.AO_FUNCTIONS:
+                        raise ValueError(f"Invalid value: {value}. Allowed values are: {', '.join(self.AO_FUNCTIONS)}")
+                else:
+                    try:
+                        value = float(value)
+                    except (TypeError, ValueError):
+                        raise ValueError(f"Invalid AO{channel} {name}: {value!r} is not a number.") from None
+                    if not np.isfinite(value):
+                        raise ValueError(f"Invalid AO{channel} {name}: {value}.")
+                changes.setdefault(channel, {})[field] = value
+
+        outer = self._batch
+        if outer is not None:
+            # getAO would be queued with the caller's batch, so read the
+            # AO state outside of it.
+            self._batch = None
+            try:
+                state = self.ao_state(refresh)
+            finally:
+                self._batch = outer
+        else:
+            state = self.ao_state(refresh)
+        unknown = [ch for ch in changes if ch not in state]
+        if unknown:
+            raise ValueError(f"Invalid AO channel(s): {unknown}. Available: {sorted(state)}")
+        changes = {
+            ch: {f: v for f, v in fields.items() if state[ch].get(f) != v}
+            for ch, fields in changes.items()
+        }
+        changes = {ch: fields for ch, fields in changes.items() if fields}
+        if not changes:
+            return changes
+
+        # Written fields stay unknown until their reply confirms them, so a
+        # batch that fails or is never sent does not leave stale values.
+        for ch, fields in changes.items():
+            for field in fields:
+                state[ch].pop(field, None)
+        # Queued with Batch.call, which unlike the setters does not discard
+        # the AO state we are about to update.
+        try:
+            with self.batch() as b:
+                for ch, fields in changes.items():
+                    for field, value in fields.items():
+                        result = b.call(f'setAO_{field}', {'Channel': ch, field: value})
+                        result.add_done_callback(partial(self._ao_written, state, ch, field, value))
+        except Exception:
+            # Some writes may have been applied before the failure.
+            self._ao_state = {}
+            raise
+        finally:
+            self.invalidate_state()
+        return changes
+
+    def _ao_written(self, state: dict[int, dict], channel: int, field: str, value, result) -> None:
+        """Record a confirmed ``configure_ao`` write in ``state``."""
+        if result.cancelled():
+            return
+        error = result.exception()
+        if error is None and 'error' in result.result():
+            error = result['error']
+        if error is not None:
+            self.logger.error(f"setAO_{field} on AO{channel} failed: {error}")
+        else:
+            state[channel][field] = value
+
+    def start_stream(self, keys: Union[str, Sequence[str]], rate: float = 10.0, capacity: int = 100_000) -> ResultStream:
+        """
+        Poll lock-in results in the background into a ring buffer.
+
+        Parameters
+        ----------
+        keys : str or sequence of str
+            Result keys, or one glob pattern, as for ``get_lockin_results``.
+            A pattern is resolved once, when the stream starts.
+
+        rate : float, optional
+            Samples per second. Default 10.
+
+        capacity : int, optional
+            Samples kept in the buffer. Default 100000.
+
+        Returns
+        -------
+        ResultStream
+            ``snapshot()``, ``drain()`` and ``stop()`` of the running stream.
+        """
+        if rate <= 0:
+            raise ValueError(f"Invalid rate: {rate}. Must be positive.")
+        if capacity < 1:
+            raise ValueError(f"Invalid capacity: {capacity}. Must be at least 1.")
+        if isinstance(keys, str):
+            keys = list(self.get_lockin_results(keys))
+        return ResultStream(self, list(keys), rate, capacity)
+
+    def lockin_sweep(self, sweep_config: dict, timeout=10) -> None:
+        self.start_sweep(sweep_config).wait(timeout)
+
+    def set_dc_vector(self, targets: dict[int, float], sweep_rate: float, initial_wait: float = 1, tol: float = 1e-3) -> None:
+        """
+        Sweep the DC voltage of several AO channels to their targets in one sweep.
+
+        All AO channels are read with a single getAO call. Channels already
+        within ``tol`` of their target are left out; the others are ramped
+        together over a common duration set by the largest step.
+
+        Parameters
+        ----------
+        targets : dict
+            Target DC voltage in volts (V) per AO channel, e.g. {1: 2.0, 3: -0.5}.
 
         sweep_rate : float
-            Sweep rate in seconds per volt (s/V).
+            Sweep rate in seconds per volt (s/V) of the largest step.
 
         initial_wait : float, optional
             Delay before starting the sweep in seconds. Default is 1 s.
 
         tol : float, optional
             Voltage tolerance in volts used to determine whether
-            the gate is already at the target voltage.
+            a channel is already at its target voltage.
             Default is 1e-3 V.
         """
-                
-        current_bg = self.getAO(bg_channel)[bg_channel-1]['Y'][0]
+        if not targets:
+            return
+        ao = self.getAO(next(iter(targets)))
+        steps = {}
+        for channel, target in targets.items():
+            current = ao[channel-1]['Y'][0]
+            if abs(target - current) < tol:
+                print(f"AO{channel} already at {target:.2f} V. Target is within tolerance.")
+            else:
+                steps[channel] = (current, target)
 
-        # Skip sweep if already at target
-        if abs(bg_target - current_bg) < tol:
-            print(f"Backgate already at {bg_target:.2f} V. Target is within tolerance.")
+        # Skip sweep if every channel is already at its target
+        if not steps:
             return
 
-        duration = abs(bg_target - current_bg) * sweep_rate
+        duration = max(abs(end - start) for start, end in steps.values()) * sweep_rate
 
-        print(f"Sweeping backgate from {current_bg:.2f} to {bg_target:.2f} V...")
+        print("Sweeping " + ", ".join(f"AO{ch} from {start:.2f} to {end:.2f} V" for ch, (start, end) in steps.items()) + "...")
 
         sweep_config = {
             "Sweep Time (s)": duration,
@@ -187,17 +811,43 @@ class Lockin(Instrument, DAQ):
             "Channels": [
                 {
                     "Enable?": True,
-                    "Channel": bg_channel,
-                    "Start": current_bg,
-                    "End": bg_target,
+                    "Channel": channel,
+                    "Start": start,
+                    "End": end,
                     "Pattern": "Ramp /",
                     "Table": []
-                },
+                }
+                for channel, (start, end) in steps.items()
             ]
         }
 
         self.lockin_sweep(sweep_config)
 
+    def set_backgate(self, bg_channel:int, bg_target:float, sweep_rate:float, initial_wait:float = 1, tol:float = 1e-3):
+        """
+        Sweep the backgate voltage to a target value.
+
+        Parameters
+        ----------
+        bg_channel : int
+            Analog output channel used for the backgate.
+
+        bg_target : float
+            Target backgate voltage in volts (V).
+
+        sweep_rate : float
+            Sweep rate in seconds per volt (s/V).
+
+        initial_wait : float, optional
+            Delay before starting the sweep in seconds. Default is 1 s.
+
+        tol : float, optional
+            Voltage tolerance in volts used to determine whether
+            the gate is already at the target voltage.
+            Default is 1e-3 V.
+        """
+        self.set_dc_vector({bg_channel: bg_target}, sweep_rate, initial_wait, tol)
+
 if __name__ == "__main__":
     # Test the MCLockin class
     lockin = Lockin("tcp://localhost:29170",)
@@ -6,18 +6,18 @@ import os
 _DEFAULT_ADDRESS = "tcp://localhost:29174"
 _LABVIEW_CLASS_NAME = "instrument.OptiCool.lvclass"
 
-logpath = os.path.join(os.environ.get("LOCALAPPDATA"), "Levylab", "FLEX", "logs")
+logpath = os.path.join(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")), "Levylab", "FLEX", "logs")
 os.makedirs(logpath, exist_ok=True)
 
 
 class Opticool(Instrument, Temperature, Magnet):
     """Opticool driver with Temperature and Magnet capabilities."""
 
-    def __init__(self, address: str = _DEFAULT_ADDRESS):
-        super().__init__(address, log_file=os.path.join(logpath, "Opticool.log"))
+    def __init__(self, address: str = _DEFAULT_ADDRESS, **kwargs):
+        super().__init__(address, log_file=os.path.join(logpath, "Opticool.log"), **kwargs)
 
-    def getTemperature(self, channel = 0):
-        return super().getTemperature(channel)
+    def getTemperature(self, channel = 0, max_age = None):
+        return super().getTemperature(channel, max_age)
     
     def setTemperature(self, temperature, rate, channel = 0):
         return super().setTemperature(temperature, rate, channel)
@@ -25,8 +25,8 @@ class Opticool(Instrument, Temperature, Magnet):
     def getTemperatureTarget(self, channel = 0):
         return super().getTemperatureTarget(channel)
     
-    def getMagnet(self):
-        return super().getMagnet()
+    def getMagnet(self, max_age = None):
+        return super().getMagnet(max_age)
     
     def setMagnet(self, field, rate, axis = "Z", mode = "Persistent"):
         return super().setMagnet(field, rate, axis, mode)
@@ -36,7 +36,7 @@ class Opticool(Instrument, Temperature, Magnet):
 
     # Level type not defined yet
     def get_LHe_level(self) -> float:
-        return self._send_command("getLHeLevel")["result"]
+        return self._query("getLHeLevel")
     
 if __name__ == '__main__':
     opticool = Opticool()
@@ -17,7 +17,7 @@ _DEFAULT_ADDRESS_MAGNET = 'tcp://localhost:21213'
 _LABVIEW_CLASS_NAME = "Instrument.OxfordVRM.lvclass"
 
 # Path to the log file
-logpath = os.path.join(os.environ.get('LOCALAPPDATA'), 'Levylab', 'FLEX', 'logs')
+logpath = os.path.join(os.environ.get('LOCALAPPDATA', os.path.expanduser('~')), 'Levylab', 'FLEX', 'logs')
 os.makedirs(logpath, exist_ok=True)
 
 
@@ -26,11 +26,11 @@ class OxfordVRM(Instrument, Magnet):
     Internal: Oxford VRM Magnet subsystem.
     Not intended for direct use - use MNK class instead.
     '''
-    def __init__(self, address=_DEFAULT_ADDRESS_MAGNET):
-        super().__init__(address, log_file=os.path.join(logpath, "OxfordVRM.log"))
+    def __init__(self, address=_DEFAULT_ADDRESS_MAGNET, **kwargs):
+        super().__init__(address, log_file=os.path.join(logpath, "OxfordVRM.log"), **kwargs)
 
-    def getMagnet(self):
-        return super().getMagnet()
+    def getMagnet(self, max_age = None):
+        return super().getMagnet(max_age)
     
     def setMagnet(self, field, rate, axis = "Z", mode = "Persistent"):
         return super().setMagnet(field, rate, axis, mode)
@@ -17,7 +17,7 @@ _DEFAULT_ADDRESS_TEMP = 'tcp://localhost:10025'
 _LABVIEW_CLASS_NAME = "Inst.TC.CF.lvclass"
 
 # Path to the log file
-logpath = os.path.join(os.environ.get('LOCALAPPDATA'), 'Levylab', 'FLEX', 'logs')
+logpath = os.path.join(os.environ.get('LOCALAPPDATA', os.path.expanduser('~')), 'Levylab', 'FLEX', 'logs')
 os.makedirs(logpath, exist_ok=True)
 
 class TC_CF(Instrument, Temperature):
@@ -25,8 +25,8 @@ class TC_CF(Instrument, Temperature):
     Internal: Leiden Temperature subsystem.
     Not intended for direct use - use MNK class instead.
     '''
-    def __init__(self, address=_DEFAULT_ADDRESS_TEMP):
-        super().__init__(address, log_file=os.path.join(logpath, "TC_CF.log"))
+    def __init__(self, address=_DEFAULT_ADDRESS_TEMP, **kwargs):
+        super().__init__(address, log_file=os.path.join(logpath, "TC_CF.log"), **kwargs)
     
     def setTemperature(self, *args, **kwargs):
             """Override to disable control for this specific hardware."""
@@ -35,17 +35,19 @@ class TC_CF(Instrument, Temperature):
                 "Manual gas handling is required to change base temperature."
             )
     
-    def getTemperature(self, channel):
+    def getTemperature(self, channel, max_age=None):
         cmd = 'getTemperature'
         params = [channel]
-        response = self._send_command(cmd, params)
-        return response['result']
+        if max_age is not None:
+            return self._cached_query(cmd, params, max_age)
+        return self._query(cmd, params)
     
-    def getHeater(self, channel):
+    def getHeater(self, channel, max_age=None):
         cmd = 'getHeater'
         params = [channel]
-        response = self._send_command(cmd, params)
-        return response['result']
+        if max_age is not None:
+            return self._cached_query(cmd, params, max_age)
+        return self._query(cmd, params)
     
 if __name__ == "__main__":
     # Test the Oxford MNK Instrument Class
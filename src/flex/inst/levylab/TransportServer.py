@@ -17,12 +17,12 @@ from typing import Literal, Union
 
 _DEFAULT_ADDRESS = 'tcp://localhost:15260'
 
-logpath = os.path.join(os.environ.get('LOCALAPPDATA'), 'Levylab', 'FLEX', 'logs')
+logpath = os.path.join(os.environ.get('LOCALAPPDATA', os.path.expanduser('~')), 'Levylab', 'FLEX', 'logs')
 os.makedirs(logpath, exist_ok=True)
 
 class Transport(Instrument):
-    def __init__(self, address=_DEFAULT_ADDRESS):
-        super().__init__(address, log_file=os.path.join(logpath, "TransportServer.log"))
+    def __init__(self, address=_DEFAULT_ADDRESS, **kwargs):
+        super().__init__(address, log_file=os.path.join(logpath, "TransportServer.log"), **kwargs)
           
     def startTransport(self, VI: Literal['LockinTime', 'LockinSweep', 'LockinTimeDelay']) -> dict:
         allowed_values = {"LockinSweep", "LockinTime", "LockinTimeDelay"}
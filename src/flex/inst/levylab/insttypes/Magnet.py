@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Optional
 
 class Magnet:
     """Standard Magnet capability for Levylab IF Instruments."""
@@ -8,7 +9,7 @@ class Magnet:
         """
         Default ZMQ command to set magnetic field.
         """
-        self._send_command("setMagnet", {
+        return self._send_command("setMagnet", {
             "field": float(field),
             "rate": float(rate),
             "axis": axis,
@@ -16,15 +17,19 @@ class Magnet:
         })
 
     @abstractmethod
-    def getMagnet(self) -> float:
+    def getMagnet(self, max_age: Optional[float] = None) -> float:
         """
         Default ZMQ command to get magnetic field.
+        With ``max_age`` (seconds), a reading at most that old is reused and a
+        Reading(value, timestamp) is returned. Setters invalidate the cache.
         """
-        return self._send_command("getMagnet")["result"]
+        if max_age is not None:
+            return self._cached_query("getMagnet", max_age=max_age)
+        return self._query("getMagnet")
 
     def getMagnetTarget(self) -> float:
         """
         Default ZMQ command to get magnetic field.
         Override in child if instrument uses different RPC commands.
         """
-        return self._send_command("getMagnetTarget", ['Z'])["result"]
+        return self._query("getMagnetTarget", ['Z'])
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Optional
 
 class Temperature(ABC):
     """Standard Temperature capability for Levylab IF Instruments."""
@@ -8,21 +9,25 @@ class Temperature(ABC):
         """
         Default ZMQ command to set temperature.
         """
-        self._send_command("setTemperature", {
+        return self._send_command("setTemperature", {
             "temperature": float(temperature),
             "rate": float(rate),
             "channel": int(channel)
         })
 
     @abstractmethod
-    def getTemperature(self, channel: int = 0) -> dict:
+    def getTemperature(self, channel: int = 0, max_age: Optional[float] = None) -> dict:
         """
         Default ZMQ command to get temperature.
+        With ``max_age`` (seconds), a reading at most that old is reused and a
+        Reading(value, timestamp) is returned. Setters invalidate the cache.
         """
-        return self._send_command("getTemperature", [channel])["result"]
+        if max_age is not None:
+            return self._cached_query("getTemperature", [channel], max_age)
+        return self._query("getTemperature", [channel])
     
     def getTemperatureTarget(self, channel: int = 0) -> dict:
         """
         Default ZMQ command to get temperature target.
         """
-        return self._send_command("getTemperatureTarget", [channel])["result"]
+        return self._query("getTemperatureTarget", [channel])
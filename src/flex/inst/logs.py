@@ -0,0 +1,169 @@
+'''
+Logging setup for Levylab FLEX instruments.
+
+Each driver logs to its own file under %LOCALAPPDATA%\\Levylab\\FLEX\\logs.
+attach_file() adds that file's handler to a logger only once, however many
+times the driver is re-created. Payloads on the command hot path are logged
+through truncated(), which formats lazily and truncates to ``payload_limit``
+characters. configure(queue=True) moves file I/O to a background thread:
+
+    from flex.inst import logs
+    logs.configure(payload_limit=256, queue=True)
+'''
+
+import atexit
+import logging
+import os
+import queue
+import reprlib
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_lock = threading.Lock()
+_file_handlers: dict[str, logging.FileHandler] = {}
+_payload_limit = 1024
+_level = logging.DEBUG
+_queue: Optional[queue.SimpleQueue] = None
+_listener: Optional[QueueListener] = None
+
+
+class _Truncated:
+    """Deferred, truncated rendering of a request or reply for log records."""
+
+    __slots__ = ("obj",)
+
+    _repr = reprlib.Repr()
+    _repr.maxlevel = 4
+    _repr.maxlist = _repr.maxtuple = 16
+    _repr.maxdict = 32
+
+    def __init__(self, obj: Any):
+        self.obj = obj
+
+    def __str__(self) -> str:
+        limit = _payload_limit
+        obj = self.obj
+        if isinstance(obj, (bytes, bytearray, memoryview)):
+            text = bytes(obj[:limit + 1]).decode("utf-8", "replace")
+        elif isinstance(obj, str):
+            text = obj[:limit + 1]
+        else:
+            self._repr.maxstring = self._repr.maxother = max(limit, 16)
+            text = self._repr.repr(obj)
+        if len(text) > limit:
+            text = f"{text[:limit]}... [truncated]"
+        return text
+
+
+def truncated(obj: Any) -> _Truncated:
+    """Wrap ``obj`` for use as a %-style logging argument."""
+    return _Truncated(obj)
+
+
+class _FileQueueHandler(QueueHandler):
+    """QueueHandler that remembers which log file a record is bound for."""
+
+    def __init__(self, q: queue.SimpleQueue, path: str):
+        super().__init__(q)
+        self.flex_log_file = path
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)
+        record.flex_log_file = self.flex_log_file
+        return record
+
+
+class _FileRouter(logging.Handler):
+    """Hands queued records to the FileHandler of their log file."""
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        _file_handler(record.flex_log_file).handle(record)
+        return True
+
+
+def _file_handler(path: str) -> logging.FileHandler:
+    handler = _file_handlers.get(path)
+    if handler is None:
+        handler = logging.FileHandler(path)
+        handler.setFormatter(logging.Formatter(_FORMAT))
+        _file_handlers[path] = handler
+    return handler
+
+
+def _make_handler(path: str) -> logging.Handler:
+    if _queue is not None:
+        handler = _FileQueueHandler(_queue, path)
+    else:
+        handler = _file_handler(path)
+    handler.flex_log_file = path
+    return handler
+
+
+def attach_file(logger: logging.Logger, log_file: str) -> None:
+    """Log ``logger`` to ``log_file``, adding the handler only the first time."""
+    path = os.path.abspath(log_file)
+    with _lock:
+        if not any(getattr(h, "flex_log_file", None) == path for h in logger.handlers):
+            logger.addHandler(_make_handler(path))
+        logger.setLevel(_level)
+
+
+def configure(payload_limit: Optional[int] = None, queue: Optional[bool] = None, level: Optional[int] = None) -> None:
+    """
+    Adjust instrument logging for the whole process.
+
+    Args:
+        payload_limit: Maximum characters of a request or reply written to
+            the log. Default 1024.
+        queue: True to write log files from a background thread through a
+            QueueHandler, False to write them from the calling thread.
+        level: Level of loggers with a log file. Default logging.DEBUG.
+    """
+    global _payload_limit, _level
+    if payload_limit is not None:
+        _payload_limit = payload_limit
+    if queue is not None:
+        _set_queue(queue)
+    if level is not None:
+        with _lock:
+            _level = level
+            for logger in _file_loggers():
+                logger.setLevel(level)
+
+
+def _file_loggers() -> list[logging.Logger]:
+    loggers = logging.Logger.manager.loggerDict.values()
+    return [
+        logger for logger in loggers
+        if isinstance(logger, logging.Logger)
+        and any(hasattr(h, "flex_log_file") for h in logger.handlers)
+    ]
+
+
+def _set_queue(enabled: bool) -> None:
+    global _queue, _listener
+    with _lock:
+        if enabled == (_queue is not None):
+            return
+        if enabled:
+            _queue = queue.SimpleQueue()
+            _listener = QueueListener(_queue, _FileRouter())
+            _listener.start()
+        else:
+            _listener.stop()
+            _queue = _listener = None
+        # Swap the handlers of loggers already writing to a file.
+        for logger in _file_loggers():
+            for old in [h for h in logger.handlers if hasattr(h, "flex_log_file")]:
+                logger.removeHandler(old)
+                logger.addHandler(_make_handler(old.flex_log_file))
+
+
+@atexit.register
+def _flush() -> None:
+    # Drain the queue so the last records reach the files.
+    if _listener is not None:
+        _listener.stop()
@@ -0,0 +1,118 @@
+'''
+TTL cache for static instrument metadata (IDN, HELP, capabilities).
+
+Entries are keyed by instrument address and expire after ``ttl`` seconds.
+The cache lives in memory and can optionally be persisted to
+    %LOCALAPPDATA%\\Levylab\\FLEX\\cache\\metadata.json
+so that introspection on startup needs no round-trips after the first run:
+
+    from flex.inst import metadata
+    metadata.configure(ttl=24 * 3600, persist=True)
+'''
+
+import json
+import os
+import threading
+import time
+from typing import Any, Optional
+
+_DEFAULT_PATH = os.path.join(
+    os.environ.get("LOCALAPPDATA", os.path.expanduser("~")),
+    "Levylab", "FLEX", "cache", "metadata.json",
+)
+
+MISSING = object()
+
+
+class MetadataCache:
+    """
+    Per-address metadata cache with TTL and explicit invalidation.
+
+    Args:
+        ttl: Seconds an entry stays valid. Default 1 hour.
+        path: JSON file to persist entries to, or None to keep them in memory.
+    """
+
+    def __init__(self, ttl: float = 3600.0, path: Optional[str] = None):
+        self.ttl = ttl
+        self.path = path
+        self._entries: dict[str, dict[str, tuple[float, Any]]] = {}
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    def get(self, address: str, key: str) -> Any:
+        """Return the cached value, or MISSING if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(address, {}).get(key)
+        if entry is None or time.time() - entry[0] > self.ttl:
+            return MISSING
+        return entry[1]
+
+    def set(self, address: str, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries.setdefault(address, {})[key] = (time.time(), value)
+        if self.path:
+            self.save()
+
+    def invalidate(self, address: Optional[str] = None, key: Optional[str] = None) -> None:
+        """Drop one key, every key of an address, or (no arguments) everything."""
+        with self._lock:
+            if address is None:
+                self._entries.clear()
+            elif key is None:
+                self._entries.pop(address, None)
+            else:
+                self._entries.get(address, {}).pop(key, None)
+        if self.path:
+            self.save()
+
+    def load(self) -> None:
+        """Read entries from ``path``; a missing or corrupt file is ignored."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            for address, entries in raw.items():
+                for key, (stamp, value) in entries.items():
+                    self._entries.setdefault(address, {})[key] = (stamp, value)
+
+    def save(self) -> None:
+        """Write all entries to ``path`` (atomically, via a temporary file)."""
+        with self._lock:
+            raw = {address: {key: list(entry) for key, entry in entries.items()}
+                   for address, entries in self._entries.items()}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(raw, f)
+        os.replace(tmp, self.path)
+
+
+_CACHE = MetadataCache()
+
+
+def get_metadata_cache() -> MetadataCache:
+    """Return the process-wide metadata cache."""
+    return _CACHE
+
+
+def configure(ttl: Optional[float] = None, persist: Optional[bool] = None, path: Optional[str] = None) -> MetadataCache:
+    """
+    Adjust the process-wide metadata cache.
+
+    Args:
+        ttl: New entry lifetime in seconds.
+        persist: True to persist to ``path`` (default under the FLEX app
+            directory) and load existing entries; False to keep memory only.
+        path: File to persist to.
+    """
+    if ttl is not None:
+        _CACHE.ttl = ttl
+    if persist is not None:
+        _CACHE.path = (path or _DEFAULT_PATH) if persist else None
+        if _CACHE.path:
+            _CACHE.load()
+    return _CACHE
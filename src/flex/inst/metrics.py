@@ -0,0 +1,167 @@
+'''
+Per-command latency and throughput metrics for Levylab FLEX instruments.
+
+Every Instrument records, per JSON-RPC method, the number of calls and
+timeouts, bytes sent and received, and a latency histogram. Latencies are
+counted in fixed log-spaced buckets (20 per decade from 10 us to 100 s), so
+recording is a bisect and a few additions, and p50/p95/p99 are accurate
+to about 12 %.
+
+    lockin.stats()["getResults"]["p95_ms"]
+    session.stats()["total"]
+
+dump_periodically() appends snapshots of any stats() callable to a JSON
+lines file from a background thread.
+'''
+
+import bisect
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+_EDGES = [10 ** (k / 20) * 1e-5 for k in range(0, 141)]  # seconds, 10 us .. 100 s
+
+
+class _MethodStats:
+    __slots__ = ("count", "errors", "bytes_sent", "bytes_received", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(_EDGES) + 1)
+
+    def merge(self, other: "_MethodStats") -> None:
+        self.count += other.count
+        self.errors += other.errors
+        self.bytes_sent += other.bytes_sent
+        self.bytes_received += other.bytes_received
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def percentile(self, q: float) -> float:
+        """Upper edge (seconds) of the bucket holding the ``q``-th percentile."""
+        calls = sum(self.buckets)
+        if not calls:
+            return 0.0
+        rank = q / 100 * calls
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(_EDGES[i] if i < len(_EDGES) else self.max, self.max)
+        return self.max
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "mean_ms": self.total / self.count * 1e3 if self.count else 0.0,
+            "p50_ms": self.percentile(50) * 1e3,
+            "p95_ms": self.percentile(95) * 1e3,
+            "p99_ms": self.percentile(99) * 1e3,
+            "max_ms": self.max * 1e3,
+        }
+
+
+class CommandMetrics:
+    """Thread-safe per-method counters and latency histograms."""
+
+    def __init__(self):
+        self._methods: dict[str, _MethodStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, method: Optional[str], seconds: float, sent: int = 0, received: int = 0, error: bool = False) -> None:
+        """Record one round-trip of ``method`` that took ``seconds``."""
+        key = method or "raw"
+        with self._lock:
+            stats = self._methods.get(key)
+            if stats is None:
+                stats = self._methods[key] = _MethodStats()
+            stats.count += 1
+            stats.bytes_sent += sent
+            stats.bytes_received += received
+            if error:
+                stats.errors += 1
+            stats.total += seconds
+            if seconds > stats.max:
+                stats.max = seconds
+            stats.buckets[bisect.bisect_left(_EDGES, seconds)] += 1
+
+    def merged(self) -> _MethodStats:
+        """All methods combined."""
+        total = _MethodStats()
+        with self._lock:
+            for stats in self._methods.values():
+                total.merge(stats)
+        return total
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """Summary per method, see ``Instrument.stats()``."""
+        with self._lock:
+            return {method: stats.summary() for method, stats in sorted(self._methods.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._methods.clear()
+
+
+def merge(metrics: list[CommandMetrics]) -> dict[str, Any]:
+    """Summary of several instruments' metrics combined into one."""
+    total = _MethodStats()
+    for m in metrics:
+        total.merge(m.merged())
+    return total.summary()
+
+
+class StatsDump:
+    """Background thread appending ``source()`` to a JSON lines file."""
+
+    def __init__(self, source: Callable[[], dict], path: str, interval: float = 60.0):
+        self.source = source
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="flex-stats-dump", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def write(self) -> None:
+        """Append one snapshot now."""
+        record = {"time": time.time(), "stats": self.source()}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def stop(self) -> None:
+        """Write a final snapshot and stop the thread."""
+        if not self._stop.is_set():
+            self._stop.set()
+            self._thread.join()
+            self.write()
+
+
+def dump_periodically(source: Callable[[], dict], path: str, interval: float = 60.0) -> StatsDump:
+    """
+    Append ``source()`` to ``path`` every ``interval`` seconds.
+
+    Args:
+        source: Callable returning a JSON-serializable dict, e.g. ``inst.stats``.
+        path: JSON lines file to append to.
+        interval: Seconds between snapshots.
+
+    Returns:
+        StatsDump: Call its ``stop()`` to end dumping.
+    """
+    return StatsDump(source, path, interval)
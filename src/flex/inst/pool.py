@@ -0,0 +1,93 @@
+'''
+Process-wide ZMQ context and REQ socket pool for Levylab FLEX instruments.
+
+Every Instrument shares one ZMQ context (one set of I/O threads) and hands
+its REQ socket back to the pool on close(). Re-creating a driver for the
+same address then picks up the connected, already-ACKed socket instead of
+opening a new TCP connection. Idle sockets are closed when they exceed
+the pool's TTL, or least-recently-used first when more than ``max_idle``
+are kept.
+'''
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import zmq
+
+
+def shared_context() -> zmq.Context:
+    """Return the process-wide ZMQ context used by all instruments."""
+    return zmq.Context.instance()
+
+
+class ConnectionPool:
+    """
+    Keyed pool of idle, healthy REQ sockets.
+
+    Args:
+        max_idle: Maximum number of idle sockets kept across all addresses.
+        ttl: Seconds an idle socket may wait for reuse before it is closed.
+    """
+
+    def __init__(self, max_idle: int = 16, ttl: float = 300.0):
+        self.max_idle = max_idle
+        self.ttl = ttl
+        self._idle: OrderedDict[int, tuple[str, zmq.Socket, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._idle)
+
+    def acquire(self, address: str) -> Optional[zmq.Socket]:
+        """Take the most recently released idle socket for ``address``, if any."""
+        with self._lock:
+            self._expire()
+            for key in reversed(self._idle):
+                if self._idle[key][0] == address:
+                    return self._idle.pop(key)[1]
+        return None
+
+    def release(self, address: str, socket: zmq.Socket, healthy: bool = True) -> None:
+        """
+        Return ``socket`` to the pool.
+
+        Sockets that are not ``healthy`` (e.g. a REQ socket still waiting
+        for a reply) are closed instead of being pooled.
+        """
+        if not healthy or self.max_idle <= 0:
+            socket.close(linger=0)
+            return
+        with self._lock:
+            self._idle[id(socket)] = (address, socket, time.monotonic())
+            self._expire()
+            while len(self._idle) > self.max_idle:
+                _, (_, oldest, _) = self._idle.popitem(last=False)
+                oldest.close(linger=0)
+
+    def clear(self) -> None:
+        """Close every idle socket."""
+        with self._lock:
+            idle, self._idle = self._idle, OrderedDict()
+        for _, socket, _ in idle.values():
+            socket.close(linger=0)
+
+    def _expire(self) -> None:
+        deadline = time.monotonic() - self.ttl
+        while self._idle:
+            key = next(iter(self._idle))
+            _, socket, released = self._idle[key]
+            if released > deadline:
+                break
+            del self._idle[key]
+            socket.close(linger=0)
+
+
+_POOL = ConnectionPool()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide connection pool."""
+    return _POOL
@@ -0,0 +1,119 @@
+'''
+Recording of instrument traffic to append-only JSON-lines files.
+
+``Instrument(..., record=path)`` appends one line per round-trip:
+
+    {"t": 1718000000.123, "dt": 0.0021, "address": "tcp://localhost:29170",
+     "request": {...}, "response": {...}}
+
+``t`` is the wall-clock time the request was sent and ``dt`` the
+round-trip time in seconds. NumPy arrays in responses (binary waveform
+frames) are stored as base64 with their dtype and shape. Several
+instruments may record to the same file. flex.inst.replay serves the
+recorded responses again.
+'''
+
+import base64
+import os
+import threading
+from pathlib import Path
+from typing import Any, Iterator, Union
+
+import numpy as np
+
+from flex.inst.codec import default_codec
+
+
+def _pack(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        return {
+            "$array": base64.b64encode(np.ascontiguousarray(obj).tobytes()).decode("ascii"),
+            "dtype": obj.dtype.str,
+            "shape": list(obj.shape),
+        }
+    if isinstance(obj, dict):
+        return {key: _pack(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [_pack(value) for value in obj]
+    return obj
+
+
+def _unpack(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        if "$array" in obj:
+            array = np.frombuffer(base64.b64decode(obj["$array"]), dtype=np.dtype(obj["dtype"]))
+            return array.reshape(obj["shape"])
+        return {key: _unpack(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [_unpack(value) for value in obj]
+    return obj
+
+
+class Recorder:
+    """
+    Appends round-trips to a JSON-lines file.
+
+    Args:
+        path: File to append to. Parent directories are created.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._codec = default_codec()
+        self._lock = threading.Lock()
+        self._file = open(self.path, "ab")
+
+    def write(self, address: str, request: Any, response: Any, started: float, elapsed: float, codec=None) -> None:
+        """
+        Append one round-trip.
+
+        Args:
+            address: Address of the instrument.
+            request: The request object, or its encoded bytes.
+            response: The decoded response.
+            started: Wall-clock time the request was sent.
+            elapsed: Round-trip time in seconds.
+            codec: Codec that encoded ``request`` if it is bytes. Default JSON.
+        """
+        if isinstance(request, (bytes, str)):
+            request = (codec or self._codec).decode(request)
+        line = self._codec.encode({
+            "t": round(started, 6),
+            "dt": round(elapsed, 6),
+            "address": address,
+            "request": request,
+            "response": _pack(response),
+        })
+        with self._lock:
+            self._file.write(line + b"\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+_RECORDERS: dict[Path, Recorder] = {}
+_RECORDERS_LOCK = threading.Lock()
+
+
+def get_recorder(path: Union[str, os.PathLike]) -> Recorder:
+    """Return the process-wide recorder of ``path``, shared by every instrument recording to it."""
+    key = Path(path).resolve()
+    with _RECORDERS_LOCK:
+        recorder = _RECORDERS.get(key)
+        if recorder is None:
+            recorder = _RECORDERS[key] = Recorder(key)
+        return recorder
+
+
+def read_recording(path: Union[str, os.PathLike]) -> Iterator[dict]:
+    """Yield the recorded round-trips of ``path`` in order, with arrays restored."""
+    codec = default_codec()
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                entry = codec.decode(line)
+                entry["response"] = _unpack(entry["response"])
+                yield entry
@@ -0,0 +1,201 @@
+'''
+Replay of recorded instrument sessions.
+
+ReplayInstrument answers commands from a file written with
+``Instrument(..., record=path)`` instead of a server, so analysis code
+can be profiled against production traffic without the instruments:
+
+    from flex.inst.replay import replay
+    from flex.inst.levylab.Lockin import Lockin
+
+    lockin = replay(Lockin)(recording="lockin.jsonl", time_scale=0)
+    lockin.getResults()            # recorded reply, no network
+    lockin.stats()                 # client-side time per method
+    lockin.recorded_stats()        # round-trip times of the recording
+
+With ``time_scale=1`` every reply takes as long as it did when recorded;
+the difference between the two stats is the protocol and server time.
+'''
+
+import json
+import os
+import time
+from collections import defaultdict, deque
+from typing import Any, Optional, Union
+
+from flex.inst.base import Instrument
+from flex.inst.metrics import CommandMetrics
+from flex.inst.pool import shared_context
+from flex.inst.record import read_recording
+
+
+def _key(request: Any) -> str:
+    if isinstance(request, list):
+        return json.dumps([[r.get("method"), r.get("params", {})] for r in request], sort_keys=True, default=str)
+    return json.dumps([request.get("method"), request.get("params", {})], sort_keys=True, default=str)
+
+
+def _method(request: Any) -> str:
+    if isinstance(request, list):
+        return f"batch({len(request)})"
+    return request.get("method")
+
+
+def _methods(request: Any) -> tuple:
+    if isinstance(request, list):
+        return tuple(r.get("method") for r in request)
+    return (request.get("method"),)
+
+
+def _with_ids(response: Any, recorded: Any, request: Any) -> Any:
+    """Copy of a ``response`` to the ``recorded`` request answering the ids of ``request``."""
+    if isinstance(response, list) and isinstance(request, list):
+        ids = {old.get("id"): new.get("id") for old, new in zip(recorded, request)}
+        return [{**r, "id": ids.get(r.get("id"), r.get("id"))} if isinstance(r, dict) else r for r in response]
+    if isinstance(response, dict) and isinstance(request, dict):
+        return {**response, "id": request.get("id")}
+    return response
+
+
+class ReplayInstrument(Instrument):
+    """
+    Instrument serving the responses of a recording instead of a server.
+
+    Only round-trips recorded for this instrument's address are served,
+    unless the recording holds no entry for it (then all are). No socket
+    is opened and the metadata cache is off, so every command, including
+    IDN and HELP, is answered from the recording. Recordings are usually
+    made with the metadata cache on and hold a single IDN or HELP reply,
+    so those are served again however often they are asked for.
+
+    Args:
+        recording: JSON-lines file written with ``Instrument(record=...)``.
+        match: "order" serves the recorded round-trips one after another,
+            checking only that the method names agree, so params may
+            differ from the recording. Recorded ACK handshakes and IDN or
+            HELP calls the replayed code does not repeat are skipped.
+            Code that polls until a deadline (SweepHandle) may poll a
+            different number of times than when recorded; replay it with
+            "key".
+            "key" serves the response recorded for the same method and
+            params; repeated commands get the recorded responses in turn,
+            then the last one again.
+        time_scale: Factor applied to the recorded round-trip times. 1
+            replays with real timing, 0.1 ten times faster, 0 (default)
+            without delay.
+        *args, **kwargs: Passed to Instrument (or the driver).
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        recording: Union[str, os.PathLike],
+        match: str = "order",
+        time_scale: float = 0.0,
+        **kwargs: Any,
+    ):
+        if match not in ("order", "key"):
+            raise ValueError(f"Invalid match: {match}. Allowed values are: order, key")
+        self.match = match
+        self.time_scale = time_scale
+        self._recording = recording
+        self._entries: list[dict] = []
+        self._position = 0
+        kwargs.setdefault("metadata_cache", False)
+        kwargs["transport"] = "req"
+        kwargs["pool"] = False
+        super().__init__(*args, **kwargs)
+
+    def _connect(self) -> None:
+        self.context = shared_context()
+        self._load()
+
+    def _load(self) -> None:
+        entries = list(read_recording(self._recording))
+        own = [e for e in entries if e.get("address") == self._address]
+        entries = own or entries
+        self._recorded = CommandMetrics()
+        for entry in entries:
+            self._recorded.record(_method(entry["request"]), entry["dt"])
+        self._entries = entries
+        self._position = 0
+        self._by_key: dict[str, deque] = defaultdict(deque)
+        for entry in entries:
+            self._by_key[_key(entry["request"])].append(entry)
+        if self._batch_supported is None:
+            # Recorded batch arrays show that the server accepted them.
+            self._batch_supported = any(isinstance(e["request"], list) for e in entries)
+        self.logger.info(f"Replaying {len(entries)} round-trips from {self._recording}.")
+
+    def recorded_stats(self) -> dict[str, dict[str, Any]]:
+        """Per-method round-trip metrics of the recording, in the format of ``stats()``."""
+        if not self.connected:
+            self.warmup()
+        return self._recorded.snapshot()
+
+    def _next_entry(self, request: Any) -> dict:
+        if self.match == "key":
+            entries = self._by_key.get(_key(request))
+            if not entries:
+                raise LookupError(f"No recorded response to {_method(request)} with these params.")
+            return entries.popleft() if len(entries) > 1 else entries[0]
+        methods = _methods(request)
+        skippable = self.idempotent_methods | {"ACK"}
+        while self._position < len(self._entries):
+            entry = self._entries[self._position]
+            recorded = _methods(entry["request"])
+            if recorded == methods:
+                self._position += 1
+                return entry
+            if not skippable.issuperset(recorded):
+                if _method(request) in self.idempotent_methods:
+                    break
+                raise LookupError(
+                    f"Recording has {_method(entry['request'])} next, not {_method(request)}."
+                )
+            self.logger.debug(f"Skipping recorded {_method(entry['request'])}.")
+            self._position += 1
+        # Recordings are made with the metadata cache on, so IDN and HELP
+        # asked again are answered with the recorded reply.
+        if _method(request) in self.idempotent_methods:
+            entries = self._by_key.get(_key(request))
+            if entries:
+                return entries[-1]
+        raise LookupError(f"Recording exhausted before {_method(request)}.")
+
+    def write_raw(self, cmd: Union[str, bytes]) -> None:
+        """
+        Do nothing. Recordings hold request/reply round-trips only, so a
+        write without a reply has nothing to replay.
+        """
+        self.logger.debug("Ignoring raw write during replay: %s", cmd[:64])
+
+    def _ask_once(self, cmd: Union[str, bytes], method: Optional[str] = None, label: Optional[str] = None) -> dict:
+        data = cmd.encode("utf-8") if isinstance(cmd, str) else cmd
+        request = self.codec.decode(data)
+        with self._io_lock:
+            start = time.perf_counter()
+            entry = self._next_entry(request)
+            delay = entry["dt"] * self.time_scale
+            if delay > 0:
+                time.sleep(delay)
+            response = _with_ids(entry["response"], entry["request"], request)
+            self.metrics.record(label or method, time.perf_counter() - start, len(data))
+        return response
+
+
+_REPLAY_CLASSES: dict[type, type] = {}
+
+
+def replay(cls: type) -> type:
+    """
+    Return a replaying variant of the driver class ``cls``.
+
+    The variant keeps the driver's defaults and methods but answers from
+    a recording, e.g. ``replay(PPMS)(recording="ppms.jsonl")``.
+    """
+    if issubclass(cls, ReplayInstrument):
+        return cls
+    if cls not in _REPLAY_CLASSES:
+        _REPLAY_CLASSES[cls] = type(f"Replay{cls.__name__}", (cls, ReplayInstrument), {"__module__": cls.__module__})
+    return _REPLAY_CLASSES[cls]
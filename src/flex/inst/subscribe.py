@@ -0,0 +1,252 @@
+'''
+Live readings from Levylab instruments, pushed or polled.
+
+Instrument.subscribe(topics, target) delivers every new reading of the
+given topics (getter names such as "getTemperature") to a callback or a
+queue. When the server advertises a PUB endpoint in its IDN reply
+("PUB Address"), readings arrive on a SUB socket at the server's rate:
+each message is a topic frame followed by the encoded result (and any
+binary frames, as in flex.inst.codec). Otherwise one background thread
+shared by all subscriptions in the process polls the getters.
+
+    q = queue.Queue()
+    sub = ppms.subscribe(["getTemperature", "getMagnet"], q)
+    topic, value = q.get()
+    sub.close()
+'''
+
+import heapq
+import itertools
+import logging
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Optional, Sequence, Union
+from urllib.parse import urlsplit
+
+import zmq
+
+from flex.inst.codec import decode_frames, default_codec
+from flex.inst.pool import shared_context
+
+if TYPE_CHECKING:
+    from flex.inst.base import Instrument
+
+Target = Union[Callable[[str, Any], None], queue.Queue]
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    Handle of an ``Instrument.subscribe()`` call.
+
+    Attributes:
+        topics: Subscribed topics.
+        mode: "pub" when readings are pushed by the server, "poll" when
+            they are polled by the shared poller.
+    """
+
+    def __init__(self, topics: Sequence[str], target: Target, mode: str):
+        self.topics = tuple(topics)
+        self.mode = mode
+        self._target = target
+        self._source: Optional[Union["_Listener", "_Poller"]] = None
+        self.closed = False
+
+    def deliver(self, topic: str, value: Any) -> None:
+        if self.closed:
+            return
+        try:
+            if isinstance(self._target, queue.Queue):
+                self._target.put((topic, value))
+            else:
+                self._target(topic, value)
+        except Exception:
+            logger.exception(f"Subscriber of {topic} failed")
+
+    def close(self) -> None:
+        """Stop delivering readings."""
+        if not self.closed:
+            self.closed = True
+            self._source.remove(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class _Listener:
+    """One SUB socket and thread per PUB address, shared by its subscriptions."""
+
+    def __init__(self, address: str):
+        self.address = address
+        self._subscriptions: list[Subscription] = []
+        self._lock = threading.Lock()
+        self._removals: queue.SimpleQueue = queue.SimpleQueue()
+        self._codec = default_codec()
+        self._thread = threading.Thread(target=self._run, name=f"flex-sub {address}", daemon=True)
+        self._thread.start()
+
+    def add(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscriptions.append(subscription)
+        subscription._source = self
+
+    def remove(self, subscription: Subscription) -> None:
+        # Applied by the listener thread between receives, so the socket is
+        # only ever closed by the thread using it.
+        self._removals.put(subscription)
+
+    def _apply_removals(self) -> bool:
+        """Drop removed subscriptions; return whether any are left."""
+        removed = False
+        while True:
+            try:
+                subscription = self._removals.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._subscriptions.remove(subscription)
+            removed = True
+        if not removed:
+            return True
+        # listen() adds under _LISTENERS_LOCK, so no subscription can join
+        # between this check and unregistering the listener.
+        with _LISTENERS_LOCK:
+            with self._lock:
+                if self._subscriptions:
+                    return True
+            if _LISTENERS.get(self.address) is self:
+                del _LISTENERS[self.address]
+            return False
+
+    def _run(self) -> None:
+        sock = shared_context().socket(zmq.SUB)
+        sock.setsockopt(zmq.LINGER, 0)
+        # Topics are filtered here rather than with ZMQ_SUBSCRIBE, so that
+        # subscribing from other threads never touches this thread's socket.
+        sock.setsockopt(zmq.SUBSCRIBE, b"")
+        sock.connect(self.address)
+        try:
+            while self._apply_removals():
+                if not sock.poll(100):
+                    continue
+                frames = sock.recv_multipart(copy=False)
+                if len(frames) < 2:
+                    continue
+                topic = frames[0].bytes.decode("utf-8")
+                with self._lock:
+                    targets = [s for s in self._subscriptions if topic in s.topics]
+                if not targets:
+                    continue
+                try:
+                    value = decode_frames(self._codec, frames[1:])
+                except ValueError as e:
+                    logger.error(f"Undecodable {topic} message from {self.address}: {e}")
+                    continue
+                for subscription in targets:
+                    subscription.deliver(topic, value)
+        finally:
+            sock.close(linger=0)
+
+
+class _Poller:
+    """Single background thread polling the getters of every fallback subscription."""
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, Subscription, "Instrument", str, float]] = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, subscription: Subscription, instrument: "Instrument", interval: float) -> None:
+        subscription._source = self
+        with self._cond:
+            now = time.monotonic()
+            for topic in subscription.topics:
+                heapq.heappush(self._heap, (now, next(self._order), subscription, instrument, topic, interval))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="flex-poller", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def remove(self, subscription: Subscription) -> None:
+        with self._cond:
+            self._heap = [entry for entry in self._heap if entry[2] is not subscription]
+            heapq.heapify(self._heap)
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._cond.wait(timeout)
+                due, _, subscription, instrument, topic, interval = heapq.heappop(self._heap)
+            try:
+                value = instrument._query(topic)
+            except Exception as e:
+                logger.warning(f"Polling {topic} failed: {e!r}")
+            else:
+                subscription.deliver(topic, value)
+            with self._cond:
+                if not subscription.closed:
+                    # Keep the cadence, but never schedule into the past.
+                    due = max(due + interval, time.monotonic())
+                    heapq.heappush(self._heap, (due, next(self._order), subscription, instrument, topic, interval))
+
+
+_LISTENERS: dict[str, _Listener] = {}
+_LISTENERS_LOCK = threading.Lock()
+_POLLER = _Poller()
+
+
+def pub_address(idn: Any, address: str) -> Optional[str]:
+    """
+    PUB endpoint advertised in an IDN reply, or None.
+
+    A wildcard host ("*" or "0.0.0.0") is replaced by the host of
+    ``address``, the instrument's own endpoint.
+    """
+    pub = idn.get("PUB Address") if isinstance(idn, dict) else None
+    if not pub:
+        return None
+    parts = urlsplit(pub)
+    if parts.hostname in ("*", "0.0.0.0"):
+        pub = f"{parts.scheme}://{urlsplit(address).hostname}:{parts.port}"
+    return pub
+
+
+def listen(address: str, topics: Sequence[str], target: Target) -> Subscription:
+    """Subscribe to ``topics`` on the PUB socket at ``address``."""
+    subscription = Subscription(topics, target, "pub")
+    with _LISTENERS_LOCK:
+        listener = _LISTENERS.get(address)
+        if listener is None:
+            listener = _LISTENERS[address] = _Listener(address)
+        listener.add(subscription)
+    return subscription
+
+
+def poll(instrument: "Instrument", topics: Sequence[str], target: Target, interval: float = 1.0) -> Subscription:
+    """Poll the getters ``topics`` of ``instrument`` on the shared poller thread."""
+    subscription = Subscription(topics, target, "poll")
+    _POLLER.add(subscription, instrument, interval)
+    return subscription
+
+
+def subscribe(instrument: "Instrument", topics: Sequence[str], target: Target, interval: float = 1.0) -> Subscription:
+    """See ``Instrument.subscribe``."""
+    if isinstance(topics, str):
+        topics = [topics]
+    try:
+        address = pub_address(instrument.idn(), instrument._address)
+    except Exception as e:
+        logger.warning(f"IDN of {instrument._address} failed, polling instead: {e!r}")
+        address = None
+    if address is None:
+        return poll(instrument, topics, target, interval)
+    return listen(address, topics, target)
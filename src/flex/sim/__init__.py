@@ -0,0 +1,22 @@
+'''
+Simulated Levylab Instrument Framework servers.
+
+ZMQ REP servers speaking the same JSON-RPC dialect as the LabVIEW
+instruments, for benchmarks, CI and offline development:
+
+    from flex.sim import SimLockin
+    from flex.inst.levylab.Lockin import Lockin
+
+    with SimLockin(latency=0.001, noise=1e-4) as sim:
+        lockin = Lockin(sim.address)
+        lockin.getResults()
+
+Run ``python -m flex.sim [Control Experiment.json]`` to serve a whole
+experiment configuration until interrupted.
+'''
+
+from flex.sim.server import RPCError, SimServer
+from flex.sim.lockin import SimLockin
+from flex.sim.transport import SimTransport
+from flex.sim.ppms import SimPPMS
+from flex.sim.experiment import SimExperiment, example_config
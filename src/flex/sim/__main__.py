@@ -0,0 +1,44 @@
+'''
+Serve a simulated Control Experiment until interrupted.
+
+Usage:
+    python -m flex.sim
+    python -m flex.sim "Control Experiment.json" --latency 0.002 --noise 1e-4 --time-scale 0.1
+'''
+
+import argparse
+import logging
+import time
+
+from flex.sim.experiment import SimExperiment
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulated Levylab Instrument Framework servers.")
+    parser.add_argument("config", nargs="?", help="Control Experiment.json (default: a Lockin and a PPMS)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every reply")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency in seconds")
+    parser.add_argument("--noise", type=float, default=0.0, help="standard deviation of reading noise")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="factor applied to sweep and ramp durations")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    sim = SimExperiment(
+        args.config,
+        latency=args.latency,
+        jitter=args.jitter,
+        noise=args.noise,
+        time_scale=args.time_scale,
+    )
+    with sim:
+        print(sim)
+        print(f"Config: {sim.config_path}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+'''
+Simulated servers for a whole Control Experiment configuration.
+
+SimExperiment reads a Control Experiment.json (or a dict of the same
+shape), starts a simulated server at the address of every configured
+instrument plus the Transport server, and leaves the file where CESession
+can load it, so a session starts fully offline:
+
+    from flex.sim import SimExperiment
+    from flex.exp.CESession import CESession
+
+    with SimExperiment(time_scale=0.01) as sim:
+        exp = CESession(config_path=sim.config_path)
+        exp.DAQ.lockin_sweep(sweep_config)
+'''
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from flex.sim.lockin import SimLockin
+from flex.sim.ppms import SimPPMS
+from flex.sim.server import SimServer
+from flex.sim.transport import SimTransport
+
+_TRANSPORT_ADDRESS = "tcp://localhost:15260"
+
+_SIMULATORS: dict[str, type[SimServer]] = {
+    "Instrument.Lockin.lvclass": SimLockin,
+    "instrument.PPMS.lvclass": SimPPMS,
+    "instrument.PPMS1.lvclass": SimPPMS,
+    "instrument.PPMS2.lvclass": SimPPMS,
+    "instrument.PPMS3.lvclass": SimPPMS,
+    "instrument.PPMS-W-1.lvclass": SimPPMS,
+    "instrument.OptiCool.lvclass": SimPPMS,
+    "instrument.Cryostation.lvclass": SimPPMS,
+    "Instrument.Oxford1820.lvclass": SimPPMS,
+    "Instrument.OxfordVRM.lvclass": SimPPMS,
+    "Inst.TC.CF.lvclass": SimPPMS,
+    "Inst.TC.MNK.lvclass": SimPPMS,
+}
+
+
+def example_config(lockin_port: int = 29170, ppms_port: int = 29270) -> dict:
+    """A minimal Control Experiment configuration with a Lockin and a PPMS."""
+    return {
+        "Experiment": {
+            "User": "sim",
+            "Device": "SIM000",
+            "Device Path": str(Path(tempfile.gettempdir()) / "SIM000"),
+            "Device Description": "Simulated experiment",
+            "Instrument": "flex.sim",
+            "Instruments": [
+                {
+                    "Type": "DAQ",
+                    "Address": f"tcp://localhost:{lockin_port}",
+                    "class path": "Multichannel Lockin/Instrument.Lockin.lvclass",
+                },
+                {
+                    "Type": "Cryostat",
+                    "Address": f"tcp://localhost:{ppms_port}",
+                    "class path": "PPMS/instrument.PPMS.lvclass",
+                },
+            ],
+        },
+        "Wiring Configuration": {
+            "Lockin Ch": [1, 2],
+            "KH": {"Electrodes": ["G", "D"], "Labels": ["Gate", "Drain"]},
+        },
+    }
+
+
+class SimExperiment:
+    """
+    Simulated servers for every instrument of a Control Experiment config.
+
+    Args:
+        config: Path to a Control Experiment.json, a dict of the same shape,
+            or None for example_config().
+        transport_address: Where to serve the Transport server, or None to
+            skip it. Default: the Transport driver's default address.
+        **kwargs: Passed to every server (latency, jitter, noise,
+            time_scale, seed).
+    """
+
+    def __init__(
+        self,
+        config: Union[str, os.PathLike, dict, None] = None,
+        transport_address: Optional[str] = _TRANSPORT_ADDRESS,
+        **kwargs: Any,
+    ):
+        self._tmpdir: Optional[tempfile.TemporaryDirectory] = None
+        if config is None:
+            config = example_config()
+        if isinstance(config, dict):
+            self._tmpdir = tempfile.TemporaryDirectory(prefix="flex-sim-")
+            self.config_path = Path(self._tmpdir.name) / "Control Experiment.json"
+            self.config_path.write_text(json.dumps(config), encoding="utf-8")
+        else:
+            self.config_path = Path(config)
+            config = json.loads(self.config_path.read_text(encoding="utf-8"))
+
+        self.servers: dict[str, SimServer] = {}
+        if transport_address:
+            self.servers["Transport"] = SimTransport(transport_address, **kwargs)
+        for inst in config.get("Experiment", {}).get("Instruments", []):
+            address = inst.get("Address", "")
+            lv_class = Path(inst.get("class path", "").replace("\\", "/")).name
+            if not address:
+                continue
+            server = _SIMULATORS.get(lv_class, SimServer)(address, **kwargs)
+            server.lv_class = lv_class
+            self.servers[inst.get("Type", lv_class)] = server
+
+    def __getitem__(self, name: str) -> SimServer:
+        return self.servers[name]
+
+    def start(self) -> "SimExperiment":
+        """Start every server."""
+        for server in self.servers.values():
+            server.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop every server and remove a generated config file."""
+        for server in self.servers.values():
+            server.stop()
+        if self._tmpdir is not None:
+            self._tmpdir.cleanup()
+            self._tmpdir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def __repr__(self):
+        servers = ", ".join(f"{name}={s.address}" for name, s in self.servers.items())
+        return f"SimExperiment({servers})"
@@ -0,0 +1,237 @@
+'''
+Simulated Levylab Multichannel Lock-in server.
+
+Implements the commands used by flex.inst.levylab.Lockin: AO settings,
+getAO/getAI waveforms, getResults, the idle / running / sweeping state
+machine and getSweepWaveforms. Each AI channel sees ``gain`` times the AO
+channel of the same number plus noise, so lock-in results and sweep
+waveforms follow the AO settings.
+'''
+
+import time
+from typing import Any, Optional
+
+import numpy as np
+
+from flex.sim.server import RPCError, SimServer
+
+_FUNCTIONS = {"Sine", "Triangle", "Square"}
+
+
+class SimLockin(SimServer):
+    """
+    Simulated Multichannel Lock-in.
+
+    Args:
+        address: Endpoint to bind. Default: random localhost port.
+        channels: Number of AO and AI channels.
+        references: Number of lock-in references (AO1..AOn frequencies).
+        sample_rate: Samples per second of sweep waveforms.
+        waveform_points: Samples per getAO/getAI waveform.
+        gain: AI response to the AO channel of the same number.
+        **kwargs: Passed to SimServer (latency, jitter, noise, time_scale, seed).
+    """
+
+    lv_class = "Instrument.Lockin.lvclass"
+
+    def __init__(
+        self,
+        address: Optional[str] = None,
+        channels: int = 8,
+        references: int = 4,
+        sample_rate: float = 1000.0,
+        waveform_points: int = 100,
+        gain: float = 0.1,
+        **kwargs: Any,
+    ):
+        super().__init__(address, **kwargs)
+        self.channels = channels
+        self.references = references
+        self.sample_rate = sample_rate
+        self.waveform_points = waveform_points
+        self.gain = gain
+        self.ao = [
+            {"Amplitude": 0.0, "DC": 0.0, "Frequency": 10.0 * ch, "Phase": 0.0, "Function": "Sine"}
+            for ch in range(1, channels + 1)
+        ]
+        self.state = "idle"
+        self.sampling_mode = "Auto"
+        self.sweep_config: dict = {}
+        self._sweep_end: Optional[float] = None
+        self._sweep: Optional[dict] = None
+
+    # ------------------------------------------------------------------
+    # Signal model
+    # ------------------------------------------------------------------
+
+    def _channel(self, params: dict, key: str = "Channel") -> dict:
+        channel = int(params[key])
+        if not 1 <= channel <= self.channels:
+            raise RPCError(f"Invalid channel: {channel}")
+        return self.ao[channel - 1]
+
+    def _ao_wave(self, ch: int, t: np.ndarray) -> np.ndarray:
+        s = self.ao[ch - 1]
+        phase = 2 * np.pi * s["Frequency"] * t + np.deg2rad(s["Phase"])
+        if s["Function"] == "Square":
+            shape = np.sign(np.sin(phase))
+        elif s["Function"] == "Triangle":
+            shape = 2 / np.pi * np.arcsin(np.sin(phase))
+        else:
+            shape = np.sin(phase)
+        return s["DC"] + s["Amplitude"] * shape
+
+    def _ai_wave(self, ao: np.ndarray) -> np.ndarray:
+        wave = self.gain * ao
+        if self.noise:
+            wave = wave + self.rng.normal(scale=self.noise, size=ao.shape)
+        return wave
+
+    def _waveform(self, kind: str, ch: int, y: np.ndarray, dt: float, **attributes: Any) -> dict:
+        return {"attributes": {f"{kind} Channel": ch, **attributes}, "t0": 0, "dt": dt, "Y": y}
+
+    # ------------------------------------------------------------------
+    # Sweep state machine
+    # ------------------------------------------------------------------
+
+    def _update_state(self) -> None:
+        if self.state == "sweeping" and time.monotonic() >= self._sweep_end:
+            self._finish_sweep()
+
+    def _start_sweep(self) -> None:
+        config = self.sweep_config
+        if not config.get("Channels"):
+            raise RPCError("No sweep configured. Call setSweep first.")
+        duration = float(config.get("Sweep Time (s)", 0)) + float(config.get("Initial Wait (s)", 0))
+        self._sweep_end = time.monotonic() + duration * self.time_scale
+        self.state = "sweeping"
+
+    def _finish_sweep(self) -> None:
+        config = self.sweep_config
+        n = max(2, int(round(float(config.get("Sweep Time (s)", 0)) * self.sample_rate)))
+        dt = 1 / self.sample_rate
+        ao = [np.full(n, s["DC"]) for s in self.ao]
+        for channel in config.get("Channels", []):
+            if not channel.get("Enable?", True):
+                continue
+            ch = int(channel["Channel"])
+            start, end = float(channel.get("Start", 0)), float(channel.get("End", 0))
+            pattern = channel.get("Pattern", "Ramp /")
+            if pattern == "Table" and channel.get("Table"):
+                table = np.asarray(channel["Table"], dtype=float)
+                ao[ch - 1] = np.interp(np.linspace(0, len(table) - 1, n), np.arange(len(table)), table)
+            elif pattern == "Ramp /\\":
+                half = np.linspace(start, end, n // 2 + n % 2)
+                ao[ch - 1] = np.concatenate([half, np.linspace(end, start, n // 2)])
+            else:
+                ao[ch - 1] = np.linspace(start, end, n)
+            if not config.get("Return to Start", False):
+                self.ao[ch - 1]["DC"] = float(ao[ch - 1][-1])
+        ai = [self._ai_wave(wave) for wave in ao]
+
+        x, y = [], []
+        for ch in range(1, self.channels + 1):
+            for ref in range(1, self.references + 1):
+                amplitude = self.ao[ref - 1]["Amplitude"] if ch == ref else 0.0
+                attributes = {"Reference Channel": ref}
+                x.append(self._waveform("AI", ch, self._ai_wave(np.full(n, amplitude / np.sqrt(2))), dt, **attributes))
+                y.append(self._waveform("AI", ch, self._ai_wave(np.zeros(n)), dt, **attributes))
+        self._sweep = {
+            "AO": [self._waveform("AO", ch, wave, dt) for ch, wave in enumerate(ao, 1)],
+            "AI": [self._waveform("AI", ch, wave, dt) for ch, wave in enumerate(ai, 1)],
+            "X": x,
+            "Y": y,
+        }
+        self.state = "running"
+        self._sweep_end = None
+
+    # ------------------------------------------------------------------
+    # RPC methods
+    # ------------------------------------------------------------------
+
+    def rpc_getState(self, params: Any) -> str:
+        self._update_state()
+        return self.state
+
+    def rpc_setState(self, params: dict) -> None:
+        self._update_state()
+        value = params.get("State")
+        if value == "start":
+            if self.state == "idle":
+                self.state = "running"
+        elif value == "stop":
+            self.state = "idle"
+            self._sweep_end = None
+        elif value == "start sweep":
+            if self.state == "sweeping":
+                raise RPCError("Already sweeping")
+            self._start_sweep()
+        else:
+            raise RPCError(f"Invalid state: {value}")
+
+    def rpc_setSweep(self, params: dict) -> None:
+        if self.state == "sweeping":
+            raise RPCError("Cannot change the sweep while sweeping")
+        self.sweep_config = dict(params)
+
+    def rpc_setSweepTime(self, params: Any) -> None:
+        self.sweep_config["Sweep Time (s)"] = float(params)
+
+    def rpc_setSamplingFsMode(self, params: Any) -> None:
+        self.sampling_mode = params
+
+    def rpc_getSweepWaveforms(self, params: Any) -> dict:
+        self._update_state()
+        if self._sweep is None:
+            return {"AO": [], "AI": [], "X": [], "Y": []}
+        return self._sweep
+
+    def rpc_setAO_Amplitude(self, params: dict) -> None:
+        self._channel(params)["Amplitude"] = float(params["Amplitude"])
+
+    def rpc_setAO_DC(self, params: dict) -> None:
+        self._channel(params)["DC"] = float(params["DC"])
+
+    def rpc_setAO_Frequency(self, params: dict) -> None:
+        self._channel(params)["Frequency"] = float(params["Frequency"])
+
+    def rpc_setAO_Phase(self, params: dict) -> None:
+        self._channel(params)["Phase"] = float(params["Phase"])
+
+    def rpc_setAO_Function(self, params: dict) -> None:
+        if params["Function"] not in _FUNCTIONS:
+            raise RPCError(f"Invalid function: {params['Function']}")
+        self._channel(params)["Function"] = params["Function"]
+
+    def rpc_getAO(self, params: Any) -> list:
+        dt = 1 / self.sample_rate
+        t = np.arange(self.waveform_points) * dt
+        return [
+            self._waveform("AO", ch, self._ao_wave(ch, t), dt, **self.ao[ch - 1])
+            for ch in range(1, self.channels + 1)
+        ]
+
+    def rpc_getAI(self, params: Any) -> list:
+        dt = 1 / self.sample_rate
+        t = np.arange(self.waveform_points) * dt
+        return [
+            self._waveform("AI", ch, self._ai_wave(self._ao_wave(ch, t)), dt)
+            for ch in range(1, self.channels + 1)
+        ]
+
+    def rpc_getResults(self, params: Any) -> dict:
+        results = []
+        for ch in range(1, self.channels + 1):
+            results.append({"key": f"AI{ch}.Mean", "value": self.jitter_value(self.gain * self.ao[ch - 1]["DC"])})
+            for ref in range(1, self.references + 1):
+                amplitude = self.ao[ref - 1]["Amplitude"] if ch == ref else 0.0
+                x = self.jitter_value(self.gain * amplitude / np.sqrt(2))
+                y = self.jitter_value(0.0)
+                prefix = f"AI{ch}.Ref{ref}"
+                results += [
+                    {"key": f"{prefix}.X", "value": x},
+                    {"key": f"{prefix}.Y", "value": y},
+                    {"key": f"{prefix}.R", "value": float(np.hypot(x, y))},
+                    {"key": f"{prefix}.Theta", "value": float(np.degrees(np.arctan2(y, x)))},
+                ]
+        return {"Results (Dictionary)": results}
@@ -0,0 +1,100 @@
+'''
+Simulated temperature and magnet controllers.
+
+SimPPMS implements the Temperature and Magnet capability commands used by
+the PPMS, Opticool, Oxford and Cryostation drivers, plus getLHeLevel and
+getHeater. Setpoints are approached linearly at the requested rate
+(K/min and Oe/s), scaled by ``time_scale``.
+'''
+
+import time
+from typing import Any, Optional
+
+from flex.sim.server import SimServer
+
+
+class _Ramp:
+    """A value moving linearly towards a target at ``rate`` units per second."""
+
+    def __init__(self, value: float):
+        self.start = self.target = value
+        self.rate = 0.0
+        self.since = time.monotonic()
+
+    def value(self, time_scale: float) -> float:
+        if self.rate <= 0 or self.start == self.target:
+            return self.target
+        elapsed = (time.monotonic() - self.since) / time_scale
+        step = self.rate * elapsed
+        if abs(self.target - self.start) <= step:
+            return self.target
+        return self.start + step if self.target > self.start else self.start - step
+
+    def set(self, target: float, rate: float, time_scale: float) -> None:
+        self.start = self.value(time_scale)
+        self.target = target
+        self.rate = abs(rate)
+        self.since = time.monotonic()
+
+
+class SimPPMS(SimServer):
+    """
+    Simulated cryostat with temperature channels and a magnet.
+
+    Args:
+        address: Endpoint to bind. Default: random localhost port.
+        temperature: Initial temperature of every channel in K.
+        channels: Number of temperature channels.
+        field: Initial magnetic field in Oe.
+        lhe_level: Liquid helium level in %.
+        **kwargs: Passed to SimServer (latency, jitter, noise, time_scale, seed).
+    """
+
+    lv_class = "instrument.PPMS.lvclass"
+
+    def __init__(
+        self,
+        address: Optional[str] = None,
+        temperature: float = 300.0,
+        channels: int = 4,
+        field: float = 0.0,
+        lhe_level: float = 80.0,
+        **kwargs: Any,
+    ):
+        super().__init__(address, **kwargs)
+        self.temperatures = [_Ramp(temperature) for _ in range(channels)]
+        self.magnet = _Ramp(field)
+        self.magnet_mode = "Persistent"
+        self.lhe_level = lhe_level
+
+    def _temperature(self, params: Any) -> _Ramp:
+        channel = params[0] if isinstance(params, list) and params else params.get("channel", 0) if isinstance(params, dict) else 0
+        return self.temperatures[int(channel)]
+
+    def rpc_getTemperature(self, params: Any) -> float:
+        return self.jitter_value(self._temperature(params).value(self.time_scale))
+
+    def rpc_getTemperatureTarget(self, params: Any) -> float:
+        return self._temperature(params).target
+
+    def rpc_setTemperature(self, params: dict) -> None:
+        # The rate is given in K/min.
+        ramp = self.temperatures[int(params.get("channel", 0))]
+        ramp.set(float(params["temperature"]), float(params["rate"]) / 60, self.time_scale)
+
+    def rpc_getHeater(self, params: Any) -> float:
+        ramp = self._temperature(params)
+        return 0.0 if ramp.value(self.time_scale) == ramp.target else 50.0
+
+    def rpc_getMagnet(self, params: Any) -> float:
+        return self.jitter_value(self.magnet.value(self.time_scale))
+
+    def rpc_getMagnetTarget(self, params: Any) -> float:
+        return self.magnet.target
+
+    def rpc_setMagnet(self, params: dict) -> None:
+        self.magnet.set(float(params["field"]), float(params["rate"]), self.time_scale)
+        self.magnet_mode = params.get("mode", self.magnet_mode)
+
+    def rpc_getLHeLevel(self, params: Any) -> float:
+        return self.lhe_level
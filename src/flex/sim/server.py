@@ -0,0 +1,296 @@
+'''
+Base class of the simulated Levylab Instrument Framework servers.
+
+SimServer binds a ZMQ REP socket and answers JSON-RPC 2.0 requests the way
+the LabVIEW servers do: single requests or batch arrays, JSON (or msgpack,
+when the request was msgpack) replies, and the built-in ACK, IDN and HELP
+commands. A request with ``"format": "binary"`` in its params gets NumPy
+arrays in the result as raw frames (see flex.inst.codec). Servers given
+``publish`` topics also bind a PUB socket, advertised in IDN as
+"PUB Address", and publish those getters periodically (see
+flex.inst.subscribe).
+'''
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Optional, Sequence
+
+import numpy as np
+import zmq
+
+from flex.inst.codec import _MSGPACK_AVAILABLE, default_codec, get_codec
+from flex.inst.pool import shared_context
+
+
+class RPCError(Exception):
+    """Raised by an RPC method to send a JSON-RPC error reply."""
+
+    def __init__(self, message: str, code: int = -32000):
+        super().__init__(message)
+        self.code = code
+
+
+class SimServer:
+    """
+    Simulated Levylab Instrument Framework server on a ZMQ REP socket.
+
+    Subclasses add JSON-RPC methods as ``rpc_<method>(self, params)``; the
+    return value becomes the reply's ``result``. The server runs on a
+    daemon thread between start() and stop(), or inside a ``with`` block.
+
+    Args:
+        address: Endpoint to bind, e.g. "tcp://127.0.0.1:29170". Default: a
+            random port on 127.0.0.1 (see ``address`` after start()).
+        latency: Seconds added before every reply.
+        jitter: Extra random latency, uniform in [0, jitter] seconds.
+        noise: Standard deviation of the Gaussian noise added to readings.
+        time_scale: Factor applied to simulated durations (sweeps, ramps).
+            0.01 runs a 10 s sweep in 0.1 s.
+        seed: Seed of the noise generator.
+        context: ZMQ context to bind in. Default: the shared context.
+        publish: Getters to publish on a PUB socket, e.g. ["getTemperature"].
+            Each message is the topic followed by the encoded result.
+        publish_interval: Seconds between two publications of every topic.
+        pub_address: Endpoint of the PUB socket. Default: a random port on
+            127.0.0.1.
+    """
+
+    lv_class = "SimServer.lvclass"
+
+    # Built-in commands listed first by HELP; Instrument.help() skips five.
+    builtins = ("ACK", "IDN", "HELP", "setLatency", "setNoise")
+
+    def __init__(
+        self,
+        address: Optional[str] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        noise: float = 0.0,
+        time_scale: float = 1.0,
+        seed: Optional[int] = None,
+        context: Optional[zmq.Context] = None,
+        publish: Sequence[str] = (),
+        publish_interval: float = 0.1,
+        pub_address: Optional[str] = None,
+    ):
+        self.address = address
+        self.latency = latency
+        self.jitter = jitter
+        self.noise = noise
+        self.time_scale = time_scale
+        self.rng = np.random.default_rng(seed)
+        self.requests = 0
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._context = context or shared_context()
+        self._json = default_codec()
+        self._msgpack = get_codec("msgpack") if _MSGPACK_AVAILABLE else None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._socket: Optional[zmq.Socket] = None
+        self.publish = list(publish)
+        self.publish_interval = publish_interval
+        self.pub_address = pub_address
+        self._pub: Optional[zmq.Socket] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> "SimServer":
+        """Bind the socket and serve requests on a background thread."""
+        if self._thread is not None:
+            return self
+        self._socket = self._context.socket(zmq.REP)
+        self._socket.setsockopt(zmq.LINGER, 0)
+        if self.address is None:
+            port = self._socket.bind_to_random_port("tcp://127.0.0.1")
+            self.address = f"tcp://127.0.0.1:{port}"
+        else:
+            self._socket.bind(self.address.replace("localhost", "127.0.0.1"))
+        if self.publish:
+            self._pub = self._context.socket(zmq.PUB)
+            self._pub.setsockopt(zmq.LINGER, 0)
+            if self.pub_address is None:
+                port = self._pub.bind_to_random_port("tcp://127.0.0.1")
+                self.pub_address = f"tcp://127.0.0.1:{port}"
+            else:
+                self._pub.bind(self.pub_address.replace("localhost", "127.0.0.1"))
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"flex-sim {self.address}", daemon=True
+        )
+        self._thread.start()
+        self.logger.info(f"{self.__class__.__name__} serving on {self.address}")
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _run(self) -> None:
+        sock = self._socket
+        next_publish = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                timeout = 50
+                if self._pub is not None:
+                    now = time.monotonic()
+                    if now >= next_publish:
+                        self._publish()
+                        next_publish = max(next_publish + self.publish_interval, now)
+                    timeout = min(timeout, max(0, int((next_publish - now) * 1000)))
+                if not sock.poll(timeout):
+                    continue
+                frames = sock.recv_multipart()
+                reply = self.handle(frames[0])
+                delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+                if delay > 0:
+                    time.sleep(delay)
+                sock.send_multipart(reply)
+        finally:
+            sock.close(linger=0)
+            self._socket = None
+            if self._pub is not None:
+                self._pub.close(linger=0)
+                self._pub = None
+
+    def _publish(self) -> None:
+        """Send the current result of every ``publish`` getter on the PUB socket."""
+        for topic in self.publish:
+            frames: list[bytes] = []
+            with self._lock:
+                try:
+                    result = getattr(self, f"rpc_{topic}")({})
+                except Exception:
+                    self.logger.exception(f"Publishing {topic} failed")
+                    continue
+                header = self._json.encode(self._serialize(result, frames, False))
+            self._pub.send_multipart([topic.encode("utf-8"), header] + frames)
+
+    # ------------------------------------------------------------------
+    # JSON-RPC dispatch
+    # ------------------------------------------------------------------
+
+    def handle(self, data: bytes) -> list[bytes]:
+        """Answer one encoded request (or batch array) with reply frames."""
+        codec = self._json
+        if data[:1] not in (b"{", b"[") and self._msgpack is not None:
+            codec = self._msgpack
+        try:
+            request = codec.decode(data)
+        except Exception as e:
+            return [self._json.encode(self._error(None, -32700, f"Parse error: {e}"))]
+        frames: list[bytes] = []
+        with self._lock:
+            self.requests += 1
+            if isinstance(request, list):
+                reply = [self._call(r, frames) for r in request]
+            else:
+                reply = self._call(request, frames)
+        return [codec.encode(reply)] + frames
+
+    def _call(self, request: Any, frames: list) -> dict:
+        if not isinstance(request, dict) or "method" not in request:
+            return self._error(None, -32600, "Invalid Request")
+        method = request["method"]
+        params = request.get("params", {})
+        handler = getattr(self, f"rpc_{method}", None)
+        if handler is None:
+            return self._error(request.get("id"), -32601, f"Method not found: {method}")
+        try:
+            result = handler(params)
+        except RPCError as e:
+            return self._error(request.get("id"), e.code, str(e))
+        except Exception as e:
+            self.logger.exception(f"{method} failed")
+            return self._error(request.get("id"), -32000, f"{type(e).__name__}: {e}")
+        binary = isinstance(params, dict) and params.get("format") == "binary"
+        return {"jsonrpc": "2.0", "result": self._serialize(result, frames, binary), "id": request.get("id")}
+
+    @staticmethod
+    def _error(id: Any, code: int, message: str) -> dict:
+        return {"jsonrpc": "2.0", "error": {"code": code, "message": message}, "id": id}
+
+    def _serialize(self, obj: Any, frames: list, binary: bool) -> Any:
+        """Replace NumPy arrays by lists, or by frame references if ``binary``."""
+        if isinstance(obj, np.ndarray):
+            if not binary:
+                return obj.tolist()
+            array = np.ascontiguousarray(obj, dtype="<f8")
+            frames.append(array.tobytes())
+            ref = {"$frame": len(frames), "dtype": "<f8"}
+            if array.ndim > 1:
+                ref["shape"] = list(array.shape)
+            return ref
+        if isinstance(obj, dict):
+            return {k: self._serialize(v, frames, binary) for k, v in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return [self._serialize(v, frames, binary) for v in obj]
+        if isinstance(obj, np.generic):
+            return obj.item()
+        return obj
+
+    # ------------------------------------------------------------------
+    # Simulation helpers
+    # ------------------------------------------------------------------
+
+    def jitter_value(self, value: float, scale: float = 1.0) -> float:
+        """``value`` plus Gaussian noise of ``noise * scale``."""
+        if self.noise:
+            return float(value + self.rng.normal(scale=self.noise * scale))
+        return float(value)
+
+    def methods(self) -> list[str]:
+        """RPC methods in HELP order: built-ins first, then the rest sorted."""
+        names = sorted(name[4:] for name in dir(self) if name.startswith("rpc_"))
+        return list(self.builtins) + [n for n in names if n not in self.builtins]
+
+    # ------------------------------------------------------------------
+    # Built-in commands
+    # ------------------------------------------------------------------
+
+    def rpc_ACK(self, params: Any) -> str:
+        return "ACK"
+
+    def rpc_IDN(self, params: Any) -> dict:
+        codecs = ["json"] + (["msgpack"] if self._msgpack is not None else [])
+        idn = {
+            "Name": self.__class__.__name__,
+            "Class": self.lv_class,
+            "Version": "simulated",
+            "codecs": codecs,
+        }
+        if self._pub is not None:
+            idn["PUB Address"] = self.pub_address
+        return idn
+
+    def rpc_HELP(self, params: Any) -> Any:
+        command = params.get("command") if isinstance(params, dict) else None
+        if command:
+            handler = getattr(self, f"rpc_{command}", None)
+            if handler is None:
+                raise RPCError(f"Method not found: {command}", -32601)
+            return (handler.__doc__ or "").strip()
+        return self.methods()
+
+    def rpc_setLatency(self, params: dict) -> None:
+        """Set the simulated reply latency: {"latency": s, "jitter": s}."""
+        self.latency = float(params.get("latency", self.latency))
+        self.jitter = float(params.get("jitter", self.jitter))
+
+    def rpc_setNoise(self, params: dict) -> None:
+        """Set the standard deviation of the simulated noise: {"noise": value}."""
+        self.noise = float(params.get("noise", self.noise))
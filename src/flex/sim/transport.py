@@ -0,0 +1,93 @@
+'''
+Simulated Levylab Transport server.
+
+Implements the commands used by flex.inst.levylab.TransportServer:
+start/stop/status plus the experiment folder, comments, parameters and
+sweep configuration. stopTransport passes through "stopping" for
+``stop_time`` (scaled by ``time_scale``) before the status returns to
+"idle".
+'''
+
+import time
+from typing import Any, Optional
+
+from flex.sim.server import RPCError, SimServer
+
+_METHODS = {"LockinSweep", "LockinTime", "LockinTimeDelay"}
+
+
+class SimTransport(SimServer):
+    """
+    Simulated Transport server.
+
+    Args:
+        address: Endpoint to bind. Default: random localhost port.
+        stop_time: Seconds spent "stopping" after stopTransport.
+        **kwargs: Passed to SimServer (latency, jitter, noise, time_scale, seed).
+    """
+
+    lv_class = "Transport.lvclass"
+
+    def __init__(self, address: Optional[str] = None, stop_time: float = 1.0, **kwargs: Any):
+        super().__init__(address, **kwargs)
+        self.stop_time = stop_time
+        self.status = "idle"
+        self.method: Optional[str] = None
+        self.folder = ""
+        self.comments = ""
+        self.params: dict = {}
+        self.refresh_time = 100.0
+        self.sweep_config: dict = {}
+        self._idle_at: Optional[float] = None
+
+    def _update_status(self) -> None:
+        if self.status == "stopping" and time.monotonic() >= self._idle_at:
+            self.status = "idle"
+            self.method = None
+
+    def rpc_startTransport(self, params: dict) -> dict:
+        self._update_status()
+        method = params.get("method")
+        if method not in _METHODS:
+            raise RPCError(f"Invalid method: {method}")
+        if self.status != "idle":
+            raise RPCError(f"Transport is {self.status}")
+        self.status = "running"
+        self.method = method
+        return {"Status": self.status}
+
+    def rpc_stopTransport(self, params: Any) -> dict:
+        self._update_status()
+        if self.status == "running":
+            self.status = "stopping"
+            self._idle_at = time.monotonic() + self.stop_time * self.time_scale
+            self._update_status()
+        return {"Status": self.status}
+
+    def rpc_getStatus(self, params: Any) -> dict:
+        self._update_status()
+        return {"Status": self.status, "method": self.method}
+
+    def rpc_setExptFolder(self, params: dict) -> None:
+        self.folder = params["folder"]
+
+    def rpc_getExptFolder(self, params: Any) -> dict:
+        return {"folder": self.folder}
+
+    def rpc_setExptComments(self, params: dict) -> None:
+        self.comments = params["comments"]
+
+    def rpc_getExptComments(self, params: Any) -> dict:
+        return {"comments": self.comments}
+
+    def rpc_setExptParam(self, params: dict) -> None:
+        self.params.update(params)
+
+    def rpc_setRefreshTime(self, params: dict) -> None:
+        self.refresh_time = float(params["Refresh Time (ms)"])
+
+    def rpc_setSweepConfig(self, params: dict) -> None:
+        self.sweep_config = dict(params)
+
+    def rpc_getSweepConfig(self, params: Any) -> dict:
+        return self.sweep_config
@@ -0,0 +1,51 @@
+"""
+Shared fixtures of the sim-backed tests.
+
+These run against the simulated servers in flex.sim, so no LabVIEW or
+hardware is needed:
+
+    PYTHONPATH=src pytest tests/test_sim_*.py
+
+Modules skip themselves when flex is not importable.
+"""
+
+import pytest
+
+# flex is imported inside the fixtures, so that collecting the hardware
+# scripts in this directory does not depend on it.
+
+
+def _clear_caches():
+    from flex.inst.metadata import get_metadata_cache
+    from flex.inst.pool import get_pool
+
+    get_pool().clear()
+    get_metadata_cache().invalidate()
+
+
+@pytest.fixture
+def cold_start():
+    """
+    Drop pooled sockets and cached metadata, so a test starts from a fresh
+    connection; returns the function doing it, for resetting mid-test.
+    """
+    _clear_caches()
+    yield _clear_caches
+    _clear_caches()
+
+
+@pytest.fixture
+def sim_lockin():
+    """A SimLockin at 1 kS/s with short 100-point waveforms."""
+    from flex.sim import SimLockin
+
+    with SimLockin(seed=0) as sim:
+        yield sim
+
+
+@pytest.fixture
+def sim_ppms():
+    from flex.sim import SimPPMS
+
+    with SimPPMS(seed=0) as sim:
+        yield sim
@@ -1,21 +1,11 @@
 #%%
-from flex.inst import MCLockin
+from flex.inst.levylab.Lockin import Lockin
 
-lockin = MCLockin()
+lockin = Lockin()
 
 #%%
-data = lockin._send_command('getSweepResults')['result']
-channel_data = {}
-
-for j in ["AO", "AI"]:
-    for i in data[j]:
-        channel_name = f'{j}{i["attributes"][f"{j} Channel"]}'
-        channel_data[channel_name] = i['Y']
-
-for j in ["X", "Y"]:
-    for i in data[j]:
-        channel_name = f'AI{i['attributes']['AI Channel']}{j}{i['attributes']['Reference Channel']}'
-        channel_data[channel_name] = i['Y']
+# {"AO1": samples, ..., "AI1": ..., "AI1X1": ..., "AI1Y1": ...} as array views
+channel_data = lockin.get_sweep_dataset().to_dict()
 
 
 from nptdms import TdmsWriter, ChannelObject
@@ -0,0 +1,46 @@
+"""Payload codecs of flex.inst.codec."""
+
+import math
+
+import pytest
+
+codec = pytest.importorskip("flex.inst.codec")
+np = pytest.importorskip("numpy")
+
+from flex.inst.codec import JsonCodec, decode_frames, get_codec
+
+
+@pytest.mark.skipif(not codec._ORJSON_AVAILABLE, reason="orjson is not installed")
+def test_orjson_reads_labview_non_finite_floats():
+    reply = codec.OrjsonCodec().decode(b'{"result": [NaN, Infinity, -Infinity], "id": "1"}')
+    assert math.isnan(reply["result"][0])
+    assert reply["result"][1:] == [math.inf, -math.inf]
+
+
+@pytest.mark.skipif(not codec._ORJSON_AVAILABLE, reason="orjson is not installed")
+@pytest.mark.parametrize("obj", [
+    {1: "x", "value": math.nan},
+    {"values": [1.0, math.inf]},
+    {"value": None},
+])
+def test_orjson_writes_what_json_writes(obj):
+    assert codec.OrjsonCodec().encode(obj) == JsonCodec().encode(obj)
+
+
+@pytest.mark.skipif(not codec._ORJSON_AVAILABLE, reason="orjson is not installed")
+def test_orjson_encodes_numpy_arrays():
+    data = codec.OrjsonCodec().encode({"Y": np.array([1.0, np.nan])})
+    assert JsonCodec().decode(data)["Y"][0] == 1.0
+    assert math.isnan(JsonCodec().decode(data)["Y"][1])
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        get_codec("xml")
+
+
+def test_binary_frame_is_a_numpy_view():
+    y = np.arange(4, dtype="<f8")
+    header = JsonCodec().encode({"result": {"Y": {"$frame": 1, "dtype": "<f8"}}})
+    reply = decode_frames(JsonCodec(), [header, y.tobytes()])
+    np.testing.assert_array_equal(reply["result"]["Y"], y)
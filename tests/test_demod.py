@@ -0,0 +1,39 @@
+"""flex.analysis.demod on synthetic records."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+demod = pytest.importorskip("flex.analysis.demod")
+
+FS = 10_000
+T = np.arange(20_000) / FS
+
+
+@pytest.mark.parametrize("phase", [0, 45, -90])
+def test_sine_phase(phase):
+    # Sine references, like the Lockin's AO outputs.
+    signal = 2 * np.sin(2 * np.pi * 13 * T + np.radians(phase))
+    result = demod.demodulate(signal, FS, [13], tau=0.2, order=4)
+    assert result.Theta[0, 0, 0, -1] == pytest.approx(phase, abs=1)
+    assert result.X[0, 0, 0, -1] == pytest.approx(np.sqrt(2) * np.cos(np.radians(phase)), abs=0.05)
+    assert result.Y[0, 0, 0, -1] == pytest.approx(np.sqrt(2) * np.sin(np.radians(phase)), abs=0.05)
+    assert result.R[0, 0, 0, -1] == pytest.approx(np.sqrt(2), abs=0.05)
+
+
+def test_cosine_leads_by_90_degrees():
+    result = demod.demodulate(np.cos(2 * np.pi * 13 * T), FS, [13], tau=0.2, order=4)
+    assert result.Theta[0, 0, 0, -1] == pytest.approx(90, abs=1)
+
+
+def test_chunks_equal_single_pass():
+    signals = np.stack([np.sin(2 * np.pi * 13 * T), np.sin(2 * np.pi * 34 * T + 1)])
+    whole = demod.demodulate(signals, FS, [13, 17], harmonics=(1, 2), chunk_size=len(T))
+    chunked = demod.demodulate(signals, FS, [13, 17], harmonics=(1, 2), chunk_size=777)
+    np.testing.assert_allclose(chunked.X, whole.X, atol=1e-9)
+    np.testing.assert_allclose(chunked.Y, whole.Y, atol=1e-9)
+
+
+def test_empty_record():
+    empty = demod.demodulate(np.zeros((2, 0)), 1000, [10, 20])
+    assert empty.X.shape == (2, 2, 1, 0)
+    assert empty.t.shape == (0,)
@@ -0,0 +1,65 @@
+"""flex.inst.aio.AsyncInstrument against the simulated servers."""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("flex.sim")
+zmq = pytest.importorskip("zmq")
+
+from flex.inst.aio import asyncify
+from flex.inst.levylab.PPMS import PPMS
+
+pytestmark = pytest.mark.usefixtures("cold_start")
+
+
+def test_concurrent_getters(sim_ppms):
+    async def run():
+        async with asyncify(PPMS)(sim_ppms.address) as ppms:
+            return await asyncio.gather(ppms.getTemperature(), ppms.getMagnet(), ppms.getTemperature())
+
+    temperature, field, again = asyncio.run(run())
+    assert temperature == again
+    assert field is not None
+
+
+def test_timeout_recovers_socket(sim_ppms):
+    async def run():
+        async with asyncify(PPMS)(sim_ppms.address, timeout=0.1, retries=0) as ppms:
+            sim_ppms.latency = 0.3
+            with pytest.raises(zmq.Again):
+                await ppms.getTemperature()
+            sim_ppms.latency = 0
+            # Let the server finish the request that timed out.
+            await asyncio.sleep(0.3)
+            return await ppms.getTemperature(), ppms.recovery_stats()
+
+    temperature, recovery = asyncio.run(run())
+    assert temperature == pytest.approx(300, abs=1)
+    assert recovery["timeouts"] == 1
+    assert recovery["reconnects"] == 1
+
+
+def test_batch_and_submit(sim_ppms):
+    async def run():
+        async with asyncify(PPMS)(sim_ppms.address) as ppms:
+            assert await ppms.supports_batch()
+            async with ppms.batch() as b:
+                temperature = b.call("getTemperature")
+                field = b.call("getMagnet")
+            submitted = await ppms.submit("getTemperature")
+            return temperature["result"], field["result"], submitted["result"], ppms.stats()
+
+    temperature, field, submitted, stats = asyncio.run(run())
+    assert temperature == submitted
+    assert field is not None
+    assert stats["batch(2)"]["count"] == 1
+
+
+def test_write_raw_discards_the_reply(sim_ppms):
+    async def run():
+        async with asyncify(PPMS)(sim_ppms.address) as ppms:
+            await ppms.write_raw(ppms.codec.encode(ppms._build_request("getMagnet")))
+            return await ppms.getTemperature()
+
+    assert asyncio.run(run()) == pytest.approx(300, abs=1)
@@ -0,0 +1,52 @@
+"""CESession against a SimExperiment."""
+
+import socket
+
+import pytest
+
+pytest.importorskip("flex.sim")
+
+from flex.exp.CESession import CESession
+from flex.inst.levylab.Aerotech import Aerotech
+from flex.inst.levylab.PPMS import PPMS
+from flex.sim import SimExperiment
+
+pytestmark = pytest.mark.usefixtures("cold_start")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def experiment():
+    config = {
+        "Experiment": {
+            "Instruments": [
+                {
+                    "Type": "Cryostat",
+                    "Address": f"tcp://localhost:{_free_port()}",
+                    "class path": "PPMS/instrument.PPMS.lvclass",
+                },
+                {
+                    "Type": "DelayLine",
+                    "Address": f"tcp://localhost:{_free_port()}",
+                    "class path": "Aerotech/Instrument.Aerotech.lvclass",
+                },
+            ],
+        },
+    }
+    with SimExperiment(config) as sim:
+        yield sim
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_session_with_non_instrument_driver(experiment, lazy):
+    with CESession(config_path=experiment.config_path, lazy=lazy) as session:
+        assert isinstance(session.Cryostat, PPMS)
+        assert isinstance(session.DelayLine, Aerotech)
+        status = session.connection_status(wait_timeout=None)
+        assert status == {"Cryostat": "connected", "Transport": "connected"}
+        assert session.Cryostat.connected
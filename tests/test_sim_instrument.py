@@ -0,0 +1,231 @@
+"""flex.inst.base.Instrument against the simulated servers."""
+
+import logging
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("flex.sim")
+zmq = pytest.importorskip("zmq")
+
+from flex.inst.base import Instrument
+
+pytestmark = pytest.mark.usefixtures("cold_start")
+
+
+def test_command_intervals_pace_the_next_command(sim_lockin):
+    with Instrument(sim_lockin.address, command_intervals={"setState": 0.2}) as inst:
+        inst._send_command("setState", {"State": "start"})
+        start = time.perf_counter()
+        inst._send_command("getState")
+        assert time.perf_counter() - start >= 0.19
+        start = time.perf_counter()
+        inst._send_command("getState")
+        assert time.perf_counter() - start < 0.1
+
+
+def test_command_intervals_default_is_not_shared(sim_lockin):
+    with pytest.raises(TypeError):
+        Instrument.command_intervals["getState"] = 1.0
+    with Instrument(sim_lockin.address, command_intervals={"getState": 0.01}) as inst:
+        assert inst.command_intervals["getState"] == 0.01
+    assert "getState" not in Instrument.command_intervals
+
+
+def test_handshake_detects_batch_support(sim_lockin):
+    with Instrument(sim_lockin.address, pool=False) as inst:
+        assert sim_lockin.requests == 1
+        assert inst.supports_batch()
+        with inst.batch() as b:
+            first, second = b.call("getState"), b.call("getState")
+        assert sim_lockin.requests == 2
+        assert first["result"] == second["result"]
+
+
+def test_handshake_timeout_is_not_cached(sim_lockin):
+    sim_lockin.latency = 0.5
+    start = time.perf_counter()
+    with pytest.raises(zmq.Again):
+        Instrument(sim_lockin.address, timeout=0.2, pool=False)
+    # One timeout, not a second one for a plain ACK.
+    assert time.perf_counter() - start < 0.4
+    sim_lockin.latency = 0
+    time.sleep(0.6)
+    with Instrument(sim_lockin.address, pool=False) as inst:
+        assert inst.supports_batch()
+
+
+def test_dealer_matches_replies_by_id(sim_lockin):
+    with Instrument(sim_lockin.address, transport="dealer") as inst:
+        futures = [inst.submit("getState") for _ in range(8)] + [inst.submit("IDN")]
+        replies = [future.result(timeout=5) for future in futures]
+    assert len({reply["id"] for reply in replies}) == len(replies)
+    assert all(reply["result"] == replies[0]["result"] for reply in replies[:8])
+    assert isinstance(replies[-1]["result"], dict)
+
+
+def test_pool_reuses_acked_socket(sim_lockin):
+    from flex.inst.pool import get_pool
+
+    with Instrument(sim_lockin.address) as first:
+        socket = first.socket
+    assert len(get_pool()) == 1
+    requests = sim_lockin.requests
+    with Instrument(sim_lockin.address) as second:
+        assert second.socket is socket
+        # No second ACK handshake.
+        assert sim_lockin.requests == requests
+        second._send_command("getState")
+    assert len(get_pool()) == 1
+
+
+def test_pool_discards_unhealthy_socket(sim_lockin):
+    from flex.inst.pool import get_pool
+
+    inst = Instrument(sim_lockin.address)
+    inst.write_raw(inst.codec.encode(inst._build_request("getState")))
+    inst.close()
+    assert len(get_pool()) == 0
+
+
+def test_lazy_instrument_connects_on_first_command(sim_lockin):
+    inst = Instrument(sim_lockin.address, lazy=True)
+    assert not inst.connected
+    assert sim_lockin.requests == 0
+    inst._send_command("getState")
+    assert inst.connected
+    inst.close()
+
+
+def test_lazy_close_without_connecting(caplog):
+    inst = Instrument("tcp://127.0.0.1:1", lazy=True)
+    with caplog.at_level(logging.ERROR):
+        inst.close()
+    assert not inst.connected
+    assert not caplog.records
+
+
+def test_timeout_recovers_socket(sim_ppms):
+    from flex.inst.levylab.PPMS import PPMS
+
+    with PPMS(sim_ppms.address, timeout=0.1, retries=0, pool=False) as ppms:
+        sim_ppms.latency = 0.3
+        with pytest.raises(zmq.Again):
+            ppms.getTemperature()
+        sim_ppms.latency = 0
+        # Let the server finish the request that timed out.
+        time.sleep(0.3)
+        assert ppms.getTemperature() == pytest.approx(300, abs=1)
+        assert ppms.recovery_stats() == {"timeouts": 1, "reconnects": 1, "retries": 0, "failures": 1}
+
+
+def test_idempotent_command_is_retried(sim_ppms):
+    from flex.inst.levylab.PPMS import PPMS
+
+    with PPMS(sim_ppms.address, timeout=0.2, retries=2, retry_backoff=0.3, pool=False) as ppms:
+        sim_ppms.latency = 0.3
+        # The first attempt times out; the server is fast again by the retry.
+        threading.Timer(0.1, setattr, (sim_ppms, "latency", 0)).start()
+        assert ppms.getTemperature() == pytest.approx(300, abs=1)
+        assert ppms.recovery_stats()["retries"] >= 1
+
+
+def test_metadata_cache_serves_idn_without_round_trip(sim_lockin):
+    with Instrument(sim_lockin.address) as first:
+        idn = first.idn()
+    with Instrument(sim_lockin.address, pool=False) as second:
+        handshake = sim_lockin.requests
+        assert second.idn() == idn
+        assert second.help() == first.help()
+        # Only HELP was fetched; IDN came from the cache.
+        assert sim_lockin.requests == handshake + 1
+        second.idn(refresh=True)
+        assert sim_lockin.requests == handshake + 2
+
+
+def test_invalidate_metadata_refetches(sim_lockin):
+    with Instrument(sim_lockin.address) as inst:
+        inst.idn()
+        inst.invalidate_metadata()
+        requests = sim_lockin.requests
+        inst.idn()
+        assert sim_lockin.requests == requests + 1
+
+
+def test_state_cache_reuses_fresh_readings(sim_ppms):
+    from flex.inst.levylab.PPMS import PPMS
+
+    with PPMS(sim_ppms.address) as ppms:
+        first = ppms.getTemperature(max_age=10)
+        requests = sim_ppms.requests
+        assert ppms.getTemperature(max_age=10) is first
+        assert sim_ppms.requests == requests
+        # max_age=0 always reads, and so does any reading after a setter.
+        ppms.getTemperature(max_age=0)
+        ppms.setTemperature(10, 1)
+        ppms.getTemperature(max_age=10)
+        assert sim_ppms.requests == requests + 3
+
+
+def test_log_file_handler_is_attached_once(sim_lockin, tmp_path):
+    log_file = str(tmp_path / "lockin.log")
+    for _ in range(3):
+        Instrument(sim_lockin.address, log_file=log_file).close()
+    logger = logging.getLogger("Instrument")
+    handlers = [h for h in logger.handlers if getattr(h, "flex_log_file", None) == log_file]
+    assert len(handlers) == 1
+    logger.removeHandler(handlers[0])
+
+
+def test_logged_payloads_are_truncated(sim_lockin, tmp_path):
+    from flex.inst import logs
+
+    log_file = str(tmp_path / "lockin.log")
+    logs.configure(payload_limit=32)
+    try:
+        with Instrument(sim_lockin.address, log_file=log_file) as inst:
+            inst._send_command("getSweepWaveforms")
+    finally:
+        logs.configure(payload_limit=1024)
+        logger = logging.getLogger("Instrument")
+        for handler in [h for h in logger.handlers if hasattr(h, "flex_log_file")]:
+            logger.removeHandler(handler)
+            handler.flush()
+    lines = [line for line in open(log_file) if "Received response" in line]
+    assert lines and all(line.rstrip().endswith("... [truncated]") for line in lines)
+
+
+def test_stats_count_round_trips_and_timeouts(sim_lockin):
+    with Instrument(sim_lockin.address, timeout=0.1, retries=0, pool=False) as inst:
+        for _ in range(3):
+            inst._send_command("getState")
+        sim_lockin.latency = 0.3
+        with pytest.raises(zmq.Again):
+            inst._send_command("getResults")
+        sim_lockin.latency = 0
+        stats = inst.stats(reset=True)
+        assert stats["getState"]["count"] == 3
+        assert stats["getState"]["errors"] == 0
+        assert stats["getState"]["bytes_sent"] > 0
+        assert stats["getState"]["bytes_received"] > 0
+        assert 0 < stats["getState"]["p50_ms"] <= stats["getState"]["max_ms"]
+        assert stats["getResults"]["errors"] == 1
+        assert inst.stats() == {}
+
+
+def test_threads_share_one_instrument(sim_lockin):
+    from concurrent.futures import ThreadPoolExecutor
+
+    with Instrument(sim_lockin.address) as inst:
+        with ThreadPoolExecutor(8) as pool:
+            replies = list(pool.map(lambda _: inst._send_command("getState"), range(64)))
+        assert all(reply["result"] == replies[0]["result"] for reply in replies)
+        assert inst.stats()["getState"]["count"] == 64
+
+
+def test_submit_on_req_runs_on_worker_thread(sim_lockin):
+    with Instrument(sim_lockin.address) as inst:
+        futures = [inst.submit("getState") for _ in range(8)]
+        assert all(future.result(timeout=5)["result"] for future in futures)
+        assert len({future.result()["id"] for future in futures}) == 8
@@ -0,0 +1,227 @@
+"""Lockin driver features against a SimLockin."""
+
+import time
+
+import pytest
+
+pytest.importorskip("flex.sim")
+np = pytest.importorskip("numpy")
+zmq = pytest.importorskip("zmq")
+
+from flex.inst.levylab.Lockin import Lockin, SweepDataset, SweepHandle
+from flex.sim import SimLockin
+
+pytestmark = pytest.mark.usefixtures("cold_start")
+
+
+@pytest.fixture
+def lockin(sim_lockin):
+    with Lockin(sim_lockin.address) as lockin:
+        lockin.setAO_Amplitude(2, 1.0)
+        yield lockin
+
+
+def test_lockin_results_one_round_trip(sim_lockin, lockin):
+    keys = ["AI2.Ref2.X", "AI2.Ref2.Y", "AI2.Mean", "AI9.Ref1.X"]
+    before = sim_lockin.requests
+    values = lockin.get_lockin_results(keys)
+    assert sim_lockin.requests == before + 1
+    assert list(values) == keys
+    assert values["AI2.Ref2.X"] == pytest.approx(0.1 / np.sqrt(2))
+    assert values["AI2.Ref2.Y"] == pytest.approx(0)
+    assert values["AI9.Ref1.X"] is None
+    array = lockin.get_lockin_results(keys, as_array=True)
+    assert array[0] == pytest.approx(0.1 / np.sqrt(2))
+    assert np.isnan(array[3])
+
+
+def test_lockin_results_pattern(lockin):
+    values = lockin.get_lockin_results("AI*.Ref2.R")
+    assert list(values) == [f"AI{ch}.Ref2.R" for ch in range(1, 9)]
+    assert values["AI2.Ref2.R"] == pytest.approx(0.1 / np.sqrt(2))
+    # Served again from the cached pattern.
+    assert list(lockin.get_lockin_results("AI*.Ref2.R")) == list(values)
+    assert lockin.get_lockin_result(2, "R", ref=2) == pytest.approx(values["AI2.Ref2.R"])
+
+
+def test_lockin_results_index_follows_layout(sim_lockin, lockin):
+    assert lockin.get_lockin_results(["AI4.Ref4.X"])["AI4.Ref4.X"] is not None
+    sim_lockin.references = 2
+    assert lockin.get_lockin_results(["AI4.Ref4.X"])["AI4.Ref4.X"] is None
+    assert lockin.get_lockin_results(["AI2.Ref2.X"])["AI2.Ref2.X"] == pytest.approx(0.1 / np.sqrt(2))
+
+
+def test_lockin_array(lockin):
+    array = lockin.get_lockin_array([1, 2, 9], params=("X", "Y"), refs=(1, 2))
+    assert array.shape == (3, 2, 2)
+    assert array[1, 1, 0] == pytest.approx(0.1 / np.sqrt(2))
+    assert np.isnan(array[2]).all()
+
+
+SWEEP = {
+    "Sweep Time (s)": 0.1,
+    "Initial Wait (s)": 0,
+    "Channels": [{"Enable?": True, "Channel": 1, "Start": 0, "End": 1, "Pattern": "Ramp /"}],
+}
+
+
+class FakeLockin:
+    """Replies to getState from a script, for SweepHandle."""
+
+    _address = "tcp://127.0.0.1:1"
+
+    def __init__(self, states):
+        self.states = list(states)
+
+    def idn(self):
+        return {}
+
+    def getState(self):
+        return self.states.pop(0)
+
+
+def test_sweep_handle_waits_for_sweeping():
+    # Right after the start the server may still report 'running'.
+    handle = SweepHandle(FakeLockin(["running", "sweeping", "running"]), duration=10)
+    assert not handle.done()
+    assert not handle.done()
+    assert handle.done()
+    assert handle.done()
+
+
+def test_sweep_handle_done_after_expected_end():
+    handle = SweepHandle(FakeLockin(["running"]), duration=0)
+    assert handle.done()
+
+
+def test_start_sweep(lockin):
+    # Long enough to outlast the pacing after setState.
+    handle = lockin.start_sweep({**SWEEP, "Initial Wait (s)": 0.5})
+    with pytest.raises(Exception, match="Already sweeping"):
+        lockin.start_sweep(SWEEP)
+    dataset = handle.result(timeout=5)
+    assert handle.done()
+    assert lockin.getState() == "running"
+    np.testing.assert_allclose(dataset["AO1"], np.linspace(0, 1, 100))
+    np.testing.assert_allclose(dataset["AI1"], 0.1 * np.linspace(0, 1, 100))
+
+
+def test_lockin_sweep_with_published_state(cold_start):
+    with SimLockin(seed=0, publish=["getState"], publish_interval=0.01) as sim:
+        with Lockin(sim.address) as lockin:
+            lockin.lockin_sweep(SWEEP, timeout=5)
+            assert lockin.getState() == "running"
+            assert sim.ao[0]["DC"] == 1
+
+
+def test_sweep_dataset(lockin):
+    lockin.start_sweep(SWEEP).wait(timeout=5)
+    for binary in (False, True):
+        dataset = lockin.get_sweep_dataset(binary=binary)
+        assert dataset.data.shape == (8 + 8 + 2 * 8 * 4, 100)
+        assert dataset.channels[:2] == ["AO1", "AO2"]
+        assert dataset.channels[16:18] == ["AI1X1", "AI1Y1"]
+        assert dataset.block("X").shape == (32, 100)
+        np.testing.assert_allclose(dataset["AI2X2"], 0.1 / np.sqrt(2))
+        np.testing.assert_allclose(dataset.time("AO1")[:2], [0, 0.001])
+
+
+def test_sweep_dataset_keeps_row_lengths():
+    reply = {
+        "AO": [{"attributes": {"AO Channel": 1}, "t0": 0, "dt": 0.1, "Y": [1, 2, 3, 4]}],
+        "AI": [{"attributes": {"AI Channel": 1}, "t0": 1, "dt": 0.5, "Y": [5, 6]}],
+    }
+    dataset = SweepDataset.from_reply(reply)
+    np.testing.assert_array_equal(dataset["AI1"], [5, 6])
+    np.testing.assert_allclose(dataset.time("AI1"), [1, 1.5])
+    assert np.isnan(dataset.block("AI")[0, 2:]).all()
+    assert list(dataset.to_dict()) == ["AO1", "AI1"]
+
+
+def test_start_stream_rejects_bad_arguments(lockin):
+    with pytest.raises(ValueError):
+        lockin.start_stream(["AI1.Ref1.X"], capacity=0)
+    with pytest.raises(ValueError):
+        lockin.start_stream(["AI1.Ref1.X"], rate=0)
+
+
+def test_stream_snapshot_and_drain(lockin):
+    with lockin.start_stream(["AI2.Ref2.X", "AI9.Ref1.X"], rate=200, capacity=5) as stream:
+        time.sleep(0.2)
+        times, values = stream.snapshot()
+        assert stream.running
+    assert not stream.running
+    assert stream.count > 5 and stream.errors == 0
+    # Bounded: only the newest samples are kept.
+    assert values.shape == (5, 2) and times.shape == (5,)
+    assert np.all(np.diff(times) >= 0)
+    np.testing.assert_allclose(values[:, 0], 0.1 / np.sqrt(2))
+    assert np.isnan(values[:, 1]).all()
+    times, values = stream.drain()
+    assert len(times) == 5
+    assert stream.dropped == stream.count - 5
+    assert len(stream.drain()[0]) == 0
+
+
+def test_stream_pattern(lockin):
+    with lockin.start_stream("AI*.Ref2.X", rate=100) as stream:
+        time.sleep(0.05)
+    assert stream.keys == [f"AI{ch}.Ref2.X" for ch in range(1, 9)]
+    assert stream.snapshot()[1].shape[1] == 8
+
+
+def test_set_dc_vector(sim_lockin, lockin):
+    sim_lockin.ao[2]["DC"] = 0.5
+    lockin.set_dc_vector({1: 1.0, 2: -0.5, 3: 0.5}, sweep_rate=0.1, initial_wait=0)
+    # One sweep of the channels away from their target, timed by the largest step.
+    config = sim_lockin.sweep_config
+    assert [c["Channel"] for c in config["Channels"]] == [1, 2]
+    assert config["Sweep Time (s)"] == pytest.approx(0.1)
+    assert [sim_lockin.ao[ch]["DC"] for ch in range(3)] == pytest.approx([1.0, -0.5, 0.5])
+
+
+def test_set_dc_vector_at_target(sim_lockin, lockin):
+    before = sim_lockin.requests
+    lockin.set_dc_vector({1: 0.0, 2: 0.0005}, sweep_rate=0.1)
+    assert sim_lockin.requests == before + 1
+    assert sim_lockin.sweep_config == {}
+
+
+def test_configure_ao(sim_lockin, lockin):
+    assert lockin.configure_ao({1: {"amplitude": 0.5, "function": "Square"}, 3: {"dc": 0}}) == {
+        1: {"Amplitude": 0.5, "Function": "Square"}
+    }
+    assert sim_lockin.ao[0]["Amplitude"] == 0.5 and sim_lockin.ao[0]["Function"] == "Square"
+    assert lockin.configure_ao({1: {"amplitude": 0.5}}) == {}
+    with pytest.raises(ValueError):
+        lockin.configure_ao({1: {"function": "Sawtooth"}})
+    with pytest.raises(ValueError):
+        lockin.configure_ao({9: {"amplitude": 0.1}})
+
+
+def test_configure_ao_in_batch(sim_lockin, lockin):
+    with lockin.batch() as b:
+        state = b.call("getState")
+        assert lockin.configure_ao({1: {"amplitude": 0.5}}) == {1: {"Amplitude": 0.5}}
+        # Queued with the caller's batch, not sent yet.
+        assert sim_lockin.ao[0]["Amplitude"] == 0
+        assert "Amplitude" not in lockin.ao_state()[1]
+    assert state["result"] == "idle"
+    assert sim_lockin.ao[0]["Amplitude"] == 0.5
+    assert lockin.ao_state()[1]["Amplitude"] == 0.5
+    assert lockin.configure_ao({1: {"amplitude": 0.5}}) == {}
+
+
+def test_configure_ao_after_failed_batch(sim_lockin):
+    with Lockin(sim_lockin.address, timeout=0.1, retries=0, pool=False) as lockin:
+        assert lockin.configure_ao({1: {"amplitude": 0.5}}) == {1: {"Amplitude": 0.5}}
+        sim_lockin.latency = 0.3
+        with pytest.raises(zmq.Again):
+            lockin.configure_ao({1: {"amplitude": 0.7, "dc": 0.1}})
+        # The server may have applied the writes, so the cache is dropped.
+        assert lockin._ao_state == {}
+        sim_lockin.latency = 0
+        # Let the server finish the request that timed out.
+        time.sleep(0.3)
+        assert lockin.ao_state()[1]["Amplitude"] == pytest.approx(0.7)
+        assert lockin.configure_ao({1: {"amplitude": 0.7, "dc": 0.1}}) == {}
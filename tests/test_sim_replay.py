@@ -0,0 +1,76 @@
+"""Record a SimLockin session and replay it without a server."""
+
+import pytest
+
+pytest.importorskip("flex.sim")
+np = pytest.importorskip("numpy")
+
+from flex.inst.levylab.Lockin import Lockin
+from flex.inst.replay import replay
+
+pytestmark = pytest.mark.usefixtures("cold_start")
+
+SWEEP = {
+    "Sweep Time (s)": 0.1,
+    "Initial Wait (s)": 0,
+    "Channels": [{"Enable?": True, "Channel": 1, "Start": 0, "End": 1, "Pattern": "Ramp /"}],
+}
+
+
+@pytest.fixture
+def recording(sim_lockin, tmp_path):
+    path = tmp_path / "lockin.jsonl"
+    with Lockin(sim_lockin.address, record=path) as lockin:
+        lockin.getAO(1)
+        lockin.getAI(1)
+    return path
+
+
+def test_replay_two_sweeps(sim_lockin, cold_start, tmp_path):
+    path = tmp_path / "lockin.jsonl"
+    with Lockin(sim_lockin.address, record=path) as lockin:
+        recorded = [lockin.start_sweep(SWEEP).result(timeout=5) for _ in range(2)]
+
+    # A fresh process: nothing cached, no server needed.
+    cold_start()
+    lockin = replay(Lockin)(sim_lockin.address, recording=path, match="key")
+    try:
+        replayed = [lockin.start_sweep(SWEEP).result(timeout=5) for _ in range(2)]
+    finally:
+        lockin.close()
+    for a, b in zip(recorded, replayed):
+        assert a.channels == b.channels
+        np.testing.assert_array_equal(a.data, b.data)
+
+
+def test_order_ignores_params(sim_lockin, cold_start, recording):
+    cold_start()
+    lockin = replay(Lockin)(sim_lockin.address, recording=recording, match="order")
+    try:
+        assert lockin.getAO(2) is not None
+        with pytest.raises(LookupError):
+            lockin.getAO(1)
+    finally:
+        lockin.close()
+
+
+def test_key_matches_params(sim_lockin, cold_start, recording):
+    cold_start()
+    lockin = replay(Lockin)(sim_lockin.address, recording=recording, match="key")
+    try:
+        assert lockin.getAI(1) is not None
+        assert lockin.getAO(1) == lockin.getAO(1)
+        with pytest.raises(LookupError):
+            lockin.getAO(2)
+    finally:
+        lockin.close()
+
+
+def test_write_raw_is_ignored(sim_lockin, cold_start, recording):
+    cold_start()
+    lockin = replay(Lockin)(sim_lockin.address, recording=recording, match="order")
+    try:
+        lockin.write_raw('{"jsonrpc": "2.0", "method": "setAO", "params": {}}')
+        assert lockin.getAO(1) is not None
+    finally:
+        lockin.close()
@@ -0,0 +1,62 @@
+"""Instrument.subscribe against the simulated servers."""
+
+import queue
+import time
+
+import pytest
+
+pytest.importorskip("flex.sim")
+
+from flex.inst import subscribe as subscriptions
+from flex.inst.levylab.PPMS import PPMS
+from flex.sim import SimPPMS
+
+pytestmark = pytest.mark.usefixtures("cold_start")
+
+
+@pytest.fixture
+def sim_ppms_pub():
+    with SimPPMS(seed=0, publish=["getTemperature"], publish_interval=0.02) as sim:
+        yield sim
+
+
+def test_pub_subscription_receives_and_stops(sim_ppms_pub):
+    with PPMS(sim_ppms_pub.address) as ppms:
+        readings = queue.Queue()
+        subscription = ppms.subscribe("getTemperature", readings)
+        assert subscription.mode == "pub"
+        topic, value = readings.get(timeout=2)
+        assert topic == "getTemperature"
+        assert value == pytest.approx(300, abs=1)
+        listener = subscription._source
+        subscription.close()
+        listener._thread.join(timeout=2)
+        assert not listener._thread.is_alive()
+        assert sim_ppms_pub.pub_address not in subscriptions._LISTENERS
+
+
+def test_listener_survives_while_subscriptions_remain(sim_ppms_pub):
+    with PPMS(sim_ppms_pub.address) as ppms:
+        first = ppms.subscribe("getTemperature", queue.Queue())
+        readings = queue.Queue()
+        second = ppms.subscribe("getTemperature", readings)
+        first.close()
+        time.sleep(0.2)
+        readings.queue.clear()
+        assert readings.get(timeout=2)[0] == "getTemperature"
+        assert second._source._thread.is_alive()
+        second.close()
+
+
+def test_poll_fallback_without_pub_endpoint(sim_ppms):
+    with PPMS(sim_ppms.address) as ppms:
+        readings = []
+        with ppms.subscribe(["getTemperature"], lambda topic, value: readings.append(value), interval=0.02) as sub:
+            assert sub.mode == "poll"
+            deadline = time.monotonic() + 2
+            while len(readings) < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        count = len(readings)
+        time.sleep(0.1)
+    assert count >= 3
+    assert len(readings) <= count + 1